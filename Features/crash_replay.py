@@ -0,0 +1,383 @@
+from dataclasses import dataclass
+import asyncio
+import logging
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from audit_log import read_binary
+from modbus_simulator import FAULT_NONE, ModbusSimulator
+from signal_processor import EMSignalProcessor
+from Features.fuzz_campaign import decode_frames, encode_frames, probe_health
+from Features.protocol_tester import OUTCOME_CONNECTION_ERROR, OUTCOME_TIMEOUT, OUTCOMES, FuzzBatch, FuzzEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplaySequence:
+    """Ordered (MBAP length field, PDU) requests, optionally with their original send times."""
+    frames: List[Tuple[int, bytes]]
+    # Seconds from the first request, or None to replay as fast as possible
+    times: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReplaySequence":
+        """Load a crash reproducer written by FuzzCampaign."""
+        with open(path, "rb") as f:
+            return cls(decode_frames(f.read()))
+
+    @classmethod
+    def from_audit(cls, path: str, first_case: int = 0, last_case: Optional[int] = None) -> "ReplaySequence":
+        """Load ``fuzz_case`` records from a binary audit log, keeping their timing."""
+        frames, times = [], []
+        for timestamp, event, fields, data in read_binary(path):
+            case = fields.get("case", -1)
+            if event != "fuzz_case" or case < first_case or (last_case is not None and case > last_case):
+                continue
+            frames.append((fields.get("length_field", len(data) + 1), data))
+            times.append(timestamp)
+        times = np.array(times)
+        return cls(frames, times - times[0] if len(times) else None)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(encode_frames(self.frames))
+
+    def subset(self, indices: Sequence[int]) -> "ReplaySequence":
+        times = None if self.times is None else self.times[list(indices)]
+        return ReplaySequence([self.frames[i] for i in indices],
+                              None if times is None or not len(times) else times - times[0])
+
+    def batch(self) -> FuzzBatch:
+        width = max((len(pdu) for _, pdu in self.frames), default=1)
+        pdus = np.zeros((len(self.frames), width), dtype=np.uint8)
+        for row, (_, pdu) in enumerate(self.frames):
+            pdus[row, :len(pdu)] = np.frombuffer(pdu, dtype=np.uint8)
+        return FuzzBatch(pdus=pdus, lengths=np.array([len(pdu) for _, pdu in self.frames], dtype=np.int64),
+                         length_fields=np.array([field for field, _ in self.frames], dtype=np.int64),
+                         strategies=np.zeros(len(self.frames), dtype=np.uint8))
+
+
+@dataclass
+class ReplayResult:
+    outcomes: np.ndarray
+    exception_codes: np.ndarray
+    # Requests sent on a connection that so far carried only frames whose MBAP length matches
+    # the PDU, so the target had no framing reason to ignore or drop them
+    clean: np.ndarray
+    elapsed: float
+
+    @property
+    def unanswered(self) -> int:
+        """Clean requests that timed out or lost the connection."""
+        failed = np.isin(self.outcomes, (OUTCOME_TIMEOUT, OUTCOME_CONNECTION_ERROR))
+        return int(np.count_nonzero(failed & self.clean))
+
+    def summary(self) -> str:
+        counts = np.bincount(self.outcomes[self.outcomes >= 0], minlength=len(OUTCOMES))
+        return f"{len(self.outcomes)} requests in {self.elapsed:.3f}s: " + ", ".join(
+            f"{name}={count}" for name, count in zip(OUTCOMES, counts))
+
+
+async def replay(host: str, port: int, sequence: ReplaySequence, unit_id: int = 1, timeout: float = 1.0,
+                 timing: bool = False) -> ReplayResult:
+    """Send ``sequence`` in order on one connection (reconnecting after failures).
+
+    Requests go out back to back, or at their original offsets with
+    ``timing=True``.
+    """
+    engine = FuzzEngine(host, port, workers=1, timeout=timeout, unit_id=unit_id)
+    batch = sequence.batch()
+    start = time.perf_counter()
+    schedule = sequence.times if timing else None
+    result = await engine.execute(batch, schedule=schedule)
+    elapsed = time.perf_counter() - start
+
+    # One worker sends in order and reconnects after every failure
+    clean = np.zeros(len(batch), dtype=bool)
+    connection_clean = True
+    for index in range(len(batch)):
+        connection_clean &= bool(batch.length_fields[index] == batch.lengths[index] + 1)
+        clean[index] = connection_clean
+        if result.outcomes[index] in (OUTCOME_TIMEOUT, OUTCOME_CONNECTION_ERROR):
+            connection_clean = True
+    return ReplayResult(result.outcomes, result.exception_codes, clean, elapsed)
+
+
+class ReplayTarget:
+    """A device that replays are sent to; ``reset`` restores it to a known-good state."""
+
+    host: str
+    port: int
+    unit_id: int = 1
+
+    def reset(self):
+        pass
+
+    def em_window(self) -> Optional[np.ndarray]:
+        """A current EM capture of the device, or None without a probe."""
+        return None
+
+    def close(self):
+        pass
+
+
+class DeviceTarget(ReplayTarget):
+    """A real device or server; ``reset`` (e.g. a power-cycle hook) runs before each replay."""
+
+    def __init__(self, host: str, port: int, unit_id: int = 1, reset: Optional[Callable[[], None]] = None,
+                 em_window: Optional[Callable[[], np.ndarray]] = None):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self._reset = reset
+        self._em_window = em_window
+
+    def reset(self):
+        if self._reset is not None:
+            self._reset()
+
+    def em_window(self) -> Optional[np.ndarray]:
+        return self._em_window() if self._em_window is not None else None
+
+
+class SimulatorTarget(ReplayTarget):
+    """A private ModbusSimulator on its own port, rebuilt from scratch by every ``reset``.
+
+    ``build(simulator, port)`` adds the devices. With a ``processor`` the
+    target also emits an EM window: the processor's crash signal while any
+    device is in a fault mode, its normal signal otherwise.
+    """
+
+    def __init__(self, build: Callable[[ModbusSimulator, int], None], processor: Optional[EMSignalProcessor] = None,
+                 host: str = "127.0.0.1", port: Optional[int] = None, unit_id: int = 1):
+        self.build = build
+        self.processor = processor
+        self.host = host
+        self.port = port or _free_port(host)
+        self.unit_id = unit_id
+        self.simulator: Optional[ModbusSimulator] = None
+
+    def reset(self):
+        self.close()
+        self.simulator = ModbusSimulator(host=self.host, tick_interval=0.05)
+        self.build(self.simulator, self.port)
+        self.simulator.start()
+
+    def em_window(self) -> Optional[np.ndarray]:
+        if self.processor is None or self.simulator is None:
+            return None
+        faulted = any(device.fault.mode != FAULT_NONE for device in self.simulator.devices.values())
+        return self.processor.generate_crash_signal() if faulted else self.processor.generate_normal_signal()
+
+    def close(self):
+        if self.simulator is not None:
+            self.simulator.stop()
+            self.simulator = None
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+@dataclass
+class Verdict:
+    crashed: bool
+    reason: str
+    em_score: float = float("nan")
+
+
+class CrashOracle:
+    """Decide whether a replay crashed the target.
+
+    The target has crashed if a cleanly framed request in the replay went
+    unanswered (even if it recovered since), if a plain register read after
+    the replay fails (it hangs or refuses connections), or, when it has an
+    EM probe and a baseline has been learned, if the EM window's largest
+    per-field z-score against the baseline exceeds ``z_threshold``; the
+    latter catches silent crashes that still answer Modbus requests.
+    """
+
+    def __init__(self, processor: Optional[EMSignalProcessor] = None, z_threshold: float = 6.0,
+                 settle: float = 0.05, timeout: float = 0.5, health_address: int = 0):
+        self.processor = processor
+        self.z_threshold = z_threshold
+        self.settle = settle
+        self.timeout = timeout
+        self.health_address = health_address
+        self.baseline_mean: Optional[np.ndarray] = None
+        self.baseline_std: Optional[np.ndarray] = None
+
+    def learn_baseline(self, windows: np.ndarray):
+        """Learn the EM baseline from known-good windows (one per row)."""
+        rows = self.processor.analyze_batch(np.atleast_2d(windows)).as_array()
+        self.baseline_mean = np.nanmean(rows, axis=0)
+        # Floor the spread so perfectly periodic baselines don't flag rounding noise
+        self.baseline_std = np.maximum(np.nanstd(rows, axis=0), 0.01 * np.abs(self.baseline_mean) + 1e-9)
+
+    def calibrate(self, target: ReplayTarget, windows: int = 16):
+        """Learn the baseline from a freshly reset target."""
+        target.reset()
+        self.learn_baseline(np.array([target.em_window() for _ in range(windows)]))
+
+    def em_score(self, window: np.ndarray) -> float:
+        row = self.processor.analyze_batch(window[None, :]).as_array()[0]
+        z = np.abs(row - self.baseline_mean) / self.baseline_std
+        return float(np.nanmax(z)) if not np.all(np.isnan(z)) else np.inf
+
+    async def judge(self, target: ReplayTarget, result: ReplayResult) -> Verdict:
+        await asyncio.sleep(self.settle)
+        failure = await probe_health(target.host, target.port, target.unit_id, self.health_address, self.timeout)
+        if failure is not None:
+            return Verdict(True, failure)
+        if result.unanswered:
+            return Verdict(True, "unanswered")
+        if self.processor is not None and self.baseline_mean is not None:
+            window = target.em_window()
+            if window is not None:
+                score = self.em_score(window)
+                return Verdict(score > self.z_threshold, "em_deviation" if score > self.z_threshold else "ok",
+                               score)
+        return Verdict(False, "ok")
+
+
+@dataclass
+class MinimizationResult:
+    original: ReplaySequence
+    minimized: ReplaySequence
+    reproduced: bool
+    reason: str
+    replays: int
+    elapsed: float
+
+    def summary(self) -> str:
+        if not self.reproduced:
+            return f"Crash did not reproduce ({self.replays} replay(s), {self.elapsed:.1f}s)"
+        return (f"Minimized {len(self.original)} -> {len(self.minimized)} request(s) ({self.reason}) "
+                f"with {self.replays} replay(s) in {self.elapsed:.1f}s")
+
+
+class CrashMinimizer:
+    """Delta-debugging (ddmin) reduction of a crashing request sequence.
+
+    Every candidate is replayed on a freshly reset target and judged by the
+    oracle. All subsets and complements of one ddmin round are tested at
+    once, spread over the ``targets`` (e.g. several SimulatorTargets), and
+    results are cached so no candidate is replayed twice. The outcome is
+    1-minimal: removing any single remaining request no longer crashes the
+    target.
+    """
+
+    def __init__(self, targets: List[ReplayTarget], oracle: CrashOracle, timing: bool = False,
+                 timeout: float = 0.5):
+        self.targets = targets
+        self.oracle = oracle
+        self.timing = timing
+        self.timeout = timeout
+        self.replays = 0
+        self._cache: Dict[Tuple[int, ...], Verdict] = {}
+
+    def minimize(self, sequence: ReplaySequence) -> MinimizationResult:
+        return asyncio.run(self.minimize_async(sequence))
+
+    async def minimize_async(self, sequence: ReplaySequence) -> MinimizationResult:
+        start = time.perf_counter()
+        self.replays = 0
+        self._cache = {}
+        self._free = asyncio.Queue()
+        for target in self.targets:
+            self._free.put_nowait(target)
+
+        current = tuple(range(len(sequence)))
+        verdict, = await self._test_all(sequence, [current])
+        if not verdict.crashed:
+            return MinimizationResult(sequence, sequence, False, verdict.reason, self.replays,
+                                      time.perf_counter() - start)
+        reason = verdict.reason
+        n = 2
+        while len(current) >= 2:
+            chunks = [chunk for chunk in np.array_split(current, min(n, len(current))) if len(chunk)]
+            subsets = [tuple(chunk.tolist()) for chunk in chunks]
+            complements = [tuple(i for i in current if i not in set(subset)) for subset in subsets] if n > 2 else []
+            verdicts = await self._test_all(sequence, subsets + complements)
+            crashing = [index for index, verdict in enumerate(verdicts) if verdict.crashed]
+            if crashing and crashing[0] < len(subsets):
+                current, reason, n = subsets[crashing[0]], verdicts[crashing[0]].reason, 2
+            elif crashing:
+                current, reason, n = complements[crashing[0] - len(subsets)], verdicts[crashing[0]].reason, max(n - 1, 2)
+            elif n >= len(current):
+                break
+            else:
+                n = min(2 * n, len(current))
+
+        result = MinimizationResult(sequence, sequence.subset(current), True, reason, self.replays,
+                                    time.perf_counter() - start)
+        logger.info(result.summary())
+        return result
+
+    async def _test_all(self, sequence: ReplaySequence, candidates: List[Tuple[int, ...]]) -> List[Verdict]:
+        pending = {candidate: asyncio.create_task(self._test(sequence, candidate))
+                   for candidate in dict.fromkeys(candidates) if candidate not in self._cache}
+        for candidate, task in pending.items():
+            self._cache[candidate] = await task
+        return [self._cache[candidate] for candidate in candidates]
+
+    async def _test(self, sequence: ReplaySequence, candidate: Tuple[int, ...]) -> Verdict:
+        target = await self._free.get()
+        try:
+            # Simulator restarts and reset hooks block; keep them off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, target.reset)
+            result = await replay(target.host, target.port, sequence.subset(candidate), target.unit_id,
+                                  self.timeout, self.timing)
+            self.replays += 1
+            return await self.oracle.judge(target, result)
+        finally:
+            self._free.put_nowait(target)
+
+# Example Usage
+if __name__ == "__main__":
+    import sys
+    from config import SignalConfig
+    from modbus_simulator import FAULT_SILENT_CRASH
+
+    logging.basicConfig(level=logging.INFO)
+
+    def build(simulator: ModbusSimulator, port: int):
+        device = simulator.add_device(port, n_registers=64)
+        handle = device.handle
+
+        def buggy_handle(pdu: bytes) -> bytes:
+            # Planted bug: writing 0xFFFF to register 13 after register 7 was set silently crashes the device
+            if pdu[:5] == b"\x06\x00\x0d\xff\xff" and device.registers[7]:
+                device.inject_fault(FAULT_SILENT_CRASH)
+            return handle(pdu)
+        device.handle = buggy_handle
+
+    processor = EMSignalProcessor(SignalConfig(sample_rate=2000, duration=0.1, trigger_threshold=0.3,
+                                               noise_threshold=0.1))
+    if len(sys.argv) > 1:
+        sequence = ReplaySequence.from_file(sys.argv[1])
+    else:
+        rng = np.random.default_rng(0)
+        frames = [(6, bytes([0x06, 0, int(a), int(v) >> 8, int(v) & 0xFF]))
+                  for a, v in zip(rng.integers(0, 64, 200), rng.integers(0, 0x10000, 200))]
+        frames[40] = (6, b"\x06\x00\x07\x00\x01")
+        frames[150] = (6, b"\x06\x00\x0d\xff\xff")
+        sequence = ReplaySequence(frames)
+    targets = [SimulatorTarget(build, processor) for _ in range(4)]
+    oracle = CrashOracle(processor)
+    oracle.calibrate(targets[0])
+    try:
+        result = CrashMinimizer(targets, oracle).minimize(sequence)
+    finally:
+        for target in targets:
+            target.close()
+    print(result.summary())
+    for length_field, pdu in result.minimized.frames:
+        print(f"  length={length_field} pdu={pdu.hex()}")
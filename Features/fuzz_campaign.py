@@ -0,0 +1,381 @@
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from audit_log import AuditLog
+from modbus_protocol import MBAP_HEADER, ModbusError, decode_read_registers, read_holding_registers_pdu
+from modbus_simulator import ILLEGAL_FUNCTION
+from Features.protocol_tester import (MAX_PDU_SIZE, OUTCOME_CONNECTION_ERROR, OUTCOME_RESPONSE,
+                                      OUTCOME_TIMEOUT, BatchResult, FuzzBatch, FuzzEngine, FuzzStats)
+
+logger = logging.getLogger(__name__)
+
+# Response classes in the coverage key: 0 normal response, 1-12 exception code, 13 other
+# exception code, 14 timeout, 15 connection error
+RESPONSE_CLASSES = 16
+# Addresses are bucketed by bit length (0, 1, 2-3, 4-7, ... 32768-65535)
+ADDRESS_BUCKETS = 17
+STATE_FILE = "campaign.json"
+COVERAGE_FILE = "coverage.npy"
+# Each stored frame: MBAP length field and PDU length, then the PDU
+FRAME_HEADER = struct.Struct('<HH')
+
+
+def response_classes(result: BatchResult) -> np.ndarray:
+    """Map per-case outcomes and exception codes to coverage response classes."""
+    codes = result.exception_codes.astype(np.int64)
+    classes = np.where((codes >= 1) & (codes <= 12), codes, 13)
+    classes = np.where(result.outcomes == OUTCOME_RESPONSE, 0, classes)
+    classes = np.where(result.outcomes == OUTCOME_TIMEOUT, 14, classes)
+    return np.where(result.outcomes == OUTCOME_CONNECTION_ERROR, 15, classes)
+
+
+def encode_frames(frames: List[tuple]) -> bytes:
+    """Serialize (length_field, pdu) frames."""
+    return b"".join(FRAME_HEADER.pack(length_field & 0xFFFF, len(pdu)) + pdu for length_field, pdu in frames)
+
+
+def decode_frames(data: bytes) -> List[tuple]:
+    """Parse frames written by ``encode_frames``."""
+    frames = []
+    offset = 0
+    while offset < len(data):
+        length_field, size = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size
+        frames.append((length_field, data[offset:offset + size]))
+        offset += size
+    return frames
+
+
+# How a crashed target fails its health read
+FAILURE_HANG = "hang"
+FAILURE_DOWN = "down"
+
+
+def crash_signature(failure: str, length_field: int, pdu: bytes) -> str:
+    """Readable crash bucket: failure kind, and the suspect request's function code and length consistency."""
+    function_code = pdu[0] if pdu else -1
+    mbap = "ok" if length_field == len(pdu) + 1 else ("short" if length_field < len(pdu) + 1 else "long")
+    signature = f"{failure}:fc={function_code:#04x}:mbap={mbap}"
+    if function_code in (0x0F, 0x10) and len(pdu) >= 6:
+        signature += f":count={'ok' if pdu[5] == len(pdu) - 6 else 'bad'}"
+    return signature
+
+
+async def probe_health(host: str, port: int, unit_id: int = 1, address: int = 0,
+                       timeout: float = 1.0) -> Optional[str]:
+    """None if a plain register read on a fresh connection succeeds, else the failure kind."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (asyncio.TimeoutError, OSError):
+        return FAILURE_DOWN
+    try:
+        pdu = read_holding_registers_pdu(address, 1)
+        writer.write(MBAP_HEADER.pack(0, 0, len(pdu) + 1, unit_id) + pdu)
+        response = await asyncio.wait_for(FuzzEngine._read_response(reader, 0), timeout)
+        decode_read_registers(response)
+        return None
+    except ModbusError:
+        # Any well-formed answer means the device is still processing requests
+        return None
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+        return FAILURE_HANG
+    finally:
+        writer.close()
+
+
+class CoverageMap:
+    """Hit counts over (function code, address bucket, response class) cells.
+
+    Address buckets grow by powers of two, so a campaign earns new coverage
+    for reaching a new order of magnitude or a new response there, not for
+    every individual register; the whole map is a 256 x 17 x 16 array.
+    """
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        shape = (256, ADDRESS_BUCKETS, RESPONSE_CLASSES)
+        self.counts = np.zeros(shape, dtype=np.uint32) if counts is None else counts.reshape(shape)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.counts))
+
+    def cells(self, batch: FuzzBatch, result: BatchResult) -> np.ndarray:
+        """Flat cell index of every case."""
+        pdus = batch.pdus.astype(np.int64)
+        addresses = np.where(batch.lengths >= 3, pdus[:, 1] << 8 | pdus[:, 2], 0)
+        classes = response_classes(result)
+        buckets = np.where(addresses > 0, np.log2(np.maximum(addresses, 1)).astype(np.int64) + 1, 0)
+        # An unsupported function is rejected before the address is looked at
+        buckets = np.where(classes == ILLEGAL_FUNCTION, 0, buckets)
+        return np.ravel_multi_index((pdus[:, 0], buckets, classes), self.counts.shape)
+
+    def update(self, batch: FuzzBatch, result: BatchResult) -> Dict[int, int]:
+        """Record the sent cases; return {case index: new cells} for cases that reached new coverage."""
+        sent = np.flatnonzero(result.sent)
+        cells = self.cells(batch, result)[sent]
+        fresh = self.counts.reshape(-1)[cells] == 0
+        # The first case to reach a cell in this batch gets the credit
+        new_cells, first = np.unique(cells[fresh], return_index=True)
+        np.add.at(self.counts.reshape(-1), cells, 1)
+        credited = sent[np.flatnonzero(fresh)[first]]
+        indices, counts = np.unique(credited, return_counts=True)
+        return dict(zip(indices.tolist(), counts.tolist()))
+
+
+@dataclass
+class CorpusEntry:
+    digest: str
+    new_cells: int
+    found_at: int
+    timed_out: bool = False
+    selected: int = 0
+
+
+@dataclass
+class CrashRecord:
+    signature: str
+    digest: str
+    frames: int
+    first_case: int
+    first_seen: float
+    count: int = 1
+
+
+@dataclass
+class CampaignStats(FuzzStats):
+    new_coverage_cases: int = 0
+    coverage: int = 0
+    corpus: int = 0
+    crashes: int = 0
+    unique_crashes: int = 0
+
+    def summary(self) -> str:
+        return (f"{super().summary()}; coverage {self.coverage} cells, corpus {self.corpus}, "
+                f"{self.crashes} crash(es), {self.unique_crashes} unique signature(s) in total")
+
+
+class FuzzCampaign:
+    """Coverage-guided, resumable fuzz campaign on top of FuzzEngine.
+
+    Cases that reach a new (function code, address, response class) cell of
+    the coverage map are saved to the corpus, and a ``corpus_ratio`` share
+    of every batch mutates corpus entries, favouring those that found more
+    coverage and have been mutated less. A timeout or dropped connection
+    counts as a crash only if a follow-up health read also fails; the last
+    ``crash_context`` requests sent (on any connection) up to the failure
+    are stored by content hash and deduplicated by ``crash_signature``.
+
+    All state lives in ``directory``; constructing a campaign on an
+    existing directory resumes it, including the random generator state.
+    """
+
+    def __init__(self, directory: str, host: str, port: int, start_address: int = 0, end_address: int = 100,
+                 seed: int = 0, workers: int = 16, timeout: float = 1.0, unit_id: int = 1,
+                 corpus_ratio: float = 0.5, crash_context: int = 64, recovery_timeout: float = 30.0,
+                 on_crash: Optional[Callable[[CrashRecord], None]] = None, audit: Optional[AuditLog] = None):
+        self.directory = directory
+        self.corpus_ratio = corpus_ratio
+        self.crash_context = crash_context
+        self.recovery_timeout = recovery_timeout
+        self.on_crash = on_crash
+        self.engine = FuzzEngine(host, port, start_address, end_address, workers=workers, timeout=timeout,
+                                 seed=seed, unit_id=unit_id, audit=audit)
+        self.generator = self.engine.generator
+        self.coverage = CoverageMap()
+        self.corpus: List[CorpusEntry] = []
+        self.crashes: Dict[str, CrashRecord] = {}
+        self.cases = 0
+        self._seeds: Optional[FuzzBatch] = None
+        self._seed_rows: List[np.ndarray] = []
+        os.makedirs(os.path.join(directory, "corpus"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "crashes"), exist_ok=True)
+        if os.path.exists(os.path.join(directory, STATE_FILE)):
+            self.load()
+
+    def run(self, iterations: int, batch_size: int = 1024, checkpoint_interval: float = 30.0) -> CampaignStats:
+        """Run ``iterations`` more cases, checkpointing to disk periodically and at the end."""
+        return asyncio.run(self.run_async(iterations, batch_size, checkpoint_interval))
+
+    async def run_async(self, iterations: int, batch_size: int = 1024,
+                        checkpoint_interval: float = 30.0) -> CampaignStats:
+        stats = CampaignStats()
+        start = last_checkpoint = time.perf_counter()
+        done = 0
+        try:
+            while done < iterations:
+                batch = self._next_batch(min(batch_size, iterations - done))
+                crashed = []
+
+                async def on_failure(index: int, outcome: int) -> bool:
+                    if crashed:
+                        return True
+                    failure = await self._health()
+                    if failure is None:
+                        return False
+                    crashed.append((index, failure))
+                    return True
+
+                result = await self.engine.execute(batch, self.cases, on_failure)
+                self.engine.accumulate(stats, batch, result)
+                new = self.coverage.update(batch, result)
+                for index, cells in new.items():
+                    self._add_to_corpus(batch, index, cells, result.outcomes[index] == OUTCOME_TIMEOUT)
+                stats.new_coverage_cases += len(new)
+                sent = int(np.count_nonzero(result.sent))
+                done += sent
+
+                if crashed:
+                    stats.crashes += 1
+                    record = self._store_crash(batch, result, *crashed[0])
+                    if self.on_crash is not None:
+                        self.on_crash(record)
+                # Counted before recovery so a final save matches the coverage and crashes it holds
+                self.cases += sent
+                if crashed and not await self._recover():
+                    logger.error(f"Target did not recover within {self.recovery_timeout}s; stopping campaign")
+                    break
+                if time.perf_counter() - last_checkpoint > checkpoint_interval:
+                    self.save()
+                    last_checkpoint = time.perf_counter()
+        finally:
+            self.save()
+
+        stats.elapsed = time.perf_counter() - start
+        stats.coverage = len(self.coverage)
+        stats.corpus = len(self.corpus)
+        stats.unique_crashes = len(self.crashes)
+        logger.info(f"Campaign {self.directory}: {stats.summary()}")
+        return stats
+
+    def _next_batch(self, n: int) -> FuzzBatch:
+        """Fresh mutations plus mutations of corpus entries weighted by their energy."""
+        if not self.corpus:
+            return self.generator.generate(n)
+        n_corpus = int(n * self.corpus_ratio)
+        found = np.array([entry.new_cells for entry in self.corpus], dtype=np.float64)
+        selected = np.array([entry.selected for entry in self.corpus], dtype=np.float64)
+        # Inputs that time out cost a full timeout per case, so they are mutated less often
+        slow = np.array([entry.timed_out for entry in self.corpus])
+        energy = (1.0 + found) / np.sqrt(1.0 + selected) * np.where(slow, 0.1, 1.0)
+        parents = self.generator.rng.choice(len(self.corpus), n_corpus, p=energy / energy.sum())
+        for index, count in zip(*np.unique(parents, return_counts=True)):
+            self.corpus[index].selected += int(count)
+        return FuzzBatch.concatenate(self.generator.generate(n - n_corpus),
+                                     self.generator.mutate(self._seed_batch(), parents))
+
+    def _seed_batch(self) -> FuzzBatch:
+        if self._seeds is None or len(self._seeds) != len(self._seed_rows):
+            rows = np.array(self._seed_rows)
+            self._seeds = FuzzBatch(pdus=rows[:, :MAX_PDU_SIZE].astype(np.uint8),
+                                    lengths=rows[:, MAX_PDU_SIZE], length_fields=rows[:, MAX_PDU_SIZE + 1],
+                                    strategies=np.zeros(len(rows), dtype=np.uint8))
+        return self._seeds
+
+    def _add_to_corpus(self, batch: FuzzBatch, index: int, new_cells: int, timed_out: bool):
+        frame = encode_frames([(int(batch.length_fields[index]), batch.pdu(index))])
+        digest = hashlib.sha256(frame).hexdigest()[:16]
+        path = os.path.join(self.directory, "corpus", f"{digest}.bin")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(frame)
+        self.corpus.append(CorpusEntry(digest, new_cells, self.cases + index, bool(timed_out)))
+        self._append_seed(int(batch.length_fields[index]), batch.pdu(index))
+
+    def _append_seed(self, length_field: int, pdu: bytes):
+        row = np.zeros(MAX_PDU_SIZE + 2, dtype=np.int64)
+        pdu = pdu[:MAX_PDU_SIZE]
+        row[:len(pdu)] = np.frombuffer(pdu, dtype=np.uint8)
+        row[MAX_PDU_SIZE] = len(pdu)
+        row[MAX_PDU_SIZE + 1] = length_field
+        self._seed_rows.append(row)
+
+    def _store_crash(self, batch: FuzzBatch, result: BatchResult, index: int, failure: str) -> CrashRecord:
+        # Suspect the last request the target answered before going silent; if it answered
+        # nothing in this batch, the first request that failed
+        suspect = int(np.argmax(result.answered)) if result.answered.max() >= 0 else index
+        last = max(index, suspect, key=lambda i: result.order[i])
+        frames = [(int(batch.length_fields[i]), batch.pdu(i)) for i in result.sent_before(last, self.crash_context)]
+        signature = crash_signature(failure, int(batch.length_fields[suspect]), batch.pdu(suspect))
+        data = encode_frames(frames)
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        record = self.crashes.get(signature)
+        if record is None or len(frames) < record.frames:
+            # Keep the shortest known reproducer for each signature
+            with open(os.path.join(self.directory, "crashes", f"{digest}.bin"), "wb") as f:
+                f.write(data)
+        if record is None:
+            record = self.crashes[signature] = CrashRecord(signature, digest, len(frames),
+                                                           self.cases + index, time.time())
+            logger.warning(f"New crash {signature} at case {record.first_case} ({len(frames)} request(s))")
+        else:
+            record.count += 1
+            if len(frames) < record.frames:
+                record.digest, record.frames = digest, len(frames)
+        return record
+
+    def crash_frames(self, record: CrashRecord) -> List[tuple]:
+        """The stored (length_field, pdu) request sequence that triggered a crash."""
+        with open(os.path.join(self.directory, "crashes", f"{record.digest}.bin"), "rb") as f:
+            return decode_frames(f.read())
+
+    async def _health(self) -> Optional[str]:
+        engine = self.engine
+        return await probe_health(engine.host, engine.port, engine.unit_id, engine.generator.start_address,
+                                  engine.timeout)
+
+    async def _recover(self) -> bool:
+        deadline = time.monotonic() + self.recovery_timeout
+        while time.monotonic() < deadline:
+            if await self._health() is None:
+                return True
+            await asyncio.sleep(min(self.engine.timeout, max(deadline - time.monotonic(), 0.0)))
+        return False
+
+    def save(self):
+        """Write the coverage map, corpus index, crash index and generator state."""
+        np.save(os.path.join(self.directory, COVERAGE_FILE), self.coverage.counts)
+        state = {
+            "cases": self.cases,
+            "start_address": self.generator.start_address,
+            "end_address": self.generator.end_address,
+            "rng": self.generator.rng.bit_generator.state,
+            "corpus": [entry.__dict__ for entry in self.corpus],
+            "crashes": [record.__dict__ for record in self.crashes.values()],
+        }
+        path = os.path.join(self.directory, STATE_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def load(self):
+        """Resume from the state saved in ``directory``."""
+        with open(os.path.join(self.directory, STATE_FILE)) as f:
+            state = json.load(f)
+        self.cases = state["cases"]
+        self.generator.start_address = state["start_address"]
+        self.generator.end_address = state["end_address"]
+        self.generator.rng.bit_generator.state = state["rng"]
+        self.coverage = CoverageMap(np.load(os.path.join(self.directory, COVERAGE_FILE)))
+        self.corpus = [CorpusEntry(**entry) for entry in state["corpus"]]
+        self._seed_rows = []
+        for entry in self.corpus:
+            with open(os.path.join(self.directory, "corpus", f"{entry.digest}.bin"), "rb") as f:
+                (length_field, pdu), = decode_frames(f.read())
+            self._append_seed(length_field, pdu)
+        self.crashes = {record["signature"]: CrashRecord(**record) for record in state["crashes"]}
+        logger.info(f"Resumed campaign {self.directory} at case {self.cases}: "
+                    f"{len(self.corpus)} corpus entries, {len(self.crashes)} crash signature(s)")
+
+# Example Usage
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    campaign = FuzzCampaign("fuzz_campaign", "127.0.0.1", 5020, 0, 100)
+    print(campaign.run(20000).summary())
+    for record in campaign.crashes.values():
+        print(f"{record.signature}: {record.count}x, reproducer {record.digest} ({record.frames} request(s))")
@@ -0,0 +1,164 @@
+from collections import deque
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+from ring_buffer import SignalRingBuffer, WindowUnavailable
+from signal_processor import EMSignalProcessor, SignalAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CaseCorrelation:
+    case_id: int
+    sample_index: int
+    analysis: SignalAnalysis
+    score: float
+    flagged: bool
+
+
+class FuzzSignalCorrelator:
+    """Pair each fuzz case with its EM signal window and flag deviations from a baseline.
+
+    Fuzz workers only record (case_id, send time) through ``on_case_sent``; a
+    background thread slices each case's window out of the capture ring
+    buffer as a view once it has been captured, analyzes it and scores it by
+    the largest per-field z-score against the learned baseline.
+    """
+
+    def __init__(self, processor: EMSignalProcessor, buffer: SignalRingBuffer,
+                 window: float = 0.1, pre_trigger: float = 0.0, z_threshold: float = 4.0,
+                 baseline_cases: int = 200):
+        sample_rate = processor.config.sample_rate
+        self.processor = processor
+        self.buffer = buffer
+        self.window_size = max(int(window * sample_rate), 1)
+        self.pre_trigger = int(pre_trigger * sample_rate)
+        self.z_threshold = z_threshold
+        self.baseline_cases = baseline_cases
+
+        self._pending = deque()
+        self._learning: List[np.ndarray] = []
+        self.baseline_mean: Optional[np.ndarray] = None
+        self.baseline_std: Optional[np.ndarray] = None
+
+        self.analyzed = 0
+        self.dropped = 0
+        self.flagged: List[CaseCorrelation] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_case_sent(self, case_id: int, timestamp: float):
+        """Record a fuzz case; safe to call from the fuzzer's hot path."""
+        self._pending.append((case_id, timestamp))
+
+    def learn_baseline(self, signal: np.ndarray, step: Optional[int] = None):
+        """Learn the baseline from a known-good capture using strided windows."""
+        step = step or max(self.window_size // 4, 1)
+        windows = np.lib.stride_tricks.sliding_window_view(signal, self.window_size)[::step]
+        self._set_baseline(self.processor.analyze_batch(windows).as_array())
+
+    def _set_baseline(self, rows: np.ndarray):
+        self.baseline_mean = np.nanmean(rows, axis=0)
+        # Floor the spread so perfectly periodic baselines don't flag rounding noise
+        self.baseline_std = np.maximum(np.nanstd(rows, axis=0), 0.01 * np.abs(self.baseline_mean) + 1e-9)
+        logger.info(f"Baseline learned from {len(rows)} windows")
+
+    def _score(self, row: np.ndarray) -> float:
+        z = np.abs(row - self.baseline_mean) / self.baseline_std
+        return float(np.nanmax(z)) if not np.all(np.isnan(z)) else np.inf
+
+    def process_pending(self) -> int:
+        """Analyze every pending case whose window has been captured."""
+        processed = 0
+        buffer = self.buffer
+        while self._pending:
+            case_id, timestamp = self._pending[0]
+            try:
+                start = buffer.sample_index_at(timestamp) - self.pre_trigger
+            except WindowUnavailable:
+                break
+            if start + self.window_size > buffer.total:
+                break
+            self._pending.popleft()
+            processed += 1
+
+            try:
+                window = buffer.window(start, self.window_size)
+                with np.errstate(all='ignore'):
+                    analysis = self.processor.analyze_signal(window)
+            except WindowUnavailable:
+                self.dropped += 1
+                continue
+            # The writer may have lapped the window while it was being analyzed
+            if not buffer.is_valid(start, self.window_size):
+                self.dropped += 1
+                continue
+
+            self.analyzed += 1
+            row = np.array([analysis.positive_mean, analysis.negative_mean,
+                            analysis.peak_to_peak, analysis.rms, analysis.snr])
+            if self.baseline_mean is None:
+                self._learning.append(row)
+                if len(self._learning) >= self.baseline_cases:
+                    self._set_baseline(np.vstack(self._learning))
+                    self._learning = []
+                continue
+
+            score = self._score(row)
+            if score > self.z_threshold:
+                self.flagged.append(CaseCorrelation(case_id, start, analysis, score, True))
+                logger.warning(f"Fuzz case {case_id} deviates from baseline (z={score:.1f})")
+        return processed
+
+    def start(self):
+        """Start the background analysis thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, drain: bool = True):
+        """Stop the analysis thread, optionally analyzing what is already captured."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        if drain:
+            self.process_pending()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.process_pending():
+                self._stop.wait(0.001)
+
+# Example Usage
+if __name__ == "__main__":
+    from config import SignalConfig
+    from Features.protocol_tester import ProtocolTester
+
+    config = SignalConfig(sample_rate=10000, duration=1.0, trigger_threshold=0.3, noise_threshold=0.1)
+    processor = EMSignalProcessor(config)
+    buffer = SignalRingBuffer(capacity=10 * config.sample_rate, sample_rate=config.sample_rate)
+    correlator = FuzzSignalCorrelator(processor, buffer)
+    correlator.learn_baseline(processor.generate_normal_signal())
+
+    # Synthetic real-time capture standing in for an EM probe
+    def capture(stop: threading.Event, chunk: int = 100):
+        t = 0
+        while not stop.is_set():
+            samples = np.sin(2 * np.pi * 10 * (t + np.arange(chunk)) / config.sample_rate)
+            buffer.write(samples)
+            t += chunk
+            time.sleep(chunk / config.sample_rate)
+
+    stop = threading.Event()
+    threading.Thread(target=capture, args=(stop,), daemon=True).start()
+    correlator.start()
+    tester = ProtocolTester(host="127.0.0.1", port=5020)
+    print(tester.run_fuzz_campaign(0, 10, 5000, on_case_sent=correlator.on_case_sent).summary())
+    time.sleep(0.2)
+    correlator.stop()
+    stop.set()
+    print(f"Analyzed {correlator.analyzed} windows, flagged {len(correlator.flagged)}, dropped {correlator.dropped}")
@@ -1,19 +1,21 @@
 from PyQt6.QtWidgets import QFileDialog
+from typing import Optional
+from config import AppConfig, ConfigService, read_config, write_config
 
 class GUIFeatures:
     @staticmethod
-    def save_config(config, filename="config.yml"):
+    def save_config(config: AppConfig, filename="config.yml"):
         """Save the current configuration to a file."""
-        with open(filename, 'w') as file:
-            yaml.dump(config, file)
+        write_config(config, filename)
         print(f"Configuration saved to {filename}")
 
     @staticmethod
-    def load_config():
-        """Load configuration from a file."""
+    def load_config(service: Optional[ConfigService] = None) -> Optional[AppConfig]:
+        """Load and validate a configuration file, applying it to ``service`` if given."""
         file_path, _ = QFileDialog.getOpenFileName(None, "Load Configuration", "", "YAML Files (*.yml)")
         if file_path:
-            with open(file_path, 'r') as file:
-                config = yaml.safe_load(file)
+            config = read_config(file_path)
+            if service is not None:
+                service.update(modbus=config.modbus, signal=config.signal, devices=config.devices)
             print(f"Configuration loaded from {file_path}")
             return config
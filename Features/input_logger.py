@@ -1,16 +1,19 @@
-import logging
-import datetime
+from audit_log import FORMAT_TEXT, AuditLog
 
 class InputLogger:
-    def __init__(self, log_file="user_interactions.log"):
-        logging.basicConfig(filename=log_file, level=logging.INFO)
+    def __init__(self, log_file="user_interactions.log", fmt=FORMAT_TEXT, **options):
+        # Timestamps are formatted and lines written by the audit log's background thread
+        self.audit = AuditLog(log_file, fmt=fmt, **options)
 
-    def log_action(self, action: str):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logging.info(f"{timestamp} - {action}")
+    def log_action(self, action: str, **details):
+        self.audit.log(action, **details)
+
+    def close(self):
+        self.audit.close()
 
 # Example Usage
 if __name__ == "__main__":
     logger = InputLogger()
     logger.log_action("Started Modbus server")
-    logger.log_action("Analyzed EM signals")
+    logger.log_action("Analyzed EM signals", sample_rate=1000)
+    logger.close()
@@ -1,21 +1,33 @@
-from pyModbusTCP.server import DataBank
-from pyModbusTCP.client import ModbusClient
 import threading
 import time
+from config import ModbusConfig
+from modbus_client import ModbusClientHandler
 
 class ModbusMonitor:
-    def __init__(self, host: str, port: int):
-        self.client = ModbusClient(host=host, port=port, auto_open=True, auto_close=True)
+    def __init__(self, host: str, port: int, max_gap: int = 8):
+        self.client = ModbusClientHandler(ModbusConfig(host=host, port=port))
+        self.max_gap = max_gap
+        self._stop = threading.Event()
 
     def monitor_registers(self, addresses, interval):
-        """Monitor specific Modbus registers at regular intervals."""
-        while True:
+        """Monitor specific Modbus registers at regular intervals until stopped."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            # One coalesced request per contiguous block instead of one per address
+            values = self.client.read_many(addresses, self.max_gap)
             for address in addresses:
-                value = self.client.read_holding_registers(address, 1)
-                print(f"Address {address}: {value}")
-            time.sleep(interval)
+                print(f"Address {address}: {values[address]}")
+            self._stop.wait(interval)
+
+    def stop(self):
+        """Stop a running monitor_registers loop."""
+        self._stop.set()
 
 # Example Usage
 if __name__ == "__main__":
     monitor = ModbusMonitor(host="127.0.0.1", port=5020)
-    threading.Thread(target=monitor.monitor_registers, args=([0, 1, 2], 1)).start()
+    thread = threading.Thread(target=monitor.monitor_registers, args=([0, 1, 2], 1))
+    thread.start()
+    time.sleep(5)
+    monitor.stop()
+    thread.join()
@@ -1,24 +1,382 @@
 from pyModbusTCP.client import ModbusClient
+from collections import Counter
+from dataclasses import dataclass, field
+import asyncio
+import itertools
 import logging
+import time
+from typing import Awaitable, Callable, Optional
 import numpy as np
+from audit_log import AuditLog
+from modbus_protocol import (MBAP_HEADER, MBAP_HEADER_SIZE, READ_HOLDING_REGISTERS,
+                             WRITE_MULTIPLE_REGISTERS, WRITE_SINGLE_REGISTER)
+
+logger = logging.getLogger(__name__)
+
+# "corpus" marks mutations of saved inputs (MutationGenerator.mutate), never drawn by generate()
+STRATEGIES = ("boundary", "bitflip", "function_code", "length", "corpus")
+BOUNDARY_VALUES = np.array([0x0000, 0x0001, 0x007F, 0x0080, 0x00FF, 0x0100,
+                            0x7FFE, 0x7FFF, 0x8000, 0xFFFE, 0xFFFF], dtype=np.uint16)
+SEED_FUNCTION_CODES = np.array([READ_HOLDING_REGISTERS, WRITE_SINGLE_REGISTER,
+                                WRITE_MULTIPLE_REGISTERS], dtype=np.uint8)
+MAX_FUZZ_REGISTERS = 8
+MAX_PDU_SIZE = 6 + 2 * MAX_FUZZ_REGISTERS + 8
+
+# Per-case outcome codes
+OUTCOME_NOT_SENT = -1
+OUTCOME_RESPONSE = 0
+OUTCOME_EXCEPTION = 1
+OUTCOME_TIMEOUT = 2
+OUTCOME_CONNECTION_ERROR = 3
+OUTCOMES = ("response", "exception", "timeout", "connection_error")
+
+
+@dataclass
+class FuzzBatch:
+    pdus: np.ndarray
+    lengths: np.ndarray
+    length_fields: np.ndarray
+    strategies: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def pdu(self, index: int) -> bytes:
+        return self.pdus[index, :self.lengths[index]].tobytes()
+
+    @classmethod
+    def concatenate(cls, *batches: "FuzzBatch") -> "FuzzBatch":
+        return cls(pdus=np.concatenate([batch.pdus for batch in batches]),
+                   lengths=np.concatenate([batch.lengths for batch in batches]),
+                   length_fields=np.concatenate([batch.length_fields for batch in batches]),
+                   strategies=np.concatenate([batch.strategies for batch in batches]))
+
+
+@dataclass
+class BatchResult:
+    """Per-case results of one executed batch."""
+    outcomes: np.ndarray
+    exception_codes: np.ndarray
+    # Position of each case in the batch's send order across all connections (-1 if not sent)
+    order: np.ndarray
+    # Position of each answered case in the order responses arrived (-1 if unanswered)
+    answered: np.ndarray
+
+    @property
+    def sent(self) -> np.ndarray:
+        return self.outcomes != OUTCOME_NOT_SENT
+
+    def sent_before(self, index: int, limit: int) -> np.ndarray:
+        """Indices of up to ``limit`` cases sent before ``index`` and ``index`` itself, in send order."""
+        position = self.order[index]
+        earlier = np.flatnonzero((self.order >= 0) & (self.order <= position))
+        return earlier[np.argsort(self.order[earlier])][-limit:]
+
+
+@dataclass
+class FuzzStats:
+    cases: int = 0
+    elapsed: float = 0.0
+    outcomes: Counter = field(default_factory=Counter)
+    exception_codes: Counter = field(default_factory=Counter)
+    by_strategy: Counter = field(default_factory=Counter)
+
+    @property
+    def cases_per_second(self) -> float:
+        return self.cases / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        outcomes = ", ".join(f"{name}={self.outcomes[name]}" for name in OUTCOMES)
+        return f"{self.cases} cases in {self.elapsed:.2f}s ({self.cases_per_second:.0f}/s): {outcomes}"
+
+
+class MutationGenerator:
+    """Seeded, vectorized generator of mutated Modbus request PDUs."""
+
+    def __init__(self, start_address: int, end_address: int, seed: int = 0):
+        self.start_address = start_address
+        self.end_address = end_address
+        self.rng = np.random.default_rng(seed)
+
+    def generate(self, n: int) -> FuzzBatch:
+        """Generate a batch of n mutated PDUs in one vectorized pass."""
+        rng = self.rng
+        rows = np.arange(n)
+        strategies = rng.integers(0, STRATEGIES.index("corpus"), n).astype(np.uint8)
+        is_boundary = strategies == STRATEGIES.index("boundary")
+
+        # Random tail bytes so length mutations carry garbage past the valid PDU
+        pdus = rng.integers(0, 256, (n, MAX_PDU_SIZE), dtype=np.uint8)
+
+        function_codes = SEED_FUNCTION_CODES[rng.integers(0, len(SEED_FUNCTION_CODES), n)]
+        addresses = rng.integers(self.start_address, self.end_address + 1, n).astype(np.uint16)
+        edge_addresses = np.array([self.start_address, self.end_address, 0, 0xFFFF], dtype=np.uint16)
+        addresses = np.where(is_boundary & (rng.random(n) < 0.5),
+                             edge_addresses[rng.integers(0, len(edge_addresses), n)], addresses)
+        values = rng.integers(0, 0x10000, (n, MAX_FUZZ_REGISTERS)).astype(np.uint16)
+        values = np.where(is_boundary[:, None],
+                          BOUNDARY_VALUES[rng.integers(0, len(BOUNDARY_VALUES), (n, MAX_FUZZ_REGISTERS))],
+                          values)
+        quantities = rng.integers(1, MAX_FUZZ_REGISTERS + 1, n).astype(np.uint16)
+
+        pdus[:, 0] = function_codes
+        pdus[:, 1] = addresses >> 8
+        pdus[:, 2] = addresses & 0xFF
+
+        # Read: quantity; single write: value; multiple write: quantity, byte count, values
+        is_read = function_codes == READ_HOLDING_REGISTERS
+        is_multi = function_codes == WRITE_MULTIPLE_REGISTERS
+        read_counts = np.where(is_boundary, BOUNDARY_VALUES[rng.integers(0, len(BOUNDARY_VALUES), n)],
+                               rng.integers(1, 126, n)).astype(np.uint16)
+        field_values = np.where(is_read, read_counts, np.where(is_multi, quantities, values[:, 0]))
+        pdus[:, 3] = field_values >> 8
+        pdus[:, 4] = field_values & 0xFF
+        pdus[:, 5] = np.where(is_multi, 2 * quantities, pdus[:, 5])
+        value_bytes = np.empty((n, 2 * MAX_FUZZ_REGISTERS), dtype=np.uint8)
+        value_bytes[:, 0::2] = values >> 8
+        value_bytes[:, 1::2] = values & 0xFF
+        pdus[is_multi, 6:6 + 2 * MAX_FUZZ_REGISTERS] = value_bytes[is_multi]
+        lengths = np.where(is_multi, 6 + 2 * quantities, 5).astype(np.int64)
+
+        # Bit flips anywhere inside the valid PDU
+        flip = strategies == STRATEGIES.index("bitflip")
+        positions = (rng.random(n) * lengths).astype(np.int64)
+        bits = (1 << rng.integers(0, 8, n)).astype(np.uint8)
+        pdus[rows[flip], positions[flip]] ^= bits[flip]
+
+        # Arbitrary function codes
+        fc_mutation = strategies == STRATEGIES.index("function_code")
+        pdus[fc_mutation, 0] = rng.integers(0, 256, int(fc_mutation.sum()), dtype=np.uint8)
+
+        # Length mutations: half change the PDU length (truncate/extend),
+        # half lie in the byte count or the MBAP length field
+        length_fields = lengths + 1
+        length_mutation = strategies == STRATEGIES.index("length")
+        resize = length_mutation & (rng.random(n) < 0.5)
+        lengths = np.where(resize, rng.integers(1, MAX_PDU_SIZE + 1, n), lengths)
+        length_fields = np.where(resize, lengths + 1, length_fields)
+        lie = length_mutation & ~resize
+        lie_in_mbap = lie & (rng.random(n) < 0.5)
+        length_fields = np.where(lie_in_mbap, rng.integers(0, 2 * MAX_PDU_SIZE, n), length_fields)
+        lie_in_count = lie & ~lie_in_mbap
+        pdus[lie_in_count, 5] = rng.integers(0, 256, int(lie_in_count.sum()), dtype=np.uint8)
+
+        return FuzzBatch(pdus=pdus, lengths=lengths, length_fields=length_fields,
+                         strategies=strategies)
+
+    def mutate(self, seeds: FuzzBatch, parents: np.ndarray) -> FuzzBatch:
+        """Apply one small mutation to each of ``seeds[parents]`` in one vectorized pass.
+
+        Mutations: flip a bit, overwrite a byte, write a boundary value into a
+        16-bit field, step the address, or splice in the tail of another seed.
+        """
+        rng = self.rng
+        n = len(parents)
+        rows = np.arange(n)
+        pdus = seeds.pdus[parents].copy()
+        lengths = seeds.lengths[parents].copy()
+        length_fields = seeds.length_fields[parents].copy()
+        operations = rng.integers(0, 5, n)
+        positions = (rng.random(n) * np.maximum(lengths, 1)).astype(np.int64)
+
+        flip = operations == 0
+        pdus[rows[flip], positions[flip]] ^= (1 << rng.integers(0, 8, int(flip.sum()))).astype(np.uint8)
+        overwrite = operations == 1
+        pdus[rows[overwrite], positions[overwrite]] = rng.integers(0, 256, int(overwrite.sum()), dtype=np.uint8)
+
+        # Big-endian 16-bit fields start at odd offsets (address, quantity/value, register values)
+        boundary = rows[operations == 2]
+        fields = 1 + 2 * rng.integers(0, (MAX_PDU_SIZE - 2) // 2, len(boundary))
+        values = BOUNDARY_VALUES[rng.integers(0, len(BOUNDARY_VALUES), len(boundary))]
+        pdus[boundary, fields] = values >> 8
+        pdus[boundary, fields + 1] = values & 0xFF
+
+        step = rows[operations == 3]
+        addresses = (pdus[step, 1].astype(np.int64) << 8 | pdus[step, 2]) + rng.integers(-4, 5, len(step))
+        pdus[step, 1] = (addresses >> 8) & 0xFF
+        pdus[step, 2] = addresses & 0xFF
+
+        splice = operations == 4
+        donors = rng.integers(0, len(seeds), n)
+        tail = splice[:, None] & (np.arange(MAX_PDU_SIZE)[None, :] >= positions[:, None])
+        pdus = np.where(tail, seeds.pdus[donors], pdus)
+        consistent = length_fields == lengths + 1
+        lengths = np.where(splice, np.maximum(seeds.lengths[donors], positions), lengths)
+        length_fields = np.where(splice & consistent, lengths + 1, length_fields)
+
+        return FuzzBatch(pdus=pdus, lengths=lengths, length_fields=length_fields,
+                         strategies=np.full(n, STRATEGIES.index("corpus"), dtype=np.uint8))
+
+
+class FuzzEngine:
+    """Run mutation batches across a pool of concurrent raw Modbus connections."""
+
+    def __init__(self, host: str, port: int, start_address: int = 0, end_address: int = 100,
+                 workers: int = 16, timeout: float = 1.0, seed: int = 0, unit_id: int = 1,
+                 on_case_sent: Optional[Callable[[int, float], None]] = None,
+                 audit: Optional[AuditLog] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.timeout = timeout
+        self.unit_id = unit_id
+        self.on_case_sent = on_case_sent
+        self.audit = audit
+        self.generator = MutationGenerator(start_address, end_address, seed)
+
+    def run(self, iterations: int, batch_size: int = 4096) -> FuzzStats:
+        """Run a fuzz campaign of the given number of cases."""
+        return asyncio.run(self.run_async(iterations, batch_size))
+
+    async def run_async(self, iterations: int, batch_size: int = 4096) -> FuzzStats:
+        stats = FuzzStats()
+        start = time.perf_counter()
+        done = 0
+        while done < iterations:
+            batch = self.generator.generate(min(batch_size, iterations - done))
+            result = await self.execute(batch, done)
+            self.accumulate(stats, batch, result)
+            done += len(batch)
+
+        stats.elapsed = time.perf_counter() - start
+        logger.info(f"Fuzz campaign finished: {stats.summary()}")
+        return stats
+
+    async def execute(self, batch: FuzzBatch, offset: int = 0,
+                      on_failure: Optional[Callable[[int, int], Awaitable[bool]]] = None,
+                      schedule: Optional[np.ndarray] = None) -> BatchResult:
+        """Send every case of ``batch`` and record its outcome.
+
+        ``on_failure(index, outcome)`` is awaited after each timeout or
+        connection error; returning True stops the batch, leaving the
+        remaining cases ``OUTCOME_NOT_SENT``. With a ``schedule`` (seconds
+        from the start of the batch per case) no case is sent before its time.
+        """
+        result = BatchResult(outcomes=np.full(len(batch), OUTCOME_NOT_SENT, dtype=np.int8),
+                             exception_codes=np.zeros(len(batch), dtype=np.uint8),
+                             order=np.full(len(batch), -1, dtype=np.int64),
+                             answered=np.full(len(batch), -1, dtype=np.int64))
+        cursor = iter(range(len(batch)))
+        aborted = asyncio.Event()
+        sequence, responses = itertools.count(), itertools.count()
+        if schedule is not None:
+            schedule = asyncio.get_running_loop().time() + np.asarray(schedule, dtype=np.float64)
+        await asyncio.gather(*(self._worker(batch, cursor, offset, result, sequence, responses,
+                                            on_failure, aborted, schedule)
+                               for _ in range(min(self.workers, len(batch)))))
+        return result
+
+    @staticmethod
+    def accumulate(stats: FuzzStats, batch: FuzzBatch, result: BatchResult):
+        """Add a batch's results to ``stats`` as aggregated counters instead of per-case log lines."""
+        sent = result.sent
+        outcomes = result.outcomes[sent]
+        for code, count in enumerate(np.bincount(outcomes, minlength=len(OUTCOMES))):
+            stats.outcomes[OUTCOMES[code]] += int(count)
+        for code, count in zip(*np.unique(result.exception_codes[sent][outcomes == OUTCOME_EXCEPTION],
+                                          return_counts=True)):
+            stats.exception_codes[int(code)] += int(count)
+        for strategy, count in enumerate(np.bincount(batch.strategies[sent], minlength=len(STRATEGIES))):
+            if count:
+                stats.by_strategy[STRATEGIES[strategy]] += int(count)
+        stats.cases += len(outcomes)
+
+    async def _worker(self, batch: FuzzBatch, cursor, offset: int, result: BatchResult, sequence, responses,
+                      on_failure, aborted: asyncio.Event, schedule: Optional[np.ndarray]):
+        outcomes, exception_codes = result.outcomes, result.exception_codes
+        reader = writer = None
+        for index in cursor:
+            if aborted.is_set():
+                break
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout)
+                if schedule is not None:
+                    await asyncio.sleep(max(schedule[index] - asyncio.get_running_loop().time(), 0.0))
+                tid = (offset + index) & 0xFFFF
+                header = MBAP_HEADER.pack(tid, 0, int(batch.length_fields[index]) & 0xFFFF, self.unit_id)
+                writer.write(header + batch.pdu(index))
+                result.order[index] = next(sequence)
+                if self.on_case_sent is not None:
+                    self.on_case_sent(offset + index, time.monotonic())
+                response = await asyncio.wait_for(self._read_response(reader, tid), self.timeout)
+                result.answered[index] = next(responses)
+                if response[0] & 0x80:
+                    outcomes[index] = OUTCOME_EXCEPTION
+                    exception_codes[index] = response[1] if len(response) > 1 else 0
+                else:
+                    outcomes[index] = OUTCOME_RESPONSE
+                self._audit_case(batch, offset, index, outcomes, exception_codes)
+                continue
+            except asyncio.TimeoutError:
+                outcomes[index] = OUTCOME_TIMEOUT
+            except (asyncio.IncompleteReadError, ConnectionError, OSError):
+                outcomes[index] = OUTCOME_CONNECTION_ERROR
+            self._audit_case(batch, offset, index, outcomes, exception_codes)
+            # The stream may be desynchronised after a malformed frame; reconnect
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            if on_failure is not None and await on_failure(index, int(outcomes[index])):
+                aborted.set()
+        if writer is not None:
+            writer.close()
+
+    def _audit_case(self, batch: FuzzBatch, offset: int, index: int, outcomes: np.ndarray,
+                    exception_codes: np.ndarray):
+        if self.audit is not None:
+            self.audit.log("fuzz_case", batch.pdu(index), case=offset + index,
+                           length_field=int(batch.length_fields[index]),
+                           strategy=STRATEGIES[batch.strategies[index]], outcome=OUTCOMES[outcomes[index]],
+                           exception_code=int(exception_codes[index]))
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader, tid: int) -> bytes:
+        while True:
+            header = await reader.readexactly(MBAP_HEADER_SIZE)
+            response_tid, _, length, _ = MBAP_HEADER.unpack(header)
+            pdu = await reader.readexactly(max(length - 1, 0))
+            if response_tid == tid and pdu:
+                return pdu
+
 
 class ProtocolTester:
-    def __init__(self, host: str, port: int):
-        self.client = ModbusClient(host=host, port=port, auto_open=True, auto_close=True)
+    def __init__(self, host: str, port: int, seed: int = 0, audit: Optional[AuditLog] = None):
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.audit = audit
+        self.client = ModbusClient(host=host, port=port, auto_open=True)
         logging.basicConfig(level=logging.INFO)
 
-    def fuzz_test_registers(self, start_address: int, end_address: int, iterations: int):
+    def fuzz_test_registers(self, start_address: int, end_address: int, iterations: int) -> Counter:
         """Perform fuzz testing on Modbus registers."""
-        for _ in range(iterations):
-            address = np.random.randint(start_address, end_address + 1)
-            value = np.random.randint(0, 65536)
-            success = self.client.write_single_register(address, value)
-            if success:
-                logging.info(f"Successfully wrote value {value} to address {address}")
-            else:
-                logging.error(f"Failed to write value {value} to address {address}")
+        rng = np.random.default_rng(self.seed)
+        addresses = rng.integers(start_address, end_address + 1, iterations).tolist()
+        values = rng.integers(0, 65536, iterations).tolist()
+        results = Counter()
+        audit = self.audit
+        for address, value in zip(addresses, values):
+            outcome = "success" if self.client.write_single_register(address, value) else "failure"
+            results[outcome] += 1
+            if audit is not None:
+                audit.log("fuzz_write", address=address, value=value, outcome=outcome)
+        logging.info(f"Fuzzed {iterations} writes: {results['success']} succeeded, {results['failure']} failed")
+        return results
+
+    def run_fuzz_campaign(self, start_address: int, end_address: int, iterations: int,
+                          workers: int = 16, timeout: float = 1.0,
+                          on_case_sent: Optional[Callable[[int, float], None]] = None) -> FuzzStats:
+        """Run a seeded, concurrent mutation campaign at the raw PDU level."""
+        engine = FuzzEngine(self.host, self.port, start_address, end_address,
+                            workers=workers, timeout=timeout, seed=self.seed,
+                            on_case_sent=on_case_sent, audit=self.audit)
+        return engine.run(iterations)
 
 # Example Usage
 if __name__ == "__main__":
-    tester = ProtocolTester(host="127.0.0.1", port=5020)
-    tester.fuzz_test_registers(0, 10, 20)
+    with AuditLog("fuzz_audit.bin", fmt="binary", max_bytes=64 << 20) as audit:
+        tester = ProtocolTester(host="127.0.0.1", port=5020, audit=audit)
+        tester.fuzz_test_registers(0, 10, 20)
+        print(tester.run_fuzz_campaign(0, 10, 10000).summary())
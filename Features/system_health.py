@@ -1,9 +1,15 @@
 import psutil
+from metrics import REGISTRY, Gauge, MetricsRegistry
+
+# Prime the CPU counter so the first non-blocking sample is meaningful
+psutil.cpu_percent(interval=None)
+
 
 class SystemHealth:
     @staticmethod
     def get_cpu_usage():
-        return psutil.cpu_percent(interval=1)
+        """CPU usage since the previous call; never blocks."""
+        return psutil.cpu_percent(interval=None)
 
     @staticmethod
     def get_memory_usage():
@@ -14,6 +20,17 @@ class SystemHealth:
     def get_network_usage():
         return psutil.net_io_counters()
 
+    @staticmethod
+    def register_metrics(registry: MetricsRegistry = REGISTRY):
+        """Expose host health as gauges sampled at scrape time."""
+        Gauge("system_cpu_percent", "Host CPU usage since the previous scrape",
+              registry=registry).set_function(SystemHealth.get_cpu_usage)
+        Gauge("system_memory_percent", "Host memory usage",
+              registry=registry).set_function(SystemHealth.get_memory_usage)
+        network = Gauge("system_network_bytes", "Host network bytes since boot", ["direction"], registry=registry)
+        network.labels("sent").set_function(lambda: psutil.net_io_counters().bytes_sent)
+        network.labels("recv").set_function(lambda: psutil.net_io_counters().bytes_recv)
+
 # Example Usage
 if __name__ == "__main__":
     print(f"CPU Usage: {SystemHealth.get_cpu_usage()}%")
@@ -0,0 +1,413 @@
+import numpy as np
+from collections import deque
+import logging
+import socket
+import threading
+import time
+from typing import Callable, List, Optional
+from capture import CaptureReader, CaptureWriter
+from config import SignalConfig
+from ring_buffer import SignalRingBuffer, WindowUnavailable
+from signal_processor import EMSignalProcessor, SignalAnalysis
+
+logger = logging.getLogger(__name__)
+
+POLICY_BLOCK = "block"
+POLICY_DROP = "drop"
+
+
+class SampleSource:
+    """Producer of samples; ``read_into`` fills a preallocated buffer."""
+
+    sample_rate: float = 0.0
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Fill ``out`` from the start and return the number of samples (0 at end of stream)."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SyntheticSource(SampleSource):
+    """Endless normal-operation EM signal plus Gaussian noise, generated in place."""
+
+    def __init__(self, config: SignalConfig, frequency: float = 10.0, seed: Optional[int] = None):
+        self.sample_rate = config.sample_rate
+        self.noise = config.noise_threshold
+        self.rng = np.random.default_rng(seed)
+        self._omega = 2 * np.pi * frequency / config.sample_rate
+        self._position = 0
+        self._ramp = np.empty(0)
+        self._noise = np.empty(0)
+
+    def read_into(self, out: np.ndarray) -> int:
+        n = out.size
+        if self._ramp.size != n:
+            self._ramp = np.arange(n, dtype=np.float64)
+            self._noise = np.empty(n)
+        # Phase relative to the wave period keeps float precision over long runs
+        offset = (self._position * self._omega) % (2 * np.pi)
+        np.multiply(self._ramp, self._omega, out=out)
+        out += offset
+        np.sin(out, out=out)
+        self.rng.standard_normal(out=self._noise)
+        self._noise *= self.noise
+        out += self._noise
+        self._position += n
+        return n
+
+
+class CaptureSource(SampleSource):
+    """Replay one channel of a capture file, optionally looping."""
+
+    def __init__(self, path: str, channel: int = 0, loop: bool = False):
+        self.reader = CaptureReader(path)
+        self.sample_rate = self.reader.sample_rate
+        self.samples = self.reader.channel(channel)
+        self.loop = loop
+        self.position = 0
+
+    def read_into(self, out: np.ndarray) -> int:
+        if self.position >= len(self.samples):
+            if not self.loop or len(self.samples) == 0:
+                return 0
+            self.position = 0
+        n = min(out.size, len(self.samples) - self.position)
+        np.copyto(out[:n], self.samples[self.position:self.position + n], casting='unsafe')
+        self.position += n
+        return n
+
+
+class SocketSource(SampleSource):
+    """Raw little-endian samples over TCP, a stand-in for a network-attached probe."""
+
+    def __init__(self, host: str, port: int, sample_rate: float, dtype: str = '<f8', timeout: float = 5.0):
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._pending = b""
+
+    def read_into(self, out: np.ndarray) -> int:
+        if out.dtype != self.dtype:
+            raise ValueError(f"SocketSource delivers {self.dtype}, buffer is {out.dtype}")
+        buffer = memoryview(out).cast('B')
+        filled = len(self._pending)
+        buffer[:filled] = self._pending
+        itemsize = self.dtype.itemsize
+        # Read until at least one whole sample is available
+        while filled < itemsize or filled % itemsize and filled < len(buffer):
+            received = self.sock.recv_into(buffer[filled:])
+            if received == 0:
+                break
+            filled += received
+        whole = filled - filled % itemsize
+        self._pending = bytes(buffer[whole:filled])
+        return whole // itemsize
+
+    def close(self):
+        self.sock.close()
+
+
+class SampleServer:
+    """Serve a SampleSource over TCP to one client at a time, for testing without a probe."""
+
+    def __init__(self, source: SampleSource, host: str = "127.0.0.1", port: int = 0,
+                 chunk_size: int = 1 << 16, dtype: str = '<f8'):
+        self.source = source
+        self.chunk = np.empty(chunk_size, dtype=dtype)
+        self.listener = socket.create_server((host, port))
+        self.port = self.listener.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            with connection:
+                try:
+                    while not self._stop.is_set():
+                        n = self.source.read_into(self.chunk)
+                        if n == 0:
+                            break
+                        connection.sendall(memoryview(self.chunk[:n]).cast('B'))
+                except OSError:
+                    pass
+
+    def close(self):
+        self._stop.set()
+        self.listener.close()
+
+
+class Consumer:
+    """Reader of ring-buffer views on its own thread.
+
+    ``block`` consumers apply backpressure: the producer waits rather than
+    overwrite samples they have not read. ``drop`` consumers never stall the
+    producer; when lapped they skip ahead and count the lost samples.
+    """
+
+    def __init__(self, name: str, block_size: int = 1 << 16, policy: str = POLICY_BLOCK):
+        if policy not in (POLICY_BLOCK, POLICY_DROP):
+            raise ValueError(f"Unknown consumer policy {policy!r}")
+        self.name = name
+        self.block_size = block_size
+        self.policy = policy
+        self.cursor = 0
+        self.consumed = 0
+        self.overruns = 0
+        self.buffer: Optional[SignalRingBuffer] = None
+
+    def consume(self, view: np.ndarray, start: int):
+        """Process a read-only view of samples [start, start + len(view)).
+
+        ``drop`` consumers should check ``intact`` before publishing results,
+        since the producer may overwrite the view while it is being read.
+        """
+        raise NotImplementedError
+
+    def intact(self, start: int, length: int) -> bool:
+        """True while samples [start, start + length) have not been overwritten."""
+        return self.buffer is None or self.buffer.is_valid(start, length)
+
+    def finish(self):
+        """Called once after the stream ends."""
+
+
+class AnalyzerConsumer(Consumer):
+    """Run EMSignalProcessor.analyze_signal on consecutive fixed-size windows."""
+
+    def __init__(self, processor: EMSignalProcessor, window: float = 0.1, history: int = 1024,
+                 policy: str = POLICY_DROP, on_result: Optional[Callable[[int, SignalAnalysis], None]] = None):
+        super().__init__("analyzer", max(int(window * processor.config.sample_rate), 1), policy)
+        self.processor = processor
+        self.results = deque(maxlen=history)
+        self.on_result = on_result
+
+    def consume(self, view, start):
+        if len(view) < self.block_size:
+            return
+        analysis = self.processor.analyze_signal(view)
+        if not self.intact(start, len(view)):
+            return
+        self.results.append((start, analysis))
+        if self.on_result is not None:
+            self.on_result(start, analysis)
+
+
+class RecorderConsumer(Consumer):
+    """Write every sample to a capture file; blocks the producer rather than lose data."""
+
+    def __init__(self, path: str, sample_rate: float, dtype: str = '<f8', block_size: int = 1 << 18):
+        super().__init__("recorder", block_size, POLICY_BLOCK)
+        self.writer = CaptureWriter(path, sample_rate, dtype=dtype)
+
+    def consume(self, view, start):
+        self.writer.write(view)
+
+    def finish(self):
+        self.writer.close()
+
+
+class EnvelopeConsumer(Consumer):
+    """Min/max envelope of the stream in a fixed-size history, a cheap feed for live plots."""
+
+    def __init__(self, factor: int = 256, history: int = 4096):
+        super().__init__("envelope", factor * 64, POLICY_DROP)
+        self.factor = factor
+        self.mins = np.full(history, np.nan)
+        self.maxs = np.full(history, np.nan)
+        self.count = 0
+
+    def consume(self, view, start):
+        bins = len(view) // self.factor
+        if not bins:
+            return
+        blocks = view[:bins * self.factor].reshape(bins, self.factor)
+        mins, maxs = blocks.min(axis=1), blocks.max(axis=1)
+        if not self.intact(start, len(view)):
+            return
+        pos = np.arange(self.count, self.count + bins) % len(self.mins)
+        self.mins[pos] = mins
+        self.maxs[pos] = maxs
+        self.count += bins
+
+    def snapshot(self):
+        """Return (mins, maxs) in chronological order."""
+        n = min(self.count, len(self.mins))
+        order = np.arange(self.count - n, self.count) % len(self.mins)
+        return self.mins[order], self.maxs[order]
+
+
+class AcquisitionPipeline:
+    """Move samples from a source through a ring buffer to any number of consumers.
+
+    The producer fills a preallocated chunk from the source and copies it
+    into the ring buffer; each consumer reads contiguous zero-copy views at
+    its own pace on its own thread. With ``realtime=True`` the producer is
+    paced to the source's sample rate (for capture replay); otherwise it
+    runs as fast as the source and blocking consumers allow.
+    """
+
+    def __init__(self, source: SampleSource, consumers: List[Consumer], capacity: int = 1 << 22,
+                 chunk_size: int = 1 << 16, realtime: bool = False, shared: bool = False):
+        for consumer in consumers:
+            if consumer.block_size > capacity // 2:
+                raise ValueError(f"Consumer {consumer.name} block size exceeds half the ring capacity")
+        self.source = source
+        self.consumers = consumers
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.buffer = SignalRingBuffer(capacity, source.sample_rate, shared=shared)
+        for consumer in consumers:
+            consumer.buffer = self.buffer
+        self._chunk = np.empty(chunk_size)
+
+        self.produced = 0
+        self.producer_wait = 0.0
+        self.elapsed = 0.0
+        self._done = False
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.produced / self.elapsed if self.elapsed else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "produced": self.produced,
+            "samples_per_second": self.samples_per_second,
+            "producer_wait_s": self.producer_wait,
+            "consumers": {consumer.name: {"consumed": consumer.consumed, "overruns": consumer.overruns,
+                                          "lag": self.produced - consumer.cursor}
+                          for consumer in self.consumers},
+        }
+
+    def start(self):
+        """Start the producer and consumer threads."""
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._consume, args=(consumer,), daemon=True)
+                         for consumer in self.consumers]
+        self._threads.append(threading.Thread(target=self._produce, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Acquisition started with {len(self.consumers)} consumer(s)")
+
+    def stop(self):
+        """Stop producing, let consumers drain and join all threads."""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        self.join()
+
+    def join(self, timeout: Optional[float] = None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def close(self):
+        """Release the ring buffer (and its shared memory block) once stopped."""
+        self.buffer.close()
+
+    def run(self, duration: Optional[float] = None) -> dict:
+        """Run in the foreground until the source ends or ``duration`` elapses."""
+        self.start()
+        if duration is not None:
+            self._stop.wait(duration)
+            self._stop.set()
+        self.join()
+        self.close()
+        return self.stats()
+
+    def _produce(self):
+        buffer = self.buffer
+        capacity = buffer.capacity
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                n = self.source.read_into(self._chunk)
+                if n == 0:
+                    break
+                # Backpressure: never overwrite samples a blocking consumer has not read
+                limit = self.produced + n - capacity
+                if not self._caught_up(limit):
+                    waited = time.perf_counter()
+                    with self._condition:
+                        self._condition.wait_for(lambda: self._stop.is_set() or self._caught_up(limit))
+                    self.producer_wait += time.perf_counter() - waited
+                if self.realtime:
+                    ahead = (self.produced + n) / buffer.sample_rate - (time.perf_counter() - start)
+                    if ahead > 0:
+                        self._stop.wait(ahead)
+                buffer.write(self._chunk[:n])
+                self.produced += n
+                with self._condition:
+                    self._condition.notify_all()
+        except Exception as e:
+            logger.error(f"Acquisition source failed: {str(e)}")
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.source.close()
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
+
+    def _caught_up(self, limit: int) -> bool:
+        # Policies are re-read on every check: a failed consumer switches to POLICY_DROP
+        return all(consumer.cursor >= limit for consumer in self.consumers
+                   if consumer.policy == POLICY_BLOCK)
+
+    def _consume(self, consumer: Consumer):
+        buffer = self.buffer
+        capacity = buffer.capacity
+        block = consumer.block_size
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._done or self.produced - consumer.cursor >= block)
+                    produced, done = self.produced, self._done
+                if consumer.policy == POLICY_DROP and produced - consumer.cursor > capacity - block:
+                    # Lapped: skip to the newest whole block
+                    skip = produced - block - consumer.cursor
+                    consumer.overruns += skip
+                    consumer.cursor += skip
+                available = produced - consumer.cursor
+                if available <= 0:
+                    break
+                if available < block and not done:
+                    continue
+
+                start = consumer.cursor
+                length = min(block, available)
+                try:
+                    view = buffer.window(start, length)
+                except WindowUnavailable:
+                    # Lapped between the check and the read; resynchronize on the next pass
+                    continue
+                consumer.consume(view, start)
+                if consumer.policy == POLICY_DROP and not buffer.is_valid(start, length):
+                    # The producer overwrote the view while it was being read
+                    consumer.overruns += length
+                else:
+                    consumer.consumed += length
+                consumer.cursor = start + length
+                if consumer.policy == POLICY_BLOCK:
+                    with self._condition:
+                        self._condition.notify_all()
+        except Exception as e:
+            logger.error(f"Consumer {consumer.name} failed: {str(e)}")
+            # Stop blocking the producer on a dead consumer
+            consumer.policy = POLICY_DROP
+            with self._condition:
+                self._condition.notify_all()
+        finally:
+            consumer.finish()
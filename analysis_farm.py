@@ -0,0 +1,135 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import logging
+import os
+import sys
+import time
+from multiprocessing import shared_memory, util
+from typing import Optional, Tuple
+from capture import CaptureReader
+from config import SignalConfig
+from signal_processor import EMSignalProcessor, SignalAnalysisBatch, segment_view
+
+logger = logging.getLogger(__name__)
+
+# Per-process state set up once by the pool initializer
+_worker = {}
+
+
+@dataclass
+class AnalysisTable:
+    """Ordered per-window analysis of a long capture."""
+    starts: np.ndarray
+    window_size: int
+    analysis: SignalAnalysisBatch
+    elapsed: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def windows_per_second(self) -> float:
+        return len(self) / self.elapsed if self.elapsed else 0.0
+
+
+def _init_worker(source: Tuple, config: SignalConfig, window_size: int, step_size: int):
+    kind = source[0]
+    if kind == "shm":
+        _, name, size, dtype = source
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Pool workers share the parent's resource tracker, where this registration
+            # is a no-op; unregistering here would also drop the parent's entry
+            block = shared_memory.SharedMemory(name=name)
+        _worker["block"] = block
+        signal = np.ndarray((size,), dtype=dtype, buffer=block.buf)
+        util.Finalize(None, _close_worker, exitpriority=10)
+    else:
+        _, path, channel = source
+        signal = CaptureReader(path).channel(channel)
+    _worker.update(signal=signal, processor=EMSignalProcessor(config),
+                   window_size=window_size, step_size=step_size)
+
+
+def _close_worker():
+    # Views into the block must be released before it can be closed
+    _worker.pop("signal", None)
+    block = _worker.pop("block", None)
+    if block is not None:
+        block.close()
+
+
+def _analyze_shard(shard: Tuple[int, int]) -> np.ndarray:
+    first, last = shard
+    window_size, step_size = _worker["window_size"], _worker["step_size"]
+    start = first * step_size
+    stop = (last - 1) * step_size + window_size
+    windows = segment_view(_worker["signal"][start:stop], window_size, window_size - step_size)
+    return _worker["processor"].analyze_batch(windows).as_array()
+
+
+class AnalysisFarm:
+    """Analyze long captures in overlapping windows across a process pool.
+
+    The capture is split into shards of whole windows. Workers read their
+    shard from a ``multiprocessing.shared_memory`` block (in-memory signals)
+    or memory-map the capture file themselves (``analyze_capture``), so no
+    sample data is pickled; only the (n_windows, 5) results come back and
+    are concatenated in window order.
+    """
+
+    def __init__(self, config: SignalConfig, window: float = 1.0, step: Optional[float] = None,
+                 workers: Optional[int] = None, shard_samples: int = 1 << 22, mp_context=None):
+        self.config = config
+        self.window_size = max(int(window * config.sample_rate), 1)
+        self.step_size = self.window_size if step is None else max(int(step * config.sample_rate), 1)
+        self.workers = workers or os.cpu_count() or 1
+        # Workers materialize every window of a shard, so size shards by window length
+        self.shard_windows = max(shard_samples // self.window_size, 1)
+        self.mp_context = mp_context
+
+    def n_windows(self, n_samples: int) -> int:
+        if n_samples < self.window_size:
+            return 0
+        return (n_samples - self.window_size) // self.step_size + 1
+
+    def analyze(self, signal: np.ndarray) -> AnalysisTable:
+        """Analyze an in-memory signal; it is copied once into shared memory."""
+        signal = np.ascontiguousarray(signal)
+        block = shared_memory.SharedMemory(create=True, size=max(signal.nbytes, 1))
+        try:
+            np.ndarray(signal.shape, dtype=signal.dtype, buffer=block.buf)[:] = signal
+            return self._run(("shm", block.name, signal.size, signal.dtype.str), signal.size)
+        finally:
+            block.close()
+            block.unlink()
+
+    def analyze_capture(self, path: str, channel: int = 0) -> AnalysisTable:
+        """Analyze a capture file; workers memory-map it directly."""
+        return self._run(("capture", path, channel), len(CaptureReader(path)))
+
+    def _run(self, source: Tuple, n_samples: int) -> AnalysisTable:
+        start = time.perf_counter()
+        total = self.n_windows(n_samples)
+        shards = [(first, min(first + self.shard_windows, total))
+                  for first in range(0, total, self.shard_windows)]
+
+        if shards:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), mp_context=self.mp_context,
+                                     initializer=_init_worker,
+                                     initargs=(source, self.config, self.window_size, self.step_size)) as pool:
+                rows = np.concatenate(list(pool.map(_analyze_shard, shards)))
+        else:
+            rows = np.empty((0, 5))
+
+        table = AnalysisTable(
+            starts=np.arange(total, dtype=np.int64) * self.step_size,
+            window_size=self.window_size,
+            analysis=SignalAnalysisBatch(*rows.T),
+            elapsed=time.perf_counter() - start,
+        )
+        logger.info(f"Analyzed {total} windows in {len(shards)} shard(s) on {self.workers} worker(s) "
+                    f"({table.windows_per_second:.0f} windows/s)")
+        return table
@@ -0,0 +1,109 @@
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+from dataclasses import dataclass
+import logging
+import threading
+from typing import List, Tuple
+import numpy as np
+from config import SignalConfig
+from plot_lod import EnvelopePyramid
+from signal_processor import EMSignalProcessor, SignalAnalysis, StreamingSignalAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AnalysisResult:
+    config: SignalConfig
+    time: np.ndarray
+    normal_signal: np.ndarray
+    crash_signal: np.ndarray
+    normal_analysis: SignalAnalysis
+    crash_analysis: SignalAnalysis
+    pyramids: List[EnvelopePyramid]
+    y_limits: Tuple[float, float]
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by AnalysisWorker; all carry the request ID."""
+    progress = pyqtSignal(int, float)
+    partial = pyqtSignal(int, object)
+    finished = pyqtSignal(int, object)
+    cancelled = pyqtSignal(int)
+    error = pyqtSignal(int, str)
+
+
+class AnalysisWorker(QRunnable):
+    """Generate, analyze and decimate signals off the GUI thread.
+
+    The capture is produced chunk by chunk so progress and running
+    (partial) analyses can be reported, and cancellation is checked between
+    chunks.
+    """
+
+    def __init__(self, request_id: int, config: SignalConfig, chunk_size: int = 1 << 18):
+        super().__init__()
+        self.request_id = request_id
+        self.config = config
+        self.chunk_size = chunk_size
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Ask the worker to stop at the next chunk boundary."""
+        self._cancelled.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            result = self._analyze()
+        except Exception as e:
+            logger.error(f"Analysis {self.request_id} failed: {str(e)}")
+            self.signals.error.emit(self.request_id, str(e))
+            return
+        if result is None:
+            self.signals.cancelled.emit(self.request_id)
+        else:
+            self.signals.finished.emit(self.request_id, result)
+
+    def _analyze(self):
+        processor = EMSignalProcessor(self.config)
+        n = processor.n_samples
+        normal_signal = np.empty(n)
+        crash_signal = np.empty(n)
+        normal_analyzer = StreamingSignalAnalyzer(self.config)
+        crash_analyzer = StreamingSignalAnalyzer(self.config)
+
+        offset = 0
+        chunks = zip(processor.generate_normal_chunks(self.chunk_size),
+                     processor.generate_crash_chunks(self.chunk_size))
+        for normal, crash in chunks:
+            if self.is_cancelled:
+                return None
+            normal_signal[offset:offset + normal.size] = normal
+            crash_signal[offset:offset + crash.size] = crash
+            normal_analyzer.update(normal)
+            crash_analyzer.update(crash)
+            offset += normal.size
+            self.signals.progress.emit(self.request_id, offset / n)
+            self.signals.partial.emit(self.request_id, (normal_analyzer.result(), crash_analyzer.result()))
+
+        if self.is_cancelled:
+            return None
+        pyramids = [EnvelopePyramid(processor.time, signal) for signal in (normal_signal, crash_signal)]
+        low = min(normal_signal.min(), crash_signal.min())
+        high = max(normal_signal.max(), crash_signal.max())
+        margin = 0.05 * (high - low or 1.0)
+
+        return AnalysisResult(
+            config=self.config,
+            time=processor.time,
+            normal_signal=normal_signal,
+            crash_signal=crash_signal,
+            normal_analysis=normal_analyzer.result(),
+            crash_analysis=crash_analyzer.result(),
+            pyramids=pyramids,
+            y_limits=(low - margin, high + margin)
+        )
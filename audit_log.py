@@ -0,0 +1,214 @@
+import atexit
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Iterator, Tuple
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+FORMAT_TEXT = "text"
+FORMAT_JSONL = "jsonl"
+FORMAT_BINARY = "binary"
+FORMATS = (FORMAT_TEXT, FORMAT_JSONL, FORMAT_BINARY)
+
+BINARY_MAGIC = b'EMAUDIT1'
+# timestamp, event length, JSON fields length, raw data length
+RECORD_HEADER = struct.Struct('<dHIH')
+MAX_DATA_BYTES = 0xFFFF
+
+RECORDS_WRITTEN = Counter("audit_records_written_total", "Audit records written to disk")
+RECORDS_DROPPED = Counter("audit_records_dropped_total", "Audit records dropped because the queue was full")
+FLUSH_SECONDS = Histogram("audit_flush_seconds", "Time to encode and write one batch of audit records")
+
+Record = Tuple[float, str, dict, bytes]
+
+
+def _json_default(value):
+    # numpy scalars and other number-likes
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class AuditLog:
+    """Queue-backed audit log written in batches by a background thread.
+
+    ``log`` only appends a tuple to an in-memory queue, so callers on hot
+    paths pay a few microseconds per event; timestamps are formatted,
+    records encoded and files rotated on the writer thread. When more than
+    ``max_pending`` records are queued, new records are dropped and counted
+    instead of blocking the caller. Logs not closed explicitly are drained
+    and closed at interpreter exit.
+
+    Files rotate like ``logging.handlers.RotatingFileHandler`` (``path.1`` is
+    the newest backup) once they exceed ``max_bytes`` or every
+    ``rotate_interval`` seconds; zero disables either trigger.
+    """
+
+    def __init__(self, path: str, fmt: str = FORMAT_JSONL, flush_interval: float = 0.2,
+                 max_bytes: int = 0, rotate_interval: float = 0.0, backup_count: int = 5,
+                 max_pending: int = 1_000_000):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown audit log format {fmt!r}, expected one of {FORMATS}")
+        self.path = path
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+
+        self._queue = deque()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._file = None
+        self._next_rotation = 0.0
+        self._stamp_second = -1
+        self._stamp = ""
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=f"audit-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+        # Records still queued when the interpreter exits are written, even without close()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def log(self, event: str, data: bytes = b"", **fields):
+        """Queue one record; never blocks on I/O.
+
+        Raw ``data`` is limited to ``MAX_DATA_BYTES`` by the binary record
+        header; larger payloads raise ValueError here rather than failing on
+        the writer thread.
+        """
+        if len(data) > MAX_DATA_BYTES:
+            raise ValueError(f"Audit record data is {len(data)} bytes, the limit is {MAX_DATA_BYTES}")
+        if len(self._queue) >= self.max_pending:
+            self.dropped += 1
+            RECORDS_DROPPED.inc()
+            return
+        self._queue.append((time.time(), event, fields, data))
+
+    def flush(self):
+        """Write every queued record now."""
+        self._drain()
+
+    def close(self):
+        """Stop the writer thread after writing all queued records."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        atexit.unregister(self.close)
+        self._thread.join()
+        try:
+            self._drain()
+        finally:
+            self._file.close()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"Error writing audit log {self.path}: {str(e)}")
+
+    def _drain(self):
+        queue = self._queue
+        if not queue:
+            return
+        with self._write_lock:
+            start = time.perf_counter()
+            encode = getattr(self, f"_encode_{self.fmt}")
+            parts = [encode(queue.popleft()) for _ in range(len(queue))]
+            self._file.write(b"".join(parts))
+            self._file.flush()
+            self.written += len(parts)
+            RECORDS_WRITTEN.inc(len(parts))
+            FLUSH_SECONDS.observe(time.perf_counter() - start)
+            self._maybe_rotate()
+
+    def _timestamp(self, ts: float) -> str:
+        # Records arrive in bursts within the same second; format each second once
+        second = int(ts)
+        if second != self._stamp_second:
+            self._stamp_second = second
+            self._stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return self._stamp
+
+    def _encode_text(self, record: Record) -> bytes:
+        ts, event, fields, data = record
+        line = f"{self._timestamp(ts)} - {event}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if data:
+            line += f" data={data.hex()}"
+        return (line + "\n").encode("utf-8")
+
+    def _encode_jsonl(self, record: Record) -> bytes:
+        ts, event, fields, data = record
+        entry = {"ts": ts, "event": event, **fields}
+        if data:
+            entry["data"] = data.hex()
+        return (json.dumps(entry, separators=(",", ":"), default=_json_default) + "\n").encode("utf-8")
+
+    def _encode_binary(self, record: Record) -> bytes:
+        ts, event, fields, data = record
+        event_bytes = event.encode("utf-8")
+        field_bytes = json.dumps(fields, separators=(",", ":"), default=_json_default).encode("utf-8") \
+            if fields else b""
+        return RECORD_HEADER.pack(ts, len(event_bytes), len(field_bytes), len(data)) \
+            + event_bytes + field_bytes + data
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        if self.fmt == FORMAT_BINARY and self._file.tell() == 0:
+            self._file.write(BINARY_MAGIC)
+        if self.rotate_interval:
+            self._next_rotation = time.time() + self.rotate_interval
+
+    def _maybe_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+        elif self.rotate_interval and time.time() >= self._next_rotation:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+def read_binary(path: str) -> Iterator[Record]:
+    """Iterate over (timestamp, event, fields, data) records of a binary audit log."""
+    with open(path, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary audit log")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            ts, event_len, field_len, data_len = RECORD_HEADER.unpack(header)
+            event = f.read(event_len).decode("utf-8")
+            fields = json.loads(f.read(field_len)) if field_len else {}
+            yield ts, event, fields, f.read(data_len)
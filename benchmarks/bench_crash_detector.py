@@ -0,0 +1,62 @@
+"""Throughput and detection-latency benchmark for SilentCrashDetector.
+
+Run from the repository root:
+    python -m benchmarks.bench_crash_detector --sample-rate 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from config import SignalConfig
+from crash_detector import SilentCrashDetector
+from signal_processor import EMSignalProcessor
+
+
+def run(sample_rate: int = 100000, duration: float = 4.0, chunk_size: int = 4096,
+        window: float = 0.1, dwell_time: float = 0.05, seed: int = 0) -> dict:
+    """Feed a normal-then-crash capture through the detector and time it."""
+    config = SignalConfig(sample_rate=sample_rate, duration=duration,
+                          trigger_threshold=0.3, noise_threshold=0.1)
+    processor = EMSignalProcessor(config)
+    signal = processor.generate_normal_signal()
+
+    # Crash starts half way through: attenuation plus noise, as in generate_crash_signal
+    onset = signal.size // 2
+    rng = np.random.default_rng(seed)
+    signal[onset:] = signal[onset:] * 0.5 + rng.normal(0, config.noise_threshold, signal.size - onset)
+
+    detector = SilentCrashDetector(processor, window=window, dwell_time=dwell_time)
+    start = time.perf_counter()
+    for offset in range(0, signal.size, chunk_size):
+        detector.process(signal[offset:offset + chunk_size])
+    elapsed = time.perf_counter() - start
+
+    first = next((e for e in detector.events if e.sample_index >= onset), None)
+    false_alarms = sum(1 for e in detector.events if e.sample_index < onset)
+    return {
+        "sample_rate": sample_rate,
+        "samples": int(signal.size),
+        "elapsed_s": elapsed,
+        "samples_per_second": signal.size / elapsed,
+        "realtime_factor": signal.size / elapsed / sample_rate,
+        "detection_latency_s": (first.sample_index - onset) / sample_rate if first else None,
+        "false_alarms": false_alarms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sample-rate", type=int, default=100000)
+    parser.add_argument("--duration", type=float, default=4.0)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--window", type=float, default=0.1)
+    parser.add_argument("--dwell-time", type=float, default=0.05)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sample_rate, args.duration, args.chunk_size,
+                         args.window, args.dwell_time), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Devices per core a LivenessProber can supervise, and its fault detection latency.
+
+Run from the repository root:
+    python -m benchmarks.bench_liveness --devices 2000 --interval 1 --duration 10
+
+The simulated devices run in a separate ``cli.py simulate`` process so the
+prober's CPU time is measured on its own; devices per core is the probe
+interval divided by the CPU time spent per heartbeat.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_modbus_pool import free_port
+from liveness_prober import STATE_ALIVE, STATE_FROZEN, STATE_HUNG, LivenessProber, ProbeTarget
+from modbus_simulator import FAULT_HANG, FAULT_SILENT_CRASH, ModbusSimulator, counter_dynamics
+
+UNITS_PER_PORT = 247
+
+
+def _start_simulator(devices: int) -> tuple:
+    """Start an external simulator with ``devices`` unit IDs spread over consecutive ports."""
+    ports = math.ceil(devices / UNITS_PER_PORT)
+    units = min(devices, UNITS_PER_PORT)
+    for _ in range(10):
+        base = free_port()
+        process = subprocess.Popen([sys.executable, "cli.py", "simulate", "--port", str(base),
+                                    "--ports", str(ports), "--devices", str(units), "--registers", "16"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        if process.stdout.readline().startswith("Simulating"):
+            return process, base, ports, units
+        process.wait()
+    raise RuntimeError("Could not start the simulator on consecutive free ports")
+
+
+def scale(devices: int = 1000, interval: float = 1.0, duration: float = 10.0) -> dict:
+    process, base, ports, units = _start_simulator(devices)
+    try:
+        targets = [ProbeTarget(f"{port}/{unit}", "127.0.0.1", port, unit, expect_change=False)
+                   for port in range(base, base + ports) for unit in range(1, units + 1)][:devices]
+        prober = LivenessProber(targets, interval=interval, deadline=max(3 * interval, 2.0))
+        cpu = time.process_time()
+        start = time.perf_counter()
+        asyncio.run(prober.run(duration))
+        cpu = time.process_time() - cpu
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+    probes = sum(health.probes for health in prober.health.values())
+    cpu_per_probe = cpu / probes
+    return {
+        "devices": devices,
+        "probes_per_second": probes / elapsed,
+        "cpu_fraction": cpu / elapsed,
+        "cpu_us_per_probe": cpu_per_probe * 1e6,
+        "devices_per_core": interval / cpu_per_probe,
+        "alive": prober.state_counts()[STATE_ALIVE],
+    }
+
+
+def detection(interval: float = 0.2, deadline: float = 1.0) -> dict:
+    """Seconds from fault injection to classification for hung and silently crashed devices."""
+    port = free_port()
+    simulator = ModbusSimulator(tick_interval=0.05)
+    hung = simulator.add_device(port, 1)
+    crashed = simulator.add_device(port, 2)
+    crashed.dynamics.append(counter_dynamics(0))
+    simulator.start()
+
+    detected = {}
+    injected = {}
+
+    def on_transition(target, old, new):
+        if new in (STATE_HUNG, STATE_FROZEN) and target.name in injected:
+            detected[target.name] = time.monotonic() - injected[target.name]
+
+    prober = LivenessProber([ProbeTarget("hung", "127.0.0.1", port, 1, expect_change=False),
+                             ProbeTarget("crashed", "127.0.0.1", port, 2)],
+                            interval=interval, deadline=deadline, on_transition=on_transition)
+    prober.start()
+    try:
+        time.sleep(deadline)
+        for name, device, fault in (("hung", hung, FAULT_HANG), ("crashed", crashed, FAULT_SILENT_CRASH)):
+            injected[name] = time.monotonic()
+            device.inject_fault(fault)
+        time.sleep(2 * (deadline + interval))
+    finally:
+        prober.stop()
+        simulator.stop()
+    return {
+        "deadline": deadline,
+        "hung_detection_s": detected.get("hung"),
+        "frozen_detection_s": detected.get("crashed"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps({"scale": scale(args.devices, args.interval, args.duration),
+                      "detection": detection()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
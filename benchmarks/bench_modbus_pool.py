@@ -0,0 +1,83 @@
+"""Requests/second and latency of AsyncModbusClientPool against a local ModbusServerHandler.
+
+Run from the repository root:
+    python -m benchmarks.bench_modbus_pool --concurrency 200 --duration 5
+"""
+import argparse
+import asyncio
+import json
+import socket
+import time
+
+import numpy as np
+
+from config import ModbusConfig
+from modbus_pool import AsyncModbusClientPool
+from modbus_server import ModbusServerHandler
+
+
+def free_port() -> int:
+    """Return an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _poll(pool: AsyncModbusClientPool, deadline: float, latencies: list, failures: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        registers = await pool.read_registers(0, 2)
+        if registers is None:
+            failures.append(1)
+        else:
+            latencies.append(time.perf_counter() - start)
+
+
+async def _run_pool(config: ModbusConfig, concurrency: int, duration: float,
+                    max_in_flight: int) -> dict:
+    latencies, failures = [], []
+    async with AsyncModbusClientPool(config, max_in_flight=max_in_flight) as pool:
+        # Warm up the persistent connection before timing
+        await pool.read_registers(0, 2)
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_poll(pool, deadline, latencies, failures)
+                               for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latency_ms = np.array(latencies) * 1000.0
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "failures": len(failures),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latency_ms, 50)) if latencies else None,
+        "p99_ms": float(np.percentile(latency_ms, 99)) if latencies else None,
+    }
+
+
+def run(concurrency: int = 200, duration: float = 5.0, max_in_flight: int = 64,
+        port: int = 0) -> dict:
+    """Start a local server, hammer it with the pool and report throughput."""
+    config = ModbusConfig(host="127.0.0.1", port=port or free_port(), timeout=3, retries=3)
+    server = ModbusServerHandler(config)
+    server.start()
+    time.sleep(0.5)
+    try:
+        return asyncio.run(_run_pool(config, concurrency, duration, max_in_flight))
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.concurrency, args.duration, args.max_in_flight, args.port), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Requests/second a ModbusSimulator sustains across many virtual devices.
+
+Run from the repository root:
+    python -m benchmarks.bench_simulator --devices 100 --duration 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.bench_modbus_pool import free_port
+from config import ModbusConfig
+from modbus_pool import AsyncModbusClientPool
+from modbus_simulator import ModbusSimulator
+
+
+async def _poll(pool: AsyncModbusClientPool, unit_id: int, deadline: float, counts: list):
+    while time.perf_counter() < deadline:
+        if await pool.read_registers(0, 10, unit_id=unit_id) is not None:
+            counts[0] += 1
+
+
+def run(devices: int = 100, duration: float = 5.0, pollers_per_device: int = 2) -> dict:
+    """Host ``devices`` unit IDs on one port and poll them all concurrently."""
+    port = free_port()
+    simulator = ModbusSimulator()
+    for unit_id in range(1, devices + 1):
+        simulator.add_device(port, unit_id)
+    simulator.start()
+
+    async def main():
+        counts = [0]
+        config = ModbusConfig(host="127.0.0.1", port=port, timeout=3, retries=1)
+        async with AsyncModbusClientPool(config, max_in_flight=256) as pool:
+            await pool.read_registers(0, 1, unit_id=1)
+            start = time.perf_counter()
+            await asyncio.gather(*(_poll(pool, unit_id, start + duration, counts)
+                                   for unit_id in range(1, devices + 1)
+                                   for _ in range(pollers_per_device)))
+            return counts[0], time.perf_counter() - start
+
+    try:
+        requests, elapsed = asyncio.run(main())
+    finally:
+        simulator.stop()
+    stats = simulator.device_stats()
+    return {
+        "devices": devices,
+        "requests": requests,
+        "requests_per_second": requests / elapsed,
+        "min_device_requests": min(s["requests"] for s in stats.values()),
+        "max_device_requests": max(s["requests"] for s in stats.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--pollers-per-device", type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps(run(args.devices, args.duration, args.pollers_per_device), indent=2))
+
+
+if __name__ == "__main__":
+    main()
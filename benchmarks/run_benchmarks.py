@@ -0,0 +1,271 @@
+"""Headless benchmark suite for signal analysis, acquisition, Modbus round-trips and fuzz throughput.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --output benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+
+No baseline is committed: timings only compare meaningfully on the same
+machine, so record one with ``--output`` before making changes.
+
+Every metric is recorded with its direction: names ending in ``_per_second``
+are better when higher, everything else (times, latencies, bytes) when lower.
+With ``--baseline`` the run fails if any metric regresses by more than the
+threshold fraction; a metric whose baseline is zero (such as dropped
+samples) regresses on any increase.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.bench_modbus_pool import free_port
+from config import ModbusConfig, SignalConfig
+
+SAMPLE_RATES = (1000, 10000, 100000)
+DURATIONS = (1.0, 10.0)
+
+
+def measure(fn: Callable[[], object], repeat: int = 3) -> Dict[str, float]:
+    """Best-of-``repeat`` wall time of ``fn``, and its peak traced memory from one extra run.
+
+    Timed runs do not trace allocations, so tracing overhead stays out of ``time_s``.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"time_s": best, "peak_bytes": peak}
+
+
+def bench_signal(sample_rates=SAMPLE_RATES, durations=DURATIONS) -> Dict[str, float]:
+    """EMSignalProcessor generation and analysis across a grid of capture sizes."""
+    from signal_processor import EMSignalProcessor
+
+    results = {}
+    for sample_rate in sample_rates:
+        for duration in durations:
+            config = SignalConfig(sample_rate=sample_rate, duration=duration,
+                                  trigger_threshold=0.3, noise_threshold=0.1)
+            processor = EMSignalProcessor(config)
+            signal = processor.generate_crash_signal()
+            batch = np.vstack([signal] * 8)
+            key = f"signal.{sample_rate}hz_{duration:g}s"
+
+            for name, fn in (
+                ("generate_normal", processor.generate_normal_signal),
+                ("generate_crash", processor.generate_crash_signal),
+                ("analyze", lambda: processor.analyze_signal(signal)),
+                ("analyze_stream", lambda: processor.analyze_stream(np.array_split(signal, 16))),
+                ("analyze_batch8", lambda: processor.analyze_batch(batch)),
+                ("spectrum", lambda: processor.analyze_spectrum(signal)),
+            ):
+                metrics = measure(fn)
+                results[f"{key}.{name}.time_s"] = metrics["time_s"]
+                results[f"{key}.{name}.peak_bytes"] = metrics["peak_bytes"]
+            results[f"{key}.analyze.samples_per_second"] = signal.size / results[f"{key}.analyze.time_s"]
+    return results
+
+
+def bench_scenarios(n_samples: int = 10_000_000) -> Dict[str, float]:
+    """ScenarioGenerator rendering throughput for a labelled dataset."""
+    from scenario_generator import ScenarioGenerator
+
+    config = SignalConfig(sample_rate=10000, duration=1.0, trigger_threshold=0.3, noise_threshold=0.1)
+    generator = ScenarioGenerator(config, seed=0, events_per_second=2.0)
+    schedule = generator.schedule(n_samples)
+    metrics = measure(lambda: sum(chunk.signal.size for chunk in generator.chunks(n_samples, schedule=schedule)),
+                      repeat=1)
+    return {
+        "scenario.render_10m.time_s": metrics["time_s"],
+        "scenario.render_10m.peak_bytes": metrics["peak_bytes"],
+        "scenario.render.samples_per_second": n_samples / metrics["time_s"],
+    }
+
+
+def bench_farm(n_samples: int = 20_000_000) -> Dict[str, float]:
+    """AnalysisFarm windows/second with one worker and with every core."""
+    import os
+    from analysis_farm import AnalysisFarm
+    from scenario_generator import ScenarioGenerator
+
+    config = SignalConfig(sample_rate=10000, duration=1.0, trigger_threshold=0.3, noise_threshold=0.1)
+    signal, _ = ScenarioGenerator(config, seed=0).generate(n_samples)
+    results = {}
+    for workers in sorted({1, os.cpu_count() or 1}):
+        table = AnalysisFarm(config, window=1.0, step=0.5, workers=workers).analyze(signal)
+        results[f"farm.{workers}_workers.windows_per_second"] = table.windows_per_second
+    return results
+
+
+def bench_acquisition(duration: float = 3.0) -> Dict[str, float]:
+    """Sustained AcquisitionPipeline ingest with analysis, envelope and recording consumers."""
+    import os
+    import tempfile
+    from acquisition import AcquisitionPipeline, AnalyzerConsumer, EnvelopeConsumer, RecorderConsumer, \
+        SyntheticSource
+    from signal_processor import EMSignalProcessor
+
+    config = SignalConfig(sample_rate=1_000_000, duration=1.0, trigger_threshold=0.3, noise_threshold=0.1)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, consumers in (
+                ("analyze", lambda: [AnalyzerConsumer(EMSignalProcessor(config), window=0.05),
+                                     EnvelopeConsumer()]),
+                ("record", lambda: [AnalyzerConsumer(EMSignalProcessor(config), window=0.05),
+                                    RecorderConsumer(os.path.join(directory, "ingest.emcap"),
+                                                     config.sample_rate)])):
+            pipeline = AcquisitionPipeline(SyntheticSource(config, seed=0), consumers())
+            stats = pipeline.run(duration)
+            results[f"acquisition.{name}.samples_per_second"] = stats["samples_per_second"]
+            results[f"acquisition.{name}.dropped_samples"] = sum(
+                consumer["overruns"] for consumer in stats["consumers"].values())
+    return results
+
+
+def bench_modbus(requests: int = 500) -> Dict[str, float]:
+    """ModbusClientHandler read/write latency against a local ModbusServerHandler."""
+    from modbus_client import ModbusClientHandler
+    from modbus_server import ModbusServerHandler
+
+    config = ModbusConfig(host="127.0.0.1", port=free_port(), timeout=3, retries=3)
+    server = ModbusServerHandler(config)
+    server.start()
+    try:
+        client = ModbusClientHandler(config)
+        results = {}
+        for name, fn in (("read", lambda i: client.read_registers(0, 2)),
+                         ("write", lambda i: client.write_register(i % 100, i & 0xFFFF)),
+                         ("read_many", lambda i: client.read_many(range(0, 200, 3)))):
+            latencies = np.empty(requests)
+            start = time.perf_counter()
+            for i in range(requests):
+                t = time.perf_counter()
+                fn(i)
+                latencies[i] = time.perf_counter() - t
+            elapsed = time.perf_counter() - start
+            results[f"modbus.{name}.p50_ms"] = float(np.percentile(latencies, 50) * 1000)
+            results[f"modbus.{name}.p99_ms"] = float(np.percentile(latencies, 99) * 1000)
+            results[f"modbus.{name}.requests_per_second"] = requests / elapsed
+        return results
+    finally:
+        server.stop()
+
+
+def bench_fuzz(cases: int = 5000, workers: int = 32) -> Dict[str, float]:
+    """ProtocolTester campaign throughput against a local ModbusServerHandler."""
+    from Features.protocol_tester import MutationGenerator, ProtocolTester
+    from modbus_server import ModbusServerHandler
+
+    results = {}
+    generator = MutationGenerator(0, 100, seed=0)
+    metrics = measure(lambda: generator.generate(65536))
+    results["fuzz.generate_65536.time_s"] = metrics["time_s"]
+    results["fuzz.generate.cases_per_second"] = 65536 / metrics["time_s"]
+
+    config = ModbusConfig(host="127.0.0.1", port=free_port(), timeout=3, retries=3)
+    server = ModbusServerHandler(config)
+    server.start()
+    try:
+        stats = ProtocolTester(config.host, config.port).run_fuzz_campaign(
+            0, 100, cases, workers=workers, timeout=0.2)
+        results["fuzz.campaign.cases_per_second"] = stats.cases_per_second
+    finally:
+        server.stop()
+    return results
+
+
+SUITES = {
+    "signal": bench_signal,
+    "scenario": bench_scenarios,
+    "farm": bench_farm,
+    "acquisition": bench_acquisition,
+    "modbus": bench_modbus,
+    "fuzz": bench_fuzz,
+}
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_second")
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Return a description of every metric that regressed beyond ``threshold``."""
+    regressions = []
+    for metric, value in sorted(results.items()):
+        reference = baseline.get(metric)
+        if reference is None:
+            continue
+        if reference == 0:
+            # No relative change from zero: any increase of a lower-is-better metric regresses
+            if value > 0 and not higher_is_better(metric):
+                regressions.append(f"{metric}: 0 -> {value:.6g}")
+            continue
+        change = (value - reference) / reference
+        if higher_is_better(metric):
+            change = -change
+        if change > threshold:
+            regressions.append(f"{metric}: {reference:.6g} -> {value:.6g} ({change:+.1%} worse)")
+    return regressions
+
+
+def run(suites: List[str]) -> dict:
+    """Run the selected suites and return a JSON-serializable report."""
+    metrics = {}
+    for name in suites:
+        start = time.perf_counter()
+        metrics.update(SUITES[name]())
+        print(f"{name}: done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "metrics": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="Suite to run (repeatable); default runs all")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed regression as a fraction (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = run(args.suite or list(SUITES))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(report["metrics"], baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import numpy as np
+import os
+import struct
+import time
+from typing import Iterator, Optional, Tuple
+
+CAPTURE_MAGIC = b'EMCAPTUR'
+CAPTURE_VERSION = 1
+CAPTURE_EXTENSION = '.emcap'
+INDEX_EXTENSION = '.idx'
+
+# magic, version, channels, sample_rate, start_time, dtype string, padded to 64 bytes
+HEADER = struct.Struct('<8sHHdd16s20x')
+HEADER_SIZE = HEADER.size
+
+MARKER_DTYPE = np.dtype([('sample', '<i8'), ('kind', '<u2'), ('value', '<i8')])
+MARKER_FUZZ_CASE = 1
+MARKER_CRASH_EVENT = 2
+MARKER_LABEL = 3
+
+
+class CaptureFormatError(Exception):
+    """Raised when a file is not a valid capture."""
+
+
+def index_path(path: str) -> str:
+    """Return the marker sidecar path for a capture file."""
+    return path + INDEX_EXTENSION
+
+
+class CaptureWriter:
+    """Append-only writer for EM capture files.
+
+    The sample count is derived from the file size, so a capture stays
+    readable up to its last complete frame even if the writer is killed.
+    """
+
+    def __init__(self, path: str, sample_rate: float, dtype: str = '<f4', channels: int = 1,
+                 start_time: Optional[float] = None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        self.start_time = time.time() if start_time is None else start_time
+        self.samples_written = 0
+        self._markers = []
+
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, channels, float(sample_rate),
+                                     float(self.start_time), self.dtype.str.encode('ascii')))
+        self._index = open(index_path(path), 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, chunk: np.ndarray):
+        """Append a chunk of shape (n,) or (n, channels)."""
+        chunk = np.ascontiguousarray(chunk, dtype=self.dtype)
+        if chunk.ndim == 1 and self.channels == 1:
+            frames = chunk.shape[0]
+        elif chunk.ndim == 2 and chunk.shape[1] == self.channels:
+            frames = chunk.shape[0]
+        else:
+            raise ValueError(f"Expected (n, {self.channels}) samples, got shape {chunk.shape}")
+        self._file.write(memoryview(chunk).cast('B'))
+        self.samples_written += frames
+
+    def add_marker(self, kind: int, value: int, sample: Optional[int] = None):
+        """Record a marker (fuzz case ID, crash event, ...) at a sample index."""
+        self._markers.append((self.samples_written if sample is None else sample, kind, value))
+        if len(self._markers) >= 4096:
+            self._flush_markers()
+
+    def _flush_markers(self):
+        if self._markers:
+            self._index.write(np.array(self._markers, dtype=MARKER_DTYPE).tobytes())
+            self._markers = []
+
+    def flush(self):
+        """Flush samples and markers to disk."""
+        self._flush_markers()
+        self._file.flush()
+        self._index.flush()
+
+    def close(self):
+        """Flush and close the capture and its index."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            self._index.close()
+
+
+class CaptureReader:
+    """Memory-mapped reader for EM capture files."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise CaptureFormatError(f"{path} is too short to be a capture file")
+        magic, version, channels, sample_rate, start_time, dtype = HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+            raise CaptureFormatError(f"{path} is not a version {CAPTURE_VERSION} capture file")
+
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.start_time = start_time
+        self.dtype = np.dtype(dtype.rstrip(b'\x00').decode('ascii'))
+
+        frame_size = self.dtype.itemsize * channels
+        frames = (os.path.getsize(path) - HEADER_SIZE) // frame_size
+        if frames:
+            self.data = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER_SIZE,
+                                  shape=(frames, channels))
+        else:
+            self.data = np.zeros((0, channels), dtype=self.dtype)
+        self.markers = self._load_markers()
+
+    def _load_markers(self) -> np.ndarray:
+        path = index_path(self.path)
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=MARKER_DTYPE)
+        markers = np.fromfile(path, dtype=MARKER_DTYPE)
+        if markers.size and np.any(np.diff(markers['sample']) < 0):
+            markers = markers[np.argsort(markers['sample'], kind='stable')]
+        return markers
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.sample_rate
+
+    def channel(self, index: int = 0) -> np.ndarray:
+        """Return one channel as a (possibly strided) memory-mapped view."""
+        return self.data[:, index]
+
+    def samples(self, start: int = 0, stop: Optional[int] = None, channel: int = 0) -> np.ndarray:
+        """Return samples [start, stop) of a channel without reading the rest of the file."""
+        return self.data[start:stop, channel]
+
+    def time_slice(self, t_start: float, t_stop: float, channel: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (time, samples) between two offsets in seconds."""
+        start = max(int(t_start * self.sample_rate), 0)
+        stop = min(int(np.ceil(t_stop * self.sample_rate)), len(self))
+        return np.arange(start, stop) / self.sample_rate, self.samples(start, stop, channel)
+
+    def iter_chunks(self, chunk_size: int = 1 << 20, start: int = 0, stop: Optional[int] = None,
+                    channel: int = 0) -> Iterator[np.ndarray]:
+        """Yield fixed-size chunks of a channel for streaming analysis."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for offset in range(start, stop, chunk_size):
+            yield self.data[offset:min(offset + chunk_size, stop), channel]
+
+    def find_markers(self, kind: Optional[int] = None, start: int = 0,
+                     stop: Optional[int] = None) -> np.ndarray:
+        """Return markers in [start, stop), optionally of a single kind."""
+        samples = self.markers['sample']
+        lo = np.searchsorted(samples, start, side='left')
+        hi = len(samples) if stop is None else np.searchsorted(samples, stop, side='left')
+        markers = self.markers[lo:hi]
+        return markers if kind is None else markers[markers['kind'] == kind]
+
+    def seek(self, kind: int, value: int) -> Optional[int]:
+        """Return the sample index of the first marker with the given kind and value."""
+        hits = np.flatnonzero((self.markers['kind'] == kind) & (self.markers['value'] == value))
+        return int(self.markers['sample'][hits[0]]) if hits.size else None
@@ -0,0 +1,312 @@
+"""Headless command-line entry point: analyze captures, run the simulator, fuzz, replay and monitor devices.
+
+Heavy modules (matplotlib, Qt, pyModbusTCP, the simulator) are imported
+inside the command that needs them, so ``python cli.py --help`` and the
+non-plotting commands start quickly and run on machines without a display.
+
+Examples:
+    python cli.py analyze capture.emcap --window 1 --step 0.5 --output windows.csv
+    python cli.py simulate --port 5020 --devices 4
+    python cli.py fuzz --port 5020 --iterations 100000 --audit fuzz.bin
+    python cli.py fuzz --port 5020 --iterations 100000 --campaign campaigns/plc1
+    python cli.py replay campaigns/plc1/crashes/4dd97253cddd2f3d.bin --port 5020 --minimize
+    python cli.py monitor --port 5020 --addresses 0 1 2 --interval 0.5
+    python cli.py monitor --watch
+"""
+import argparse
+import logging
+import math
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _modbus_defaults(args):
+    """Fill host/port from the config file unless given on the command line."""
+    from config import load_config
+
+    try:
+        modbus_config, _ = load_config(args.config)
+    except FileNotFoundError:
+        return args.host or "127.0.0.1", args.port or 5020
+    return args.host or modbus_config.host, args.port or modbus_config.port
+
+
+def _wait(duration):
+    """Block until ``duration`` seconds have passed (forever if None) or Ctrl-C."""
+    try:
+        threading.Event().wait(duration)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_analyze(args) -> int:
+    import numpy as np
+    from capture import CaptureReader
+    from config import SignalConfig, load_config
+
+    reader = CaptureReader(args.capture)
+    try:
+        _, file_config = load_config(args.config)
+        trigger, noise = file_config.trigger_threshold, file_config.noise_threshold
+    except FileNotFoundError:
+        trigger, noise = 0.3, 0.1
+    config = SignalConfig(sample_rate=int(reader.sample_rate), duration=reader.duration,
+                          trigger_threshold=trigger if args.trigger_threshold is None else args.trigger_threshold,
+                          noise_threshold=noise if args.noise_threshold is None else args.noise_threshold)
+    print(f"{args.capture}: {len(reader)} samples x {reader.channels} channel(s) at "
+          f"{reader.sample_rate:g} Hz ({reader.duration:.1f} s), {len(reader.markers)} marker(s)")
+
+    if args.window:
+        from analysis_farm import AnalysisFarm
+
+        table = AnalysisFarm(config, window=args.window, step=args.step,
+                             workers=args.workers).analyze_capture(args.capture, args.channel)
+        rows = np.column_stack([table.starts / reader.sample_rate, table.analysis.as_array()])
+        header = "time_s,positive_mean,negative_mean,peak_to_peak,rms,snr"
+        if args.output:
+            np.savetxt(args.output, rows, delimiter=",", header=header, comments="", fmt="%.6g")
+            print(f"Wrote {len(table)} windows to {args.output}")
+        else:
+            print(header)
+            np.savetxt(sys.stdout, rows, delimiter=",", fmt="%.6g")
+        print(f"{table.windows_per_second:.0f} windows/s", file=sys.stderr)
+    else:
+        from signal_processor import EMSignalProcessor
+
+        analysis = EMSignalProcessor(config).analyze_stream(reader.iter_chunks(channel=args.channel))
+        for name in ("positive_mean", "negative_mean", "peak_to_peak", "rms", "snr"):
+            print(f"{name:>14}: {getattr(analysis, name):.4f}")
+
+    if args.plot:
+        from signal_processor import EMSignalProcessor
+
+        t_stop = args.plot_seconds or reader.duration
+        time_base, samples = reader.time_slice(0.0, t_stop, args.channel)
+        EMSignalProcessor(config).visualize_segment(time_base, samples, label=args.capture,
+                                                    save_path=args.plot)
+        print(f"Saved plot to {args.plot}")
+    return 0
+
+
+def cmd_simulate(args) -> int:
+    from modbus_simulator import FAULT_NONE, ModbusSimulator
+
+    host, port = _modbus_defaults(args)
+    simulator = ModbusSimulator(host=host)
+    devices = []
+    for device_port in range(port, port + args.ports):
+        if args.devices == 1:
+            devices.append(simulator.add_device(device_port, n_registers=args.registers))
+        else:
+            devices.extend(simulator.add_device(device_port, unit_id=unit_id, n_registers=args.registers)
+                           for unit_id in range(1, args.devices + 1))
+    if args.fault != FAULT_NONE:
+        for device in devices:
+            device.inject_fault(args.fault, args.fault_delay)
+
+    simulator.start()
+    print(f"Simulating {len(devices)} device(s) on {host}:{port}-{port + args.ports - 1}; Ctrl-C to stop",
+          flush=True)
+    _wait(args.duration)
+    simulator.stop()
+    for name, stats in simulator.device_stats().items():
+        print(f"{name}: {dict(stats)}")
+    return 0
+
+
+def cmd_fuzz(args) -> int:
+    host, port = _modbus_defaults(args)
+    audit = None
+    if args.audit:
+        from audit_log import AuditLog
+        audit = AuditLog(args.audit, fmt=args.audit_format, max_bytes=args.audit_max_bytes)
+    try:
+        if args.campaign:
+            from Features.fuzz_campaign import FuzzCampaign
+
+            campaign = FuzzCampaign(args.campaign, host, port, args.start, args.end, seed=args.seed,
+                                    workers=args.workers, timeout=args.timeout, audit=audit)
+            stats = campaign.run(args.iterations)
+        else:
+            from Features.protocol_tester import ProtocolTester
+
+            tester = ProtocolTester(host, port, seed=args.seed, audit=audit)
+            stats = tester.run_fuzz_campaign(args.start, args.end, args.iterations,
+                                             workers=args.workers, timeout=args.timeout)
+    finally:
+        if audit is not None:
+            audit.close()
+    print(stats.summary())
+    print(f"by strategy: {dict(stats.by_strategy)}")
+    print(f"exception codes: {dict(stats.exception_codes)}")
+    if args.campaign:
+        for record in campaign.crashes.values():
+            print(f"crash {record.signature}: {record.count}x, reproducer crashes/{record.digest}.bin "
+                  f"({record.frames} request(s))")
+    return 0
+
+
+def cmd_replay(args) -> int:
+    import asyncio
+    import subprocess
+    from audit_log import BINARY_MAGIC
+    from Features.crash_replay import CrashMinimizer, CrashOracle, DeviceTarget, ReplaySequence, replay
+
+    host, port = _modbus_defaults(args)
+    with open(args.sequence, "rb") as f:
+        is_audit = f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    sequence = ReplaySequence.from_audit(args.sequence) if is_audit else ReplaySequence.from_file(args.sequence)
+    reset = None
+    if args.reset_command:
+        reset = lambda: subprocess.run(args.reset_command, shell=True, check=True)
+    target = DeviceTarget(host, port, args.unit_id, reset=reset)
+    oracle = CrashOracle(timeout=args.timeout)
+
+    if args.minimize:
+        result = CrashMinimizer([target], oracle, timing=args.timing, timeout=args.timeout).minimize(sequence)
+        print(result.summary())
+        if result.reproduced and args.output:
+            result.minimized.save(args.output)
+            print(f"Wrote minimized sequence to {args.output}")
+        return 0 if result.reproduced else 1
+
+    async def run():
+        target.reset()
+        result = await replay(host, port, sequence, args.unit_id, args.timeout, args.timing)
+        return result, await oracle.judge(target, result)
+
+    result, verdict = asyncio.run(run())
+    print(result.summary())
+    print(f"Target crashed ({verdict.reason})" if verdict.crashed else "Target healthy")
+    return 0
+
+
+def cmd_monitor(args) -> int:
+    from live_monitor import LivePoller, MonitoredDevice
+
+    host, port = _modbus_defaults(args)
+    devices = [MonitoredDevice(name=f"{host}:{port}", host=host, port=port,
+                               addresses=args.addresses, unit_id=args.unit_id)]
+    service = None
+    if args.watch:
+        from config import config_service
+
+        service = config_service(args.config)
+        configured = [MonitoredDevice.from_config(device) for device in service.get().devices]
+        devices = configured or devices
+    poller = LivePoller(devices, interval=args.interval, history=64, timeout=args.timeout)
+    if service is not None:
+        # Edits to the device list apply on the next poll, keeping other connections open
+        service.subscribe(lambda configured: poller.set_devices(
+            [MonitoredDevice.from_config(device) for device in configured] or devices), "devices")
+        service.start()
+    poller.start()
+    deadline = None if args.duration is None else time.monotonic() + args.duration
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(args.interval)
+            for device in poller.devices:
+                history = poller.histories.get(device.name)
+                _, values = history.snapshot() if history is not None else (None, [])
+                if len(values):
+                    row = ", ".join(f"{address}={'-' if math.isnan(value) else int(value)}"
+                                    for address, value in zip(device.addresses, values[-1]))
+                    prefix = f"{device.name} " if len(poller.devices) > 1 else ""
+                    print(f"{time.strftime('%H:%M:%S')} {prefix}{row}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if service is not None:
+            service.stop()
+        poller.stop()
+    print(f"{poller.polls} polls, {poller.failures} failed")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="config.yml", help="Configuration file (default config.yml)")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log at INFO level")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="Analyze an .emcap capture")
+    analyze.add_argument("capture")
+    analyze.add_argument("--channel", type=int, default=0)
+    analyze.add_argument("--window", type=float, help="Analyze in windows of this many seconds")
+    analyze.add_argument("--step", type=float, help="Window step in seconds (default: window)")
+    analyze.add_argument("--workers", type=int, help="Worker processes for windowed analysis")
+    analyze.add_argument("--output", help="Write the window table as CSV")
+    analyze.add_argument("--trigger-threshold", type=float)
+    analyze.add_argument("--noise-threshold", type=float)
+    analyze.add_argument("--plot", help="Save a plot of the capture to this image file")
+    analyze.add_argument("--plot-seconds", type=float, help="Plot only the first N seconds")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    simulate = commands.add_parser("simulate", help="Run the Modbus device simulator")
+    simulate.add_argument("--host")
+    simulate.add_argument("--port", type=int)
+    simulate.add_argument("--devices", type=int, default=1, help="Devices on unit IDs 1..N of each port")
+    simulate.add_argument("--ports", type=int, default=1, help="Serve consecutive ports starting at --port")
+    simulate.add_argument("--registers", type=int, default=1024)
+    simulate.add_argument("--fault", default="none", choices=("none", "hang", "silent_crash", "delay"))
+    simulate.add_argument("--fault-delay", type=float, default=0.0)
+    simulate.add_argument("--duration", type=float, help="Stop after N seconds")
+    simulate.set_defaults(handler=cmd_simulate)
+
+    fuzz = commands.add_parser("fuzz", help="Run a protocol fuzz campaign")
+    fuzz.add_argument("--host")
+    fuzz.add_argument("--port", type=int)
+    fuzz.add_argument("--start", type=int, default=0)
+    fuzz.add_argument("--end", type=int, default=100)
+    fuzz.add_argument("--iterations", type=int, default=10000)
+    fuzz.add_argument("--workers", type=int, default=16)
+    fuzz.add_argument("--timeout", type=float, default=1.0)
+    fuzz.add_argument("--seed", type=int, default=0)
+    fuzz.add_argument("--campaign", help="Coverage-guided campaign directory (created, or resumed if it exists)")
+    fuzz.add_argument("--audit", help="Record every case to this audit log")
+    fuzz.add_argument("--audit-format", default="binary", choices=("text", "jsonl", "binary"))
+    fuzz.add_argument("--audit-max-bytes", type=int, default=64 << 20)
+    fuzz.set_defaults(handler=cmd_fuzz)
+
+    replay = commands.add_parser("replay", help="Replay a recorded request sequence, optionally minimizing it")
+    replay.add_argument("sequence", help="Crash reproducer from a fuzz campaign, or a binary fuzz audit log")
+    replay.add_argument("--host")
+    replay.add_argument("--port", type=int)
+    replay.add_argument("--unit-id", type=int, default=1)
+    replay.add_argument("--timeout", type=float, default=0.5)
+    replay.add_argument("--timing", action="store_true", help="Keep the original request timing (audit logs)")
+    replay.add_argument("--minimize", action="store_true", help="Reduce to a minimal crashing sequence")
+    replay.add_argument("--reset-command", help="Shell command that restores the target before each replay")
+    replay.add_argument("--output", help="Write the minimized sequence here")
+    replay.set_defaults(handler=cmd_replay)
+
+    monitor = commands.add_parser("monitor", help="Poll device registers")
+    monitor.add_argument("--host")
+    monitor.add_argument("--port", type=int)
+    monitor.add_argument("--addresses", type=int, nargs="+", default=[0, 1])
+    monitor.add_argument("--unit-id", type=int, default=1)
+    monitor.add_argument("--interval", type=float, default=1.0)
+    monitor.add_argument("--timeout", type=float, default=1.0)
+    monitor.add_argument("--duration", type=float, help="Stop after N seconds")
+    monitor.add_argument("--watch", action="store_true",
+                         help="Poll the devices listed in the config file and follow edits to it")
+    monitor.set_defaults(handler=cmd_monitor)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', force=True)
+    if args.metrics_port is not None:
+        from metrics import start_http_server
+        start_http_server(args.metrics_port)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,369 @@
 import yaml
-from dataclasses import dataclass
-from typing import Optional, Tuple
+import logging
+import os
+import sys
+import threading
+from dataclasses import MISSING, dataclass, fields, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# dataclass(slots=True) needs Python 3.10; older interpreters get plain frozen dataclasses
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+class ConfigError(ValueError):
+    """Raised when configuration values do not match the schema."""
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ModbusConfig:
     host: str
     port: int
-    timeout: int = 3
+    timeout: float = 3
     retries: int = 3
 
+    def validate(self) -> List[str]:
+        errors = []
+        if not self.host:
+            errors.append("host must not be empty")
+        if not 1 <= self.port <= 65535:
+            errors.append(f"port {self.port} is outside 1-65535")
+        if self.timeout <= 0:
+            errors.append("timeout must be positive")
+        if self.retries < 1:
+            errors.append("retries must be at least 1")
+        return errors
+
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class SignalConfig:
     sample_rate: int
     duration: float
     trigger_threshold: float
     noise_threshold: float
 
+    def validate(self) -> List[str]:
+        errors = []
+        if self.sample_rate <= 0:
+            errors.append("sample_rate must be positive")
+        if self.duration <= 0:
+            errors.append("duration must be positive")
+        if self.trigger_threshold < 0:
+            errors.append("trigger_threshold must not be negative")
+        if self.noise_threshold <= 0:
+            errors.append("noise_threshold must be positive")
+        return errors
 
-def load_config(config_path: str = 'config.yml') -> Tuple[ModbusConfig, SignalConfig]:
-    """Load configuration from YAML file."""
+
+@dataclass(frozen=True, **_SLOTS)
+class DeviceConfig:
+    name: str
+    host: str
+    port: int
+    unit_id: int = 1
+    addresses: Tuple[int, ...] = (0, 1)
+
+    def validate(self) -> List[str]:
+        errors = []
+        if not self.name:
+            errors.append("name must not be empty")
+        if not self.host:
+            errors.append("host must not be empty")
+        if not 1 <= self.port <= 65535:
+            errors.append(f"port {self.port} is outside 1-65535")
+        if not 0 <= self.unit_id <= 255:
+            errors.append(f"unit_id {self.unit_id} is outside 0-255")
+        if not self.addresses:
+            errors.append("addresses must not be empty")
+        if any(not 0 <= address <= 0xFFFF for address in self.addresses):
+            errors.append("addresses must be within 0-65535")
+        return errors
+
+
+@dataclass(frozen=True, **_SLOTS)
+class AppConfig:
+    modbus: ModbusConfig
+    signal: SignalConfig
+    devices: Tuple[DeviceConfig, ...] = ()
+
+    def validate(self) -> List[str]:
+        errors = [f"modbus: {error}" for error in self.modbus.validate()]
+        errors += [f"signal: {error}" for error in self.signal.validate()]
+        names = set()
+        for device in self.devices:
+            errors += [f"devices[{device.name}]: {error}" for error in device.validate()]
+            if device.name in names:
+                errors.append(f"devices: duplicate name {device.name!r}")
+            names.add(device.name)
+        return errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain YAML-serializable form, the inverse of ``parse_config``."""
+        data = {"modbus": _section_dict(self.modbus), "signal": _section_dict(self.signal)}
+        if self.devices:
+            data["devices"] = [_section_dict(device) for device in self.devices]
+        return data
+
+
+def _section_dict(section) -> Dict[str, Any]:
+    data = {}
+    for f in fields(section):
+        value = getattr(section, f.name)
+        data[f.name] = list(value) if isinstance(value, tuple) else value
+    return data
+
+
+def _coerce(value: Any, expected) -> Any:
+    """Check one YAML value against a field type; ints are accepted for floats."""
+    if isinstance(value, bool):
+        pass
+    elif expected is float and isinstance(value, (int, float)):
+        return float(value)
+    elif expected in (int, str) and isinstance(value, expected):
+        return value
+    elif expected == Tuple[int, ...] and isinstance(value, (list, tuple)) and \
+            all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+        return tuple(value)
+    name = "list of int" if expected == Tuple[int, ...] else expected.__name__
+    raise ConfigError(f"expected {name}, got {type(value).__name__}")
+
+
+def _build_section(cls, data: Any, path: str):
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a mapping, got {type(data).__name__}")
+    known = {f.name: f for f in fields(cls)}
+    errors = [f"{path}.{key}: unknown setting" for key in data if key not in known]
+    values = {}
+    for name, f in known.items():
+        if name not in data:
+            if f.default is MISSING:
+                errors.append(f"{path}.{name}: missing")
+            continue
+        try:
+            values[name] = _coerce(data[name], f.type)
+        except ConfigError as e:
+            errors.append(f"{path}.{name}: {e}")
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return cls(**values)
+
+
+def parse_config(data: Any) -> AppConfig:
+    """Validate a parsed YAML document and build an ``AppConfig``."""
+    if not isinstance(data, dict):
+        raise ConfigError("configuration must be a mapping")
+    unknown = set(data) - {"modbus", "signal", "devices"}
+    if unknown:
+        raise ConfigError(f"unknown section(s): {', '.join(sorted(unknown))}")
+    devices = data.get("devices") or []
+    if not isinstance(devices, list):
+        raise ConfigError("devices: expected a list")
+    config = AppConfig(
+        modbus=_build_section(ModbusConfig, data.get("modbus"), "modbus"),
+        signal=_build_section(SignalConfig, data.get("signal"), "signal"),
+        devices=tuple(_build_section(DeviceConfig, device, f"devices[{i}]")
+                      for i, device in enumerate(devices)))
+    errors = config.validate()
+    if errors:
+        raise ConfigError("; ".join(errors))
+    return config
+
+
+def read_config(config_path: str) -> AppConfig:
+    """Parse and validate a configuration file without caching."""
     with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ConfigError(f"{config_path}: {e}") from e
+    try:
+        return parse_config(data)
+    except ConfigError as e:
+        raise ConfigError(f"{config_path}: {e}") from None
 
-    modbus_config = ModbusConfig(**config['modbus'])
-    signal_config = SignalConfig(**config['signal'])
-    return modbus_config, signal_config
\ No newline at end of file
+
+def write_config(config: AppConfig, config_path: str):
+    """Write a configuration atomically so watchers never see a partial file."""
+    temp_path = f"{config_path}.tmp"
+    with open(temp_path, 'w') as f:
+        yaml.safe_dump(config.to_dict(), f, sort_keys=False)
+    os.replace(temp_path, config_path)
+
+
+class ConfigService:
+    """Cached access to one configuration file with change notification.
+
+    ``get()`` only re-parses the file when its mtime or size changed. An
+    edit that fails validation is logged and the last good configuration is
+    kept. Only sections that changed on disk replace the current ones, so
+    in-memory ``update()`` calls to other sections survive a reload.
+    Subscribers are called with the new section (or the whole ``AppConfig``)
+    only when that section actually changed; ``start()`` polls the file from
+    a background thread so edits apply while running.
+    """
+
+    def __init__(self, path: str = 'config.yml', poll_interval: float = 1.0,
+                 defaults: Optional[AppConfig] = None):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.defaults = defaults
+        self._config: Optional[AppConfig] = None
+        # Last configuration parsed from the file, to tell which sections were edited on disk
+        self._file_config: Optional[AppConfig] = None
+        self._stamp = None
+        self._lock = threading.RLock()
+        self._subscribers: List[Tuple[Optional[str], Callable[[Any], None]]] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self) -> AppConfig:
+        """Current configuration, reloading the file first if it changed on disk."""
+        with self._lock:
+            old = self._config
+            new = self._reload()
+            config = self._config
+        if new is not None and old is not None:
+            self._notify(old, new)
+        return config
+
+    @property
+    def current(self) -> Optional[AppConfig]:
+        """Latest configuration held in memory, without checking the file."""
+        with self._lock:
+            return self._config
+
+    def _reload(self) -> Optional[AppConfig]:
+        """Re-read the file if its stamp changed; returns the new config, if any."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._config is None:
+                if self.defaults is None:
+                    raise
+                self._config = self.defaults
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        try:
+            config = read_config(self.path)
+        except (ConfigError, OSError) as e:
+            if self._config is None and self.defaults is None:
+                raise
+            logger.error(f"Keeping previous configuration: {e}")
+            self._config = self._config or self.defaults
+            return None
+        previous_file, self._file_config = self._file_config, config
+        if self._config is not None and previous_file is not None:
+            edited = {f.name: getattr(config, f.name) for f in fields(AppConfig)
+                      if getattr(config, f.name) != getattr(previous_file, f.name)}
+            config = replace(self._config, **edited)
+        if config == self._config:
+            return None
+        self._config = config
+        logger.info(f"Configuration loaded from {self.path}")
+        return config
+
+    def update(self, **sections) -> AppConfig:
+        """Replace whole sections in memory, e.g. ``update(signal=new_signal)``."""
+        self.get()
+        with self._lock:
+            old = self._config
+            new = replace(old, **sections)
+            errors = new.validate()
+            if errors:
+                raise ConfigError("; ".join(errors))
+            self._config = new
+        if new != old:
+            self._notify(old, new)
+        return new
+
+    def save(self, path: Optional[str] = None):
+        """Write the current configuration to ``path`` (default: the watched file)."""
+        path = path or self.path
+        self.get()
+        with self._lock:
+            write_config(self._config, path)
+            if os.path.abspath(path) == os.path.abspath(self.path):
+                # Our own write is not an external edit
+                stat = os.stat(path)
+                self._stamp = (stat.st_mtime_ns, stat.st_size)
+                self._file_config = self._config
+        logger.info(f"Configuration saved to {path}")
+
+    def subscribe(self, callback: Callable[[Any], None], section: Optional[str] = None) -> Callable[[], None]:
+        """Call ``callback`` on changes to ``section`` (or any change); returns an unsubscribe function."""
+        if section is not None and section not in {f.name for f in fields(AppConfig)}:
+            raise ValueError(f"Unknown configuration section: {section}")
+        entry = (section, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _notify(self, old: AppConfig, new: AppConfig):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for section, callback in subscribers:
+            if section is None:
+                value = new
+            elif getattr(old, section) != getattr(new, section):
+                value = getattr(new, section)
+            else:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                logger.error(f"Configuration subscriber failed: {e}")
+
+    @property
+    def watching(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Watch the file for edits from a background thread."""
+        if self.watching:
+            return
+        self.get()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching the file."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.get()
+            except OSError as e:
+                logger.error(f"Cannot read {self.path}: {e}")
+
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def config_service(config_path: str = 'config.yml') -> ConfigService:
+    """Shared service for a configuration file, one per path."""
+    key = os.path.abspath(config_path)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ConfigService(config_path)
+        return _services[key]
+
+
+def load_config(config_path: str = 'config.yml') -> Tuple[ModbusConfig, SignalConfig]:
+    """Load configuration from YAML file, cached until the file changes."""
+    config = config_service(config_path).get()
+    return config.modbus, config.signal
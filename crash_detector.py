@@ -0,0 +1,164 @@
+import numpy as np
+from collections import deque
+from dataclasses import dataclass
+import logging
+import math
+from typing import Callable, List, Optional
+from signal_processor import EMSignalProcessor, SignalAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CrashEvent:
+    sample_index: int
+    onset_index: int
+    timestamp: float
+    reason: str
+    rms: float
+    peak_to_peak: float
+    snr: float
+
+
+class SilentCrashDetector:
+    """Online silent-crash detector over sliding-window RMS, peak-to-peak and SNR.
+
+    A window is anomalous when its SNR drops below 0 dB (power under the
+    noise threshold), its RMS deviates from the baseline by more than the
+    trigger threshold, or its peak-to-peak amplitude deviates by more than
+    twice the trigger threshold. A crash event is raised once the condition
+    has held for ``dwell_time`` seconds.
+    """
+
+    def __init__(self, processor: EMSignalProcessor, window: float = 0.1,
+                 dwell_time: float = 0.05, baseline: Optional[SignalAnalysis] = None,
+                 on_event: Optional[Callable[[CrashEvent], None]] = None):
+        config = processor.config
+        self.processor = processor
+        self.sample_rate = config.sample_rate
+        self.window_size = max(int(window * config.sample_rate), 1)
+        self.dwell_samples = max(int(dwell_time * config.sample_rate), 1)
+        self.on_event = on_event
+
+        if baseline is None:
+            baseline = processor.analyze_stream(processor.generate_normal_chunks(65536))
+        self.baseline = baseline
+
+        # Precompute power bounds so the hot loop avoids sqrt/log10
+        trigger = config.trigger_threshold
+        self._noise_power = config.noise_threshold ** 2
+        self._power_low = max(float(baseline.rms) - trigger, 0.0) ** 2
+        self._power_high = (float(baseline.rms) + trigger) ** 2
+        self._p2p_low = float(baseline.peak_to_peak) - 2 * trigger
+        self._p2p_high = float(baseline.peak_to_peak) + 2 * trigger
+        self.reset()
+
+    def reset(self):
+        """Clear the sliding window and any in-progress crash state."""
+        self._ring = [0.0] * self.window_size
+        self._sum_sq = 0.0
+        self._min_queue = deque()
+        self._max_queue = deque()
+        self._index = 0
+        self._onset = None
+        self._reason = None
+        self.in_crash = False
+        self.events: List[CrashEvent] = []
+
+    @property
+    def rms(self) -> float:
+        return math.sqrt(max(self._sum_sq, 0.0) / self.window_size)
+
+    @property
+    def peak_to_peak(self) -> float:
+        if not self._max_queue:
+            return 0.0
+        return self._max_queue[0][1] - self._min_queue[0][1]
+
+    @property
+    def snr(self) -> float:
+        power = max(self._sum_sq, 0.0) / self.window_size
+        if power == 0.0:
+            return -np.inf
+        return 10 * math.log10(power / self._noise_power)
+
+    def process(self, chunk: np.ndarray) -> List[CrashEvent]:
+        """Feed a chunk of samples and return any crash events it raised."""
+        ring = self._ring
+        window = self.window_size
+        min_queue = self._min_queue
+        max_queue = self._max_queue
+        noise_power = self._noise_power
+        power_low, power_high = self._power_low, self._power_high
+        p2p_low, p2p_high = self._p2p_low, self._p2p_high
+        sum_sq = self._sum_sq
+        index = self._index
+        pos = index % window
+        new_events = []
+
+        for x in np.asarray(chunk, dtype=np.float64).ravel().tolist():
+            old = ring[pos]
+            ring[pos] = x
+            sum_sq += x * x - old * old
+
+            while min_queue and min_queue[-1][1] >= x:
+                min_queue.pop()
+            min_queue.append((index, x))
+            if min_queue[0][0] <= index - window:
+                min_queue.popleft()
+
+            while max_queue and max_queue[-1][1] <= x:
+                max_queue.pop()
+            max_queue.append((index, x))
+            if max_queue[0][0] <= index - window:
+                max_queue.popleft()
+
+            pos += 1
+            if pos == window:
+                pos = 0
+                # Resynchronise the running sum once per window to bound drift
+                sum_sq = math.fsum(v * v for v in ring)
+
+            if index + 1 >= window:
+                power = sum_sq / window
+                p2p = max_queue[0][1] - min_queue[0][1]
+                if power < noise_power:
+                    reason = "flatline"
+                elif power < power_low or power > power_high:
+                    reason = "rms_deviation"
+                elif p2p < p2p_low or p2p > p2p_high:
+                    reason = "amplitude_deviation"
+                else:
+                    reason = None
+
+                if reason is None:
+                    if self.in_crash:
+                        logger.info(f"Signal recovered at sample {index}")
+                    self._onset = None
+                    self.in_crash = False
+                else:
+                    if self._onset is None:
+                        self._onset = index
+                        self._reason = reason
+                    if not self.in_crash and index - self._onset + 1 >= self.dwell_samples:
+                        self.in_crash = True
+                        self._sum_sq = sum_sq
+                        event = CrashEvent(
+                            sample_index=index,
+                            onset_index=self._onset,
+                            timestamp=index / self.sample_rate,
+                            reason=self._reason,
+                            rms=math.sqrt(max(power, 0.0)),
+                            peak_to_peak=p2p,
+                            snr=self.snr
+                        )
+                        new_events.append(event)
+                        logger.warning(f"Silent crash detected at {event.timestamp:.4f}s ({event.reason})")
+                        if self.on_event:
+                            self.on_event(event)
+            index += 1
+
+        self._sum_sq = sum_sq
+        self._index = index
+        self.events.extend(new_events)
+        return new_events
@@ -0,0 +1,239 @@
+import numpy as np
+from dataclasses import dataclass
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import SignalConfig
+from signal_processor import DEFAULT_BANDS, EMSignalProcessor, SpectralAnalyzer, segment_view
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_FEATURES = ("positive_mean", "negative_mean", "peak_to_peak", "rms", "snr")
+SPECTRAL_FEATURES = ("dominant_frequency", "spectral_flatness")
+METHOD_MAHALANOBIS = "mahalanobis"
+METHOD_NEAREST = "nearest"
+
+
+def feature_names(bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS) -> Tuple[str, ...]:
+    """Column names of a fingerprint matrix."""
+    band_names = tuple(f"log_band_{low:g}_{high:g}hz" for low, high in bands)
+    return ANALYSIS_FEATURES + band_names + SPECTRAL_FEATURES
+
+
+class FingerprintExtractor:
+    """Turn fixed-length EM windows into compact feature vectors.
+
+    Each row holds the SignalAnalysis fields, log10 band powers, dominant
+    frequency and spectral flatness of one window. Thresholded means of
+    windows with no samples beyond the trigger threshold are reported as 0.
+
+    By default the Welch segment length is chosen so the narrowest band
+    spans at least two frequency bins; a band that still holds no non-DC
+    bin (window too short, or ``nperseg`` too small) raises ValueError.
+    """
+
+    def __init__(self, config: SignalConfig, window: float = 0.5, step: Optional[float] = None,
+                 nperseg: Optional[int] = None, bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS):
+        self.config = config
+        self.window_size = max(int(window * config.sample_rate), 2)
+        self.step_size = self.window_size if step is None else max(int(step * config.sample_rate), 1)
+        self.processor = EMSignalProcessor(config)
+        if nperseg is None:
+            narrowest = min(high - low for low, high in bands)
+            nperseg = 1 << int(np.ceil(np.log2(max(2 * config.sample_rate / narrowest, 2))))
+        nperseg = min(nperseg, self.window_size)
+        frequencies = np.fft.rfftfreq(nperseg, 1 / config.sample_rate)[1:]
+        for low, high in bands:
+            if not np.any((frequencies >= low) & (frequencies < high)):
+                raise ValueError(f"Band {low:g}-{high:g} Hz is narrower than the "
+                                 f"{config.sample_rate / nperseg:g} Hz frequency resolution; "
+                                 f"use a longer window or wider bands")
+        self.spectral = SpectralAnalyzer(config.sample_rate, nperseg, bands=bands)
+        self.names = feature_names(bands)
+
+    def windows(self, signal: np.ndarray) -> np.ndarray:
+        """Split a 1-D signal into (n_windows, window_size) strided windows (no copy)."""
+        signal = np.asarray(signal, dtype=np.float64)
+        if signal.size < self.window_size:
+            return np.empty((0, self.window_size))
+        return segment_view(signal, self.window_size, self.window_size - self.step_size)
+
+    def extract(self, windows: np.ndarray) -> np.ndarray:
+        """Fingerprint an (n_windows, window_size) array into (n_windows, n_features)."""
+        windows = np.asarray(windows, dtype=np.float64)
+        if windows.ndim != 2 or windows.shape[1] != self.window_size:
+            raise ValueError(f"Expected (n, {self.window_size}) windows, got shape {windows.shape}")
+        if windows.shape[0] == 0:
+            return np.empty((0, len(self.names)))
+
+        analysis = self.processor.analyze_batch(windows).as_array()
+        spectral = self.spectral.analyze(windows)
+        tiny = np.finfo(float).tiny
+        features = np.column_stack([
+            analysis,
+            np.log10(spectral.band_powers + tiny),
+            spectral.dominant_frequency,
+            spectral.spectral_flatness,
+        ])
+        # Empty thresholded means (NaN) and silent windows (-inf SNR) get finite values
+        return np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=np.log10(tiny))
+
+    def extract_signal(self, signal: np.ndarray) -> np.ndarray:
+        """Window and fingerprint a 1-D signal."""
+        return self.extract(self.windows(signal))
+
+
+@dataclass
+class Baseline:
+    """Known-good fingerprint statistics of one device."""
+    mean: np.ndarray
+    scale: np.ndarray
+    precision: np.ndarray
+    threshold: float
+    count: int
+    reference: np.ndarray
+
+    def standardize(self, fingerprints: np.ndarray) -> np.ndarray:
+        return (fingerprints - self.mean) / self.scale
+
+    def mahalanobis(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Squared Mahalanobis distance of each fingerprint from the baseline."""
+        z = self.standardize(fingerprints)
+        return np.einsum('ij,jk,ik->i', z, self.precision, z)
+
+    def nearest(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Squared standardized distance to the nearest reference fingerprint."""
+        z = self.standardize(fingerprints)
+        reference = self.reference
+        distances = np.einsum('ij,ij->i', z, z)[:, None] - 2 * z @ reference.T \
+            + np.einsum('ij,ij->i', reference, reference)[None, :]
+        return np.maximum(distances.min(axis=1), 0.0)
+
+
+class FingerprintStore:
+    """Per-device baselines of known-good fingerprints with vectorized anomaly scoring.
+
+    Features are standardized per device; ``mahalanobis`` scoring uses the
+    (ridge-regularized) inverse correlation matrix, ``nearest`` the distance
+    to the closest of up to ``max_reference`` stored baseline fingerprints.
+    Each baseline's threshold is the ``quantile`` of its own training scores.
+    """
+
+    def __init__(self, extractor: FingerprintExtractor, quantile: float = 0.999,
+                 ridge: float = 1e-3, max_reference: int = 4096, seed: int = 0):
+        self.extractor = extractor
+        self.quantile = quantile
+        self.ridge = ridge
+        self.max_reference = max_reference
+        self.baselines: Dict[str, Baseline] = {}
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def devices(self) -> List[str]:
+        return sorted(self.baselines)
+
+    def fit(self, device: str, fingerprints: np.ndarray) -> Baseline:
+        """Build (or replace) a device baseline from known-good fingerprints."""
+        fingerprints = np.asarray(fingerprints, dtype=np.float64)
+        if fingerprints.shape[0] < 2:
+            raise ValueError(f"Need at least 2 fingerprints to fit a baseline for {device}")
+
+        mean = fingerprints.mean(axis=0)
+        std = fingerprints.std(axis=0)
+        # Features that never varied in the baseline still get a finite scale
+        scale = np.maximum(std, 1e-3 * np.abs(mean) + 1e-9)
+        z = (fingerprints - mean) / scale
+        correlation = z.T @ z / len(z)
+        precision = np.linalg.inv(correlation + self.ridge * np.eye(len(mean)))
+
+        reference = z
+        if len(reference) > self.max_reference:
+            reference = reference[self._rng.choice(len(reference), self.max_reference, replace=False)]
+        baseline = Baseline(mean=mean, scale=scale, precision=precision, threshold=0.0,
+                            count=len(fingerprints), reference=np.ascontiguousarray(reference))
+        baseline.threshold = float(np.quantile(baseline.mahalanobis(fingerprints), self.quantile))
+        self.baselines[device] = baseline
+        logger.info(f"Baseline for {device}: {len(fingerprints)} windows, threshold {baseline.threshold:.2f}")
+        return baseline
+
+    def fit_signal(self, device: str, signal: np.ndarray) -> Baseline:
+        """Build a device baseline from a known-good capture."""
+        return self.fit(device, self.extractor.extract_signal(signal))
+
+    def score(self, device: str, fingerprints: np.ndarray, method: str = METHOD_MAHALANOBIS) -> np.ndarray:
+        """Anomaly score of each fingerprint against a device baseline (higher is worse)."""
+        baseline = self.baselines.get(device)
+        if baseline is None:
+            raise KeyError(f"No baseline for device {device}")
+        fingerprints = np.asarray(fingerprints, dtype=np.float64)
+        if method == METHOD_MAHALANOBIS:
+            return baseline.mahalanobis(fingerprints)
+        if method == METHOD_NEAREST:
+            return baseline.nearest(fingerprints)
+        raise ValueError(f"Unknown scoring method {method!r}")
+
+    def score_signal(self, device: str, signal: np.ndarray) -> np.ndarray:
+        """Mahalanobis score of every window of a capture."""
+        return self.score(device, self.extractor.extract_signal(signal))
+
+    def anomalies(self, device: str, fingerprints: np.ndarray) -> np.ndarray:
+        """Boolean mask of fingerprints scoring above the device threshold."""
+        return self.score(device, fingerprints) > self.baselines[device].threshold
+
+    def save(self, path: str):
+        """Persist all baselines and extractor settings to an uncompressed .npz."""
+        devices = self.devices
+        baselines = [self.baselines[device] for device in devices]
+        extractor = self.extractor
+        config = extractor.config
+        sizes = [len(baseline.reference) for baseline in baselines]
+        n_features = len(extractor.names)
+        np.savez(
+            path,
+            devices=np.array(devices, dtype=str),
+            mean=np.array([b.mean for b in baselines]).reshape(-1, n_features),
+            scale=np.array([b.scale for b in baselines]).reshape(-1, n_features),
+            precision=np.array([b.precision for b in baselines]).reshape(-1, n_features, n_features),
+            threshold=np.array([b.threshold for b in baselines], dtype=np.float64),
+            count=np.array([b.count for b in baselines], dtype=np.int64),
+            reference=np.concatenate([b.reference for b in baselines]) if baselines
+            else np.empty((0, n_features)),
+            reference_offsets=np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+            signal_config=np.array([config.sample_rate, config.duration,
+                                    config.trigger_threshold, config.noise_threshold], dtype=np.float64),
+            extractor=np.array([extractor.window_size, extractor.step_size, extractor.spectral.nperseg],
+                               dtype=np.int64),
+            bands=np.array(extractor.spectral.bands, dtype=np.float64).reshape(-1, 2),
+            settings=np.array([self.quantile, self.ridge, self.max_reference], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FingerprintStore":
+        """Load a store written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            sample_rate, duration, trigger, noise = data["signal_config"].tolist()
+            config = SignalConfig(sample_rate=int(sample_rate), duration=duration,
+                                  trigger_threshold=trigger, noise_threshold=noise)
+            window_size, step_size, nperseg = data["extractor"].tolist()
+            extractor = FingerprintExtractor(config, window=window_size / sample_rate,
+                                             step=step_size / sample_rate, nperseg=nperseg,
+                                             bands=[tuple(band) for band in data["bands"].tolist()])
+            # Sample counts survive the seconds round-trip exactly
+            extractor.window_size, extractor.step_size = window_size, step_size
+            quantile, ridge, max_reference = data["settings"].tolist()
+            store = cls(extractor, quantile=quantile, ridge=ridge, max_reference=int(max_reference))
+
+            # Each data[...] access reads the whole array from the archive, so read them once
+            offsets = data["reference_offsets"]
+            reference = data["reference"]
+            means, scales, precisions = data["mean"], data["scale"], data["precision"]
+            thresholds, counts = data["threshold"], data["count"]
+            for index, device in enumerate(data["devices"].tolist()):
+                store.baselines[device] = Baseline(
+                    mean=means[index],
+                    scale=scales[index],
+                    precision=precisions[index],
+                    threshold=float(thresholds[index]),
+                    count=int(counts[index]),
+                    reference=reference[offsets[index]:offsets[index + 1]],
+                )
+        return store
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from config import DeviceConfig, ModbusConfig, SignalConfig
+from modbus_pool import AsyncModbusClientPool
+from ring_buffer import SignalRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MonitoredDevice:
+    name: str
+    host: str
+    port: int
+    addresses: List[int] = field(default_factory=lambda: [0, 1])
+    unit_id: int = 1
+
+    @classmethod
+    def from_config(cls, device: DeviceConfig) -> "MonitoredDevice":
+        return cls(name=device.name, host=device.host, port=device.port,
+                   addresses=list(device.addresses), unit_id=device.unit_id)
+
+
+class RegisterHistory:
+    """Fixed-size history of polled register values for one device."""
+
+    def __init__(self, n_registers: int, capacity: int):
+        self.capacity = capacity
+        self.times = np.full(capacity, np.nan)
+        self.values = np.full((capacity, n_registers), np.nan)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, row: List[Optional[int]]):
+        """Record one poll; unreadable registers are stored as NaN."""
+        with self._lock:
+            pos = self.count % self.capacity
+            self.times[pos] = timestamp
+            self.values[pos] = [np.nan if value is None else value for value in row]
+            self.count += 1
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (times, values) in chronological order."""
+        with self._lock:
+            if self.count <= self.capacity:
+                return self.times[:self.count].copy(), self.values[:self.count].copy()
+            pos = self.count % self.capacity
+            return (np.concatenate([self.times[pos:], self.times[:pos]]),
+                    np.concatenate([self.values[pos:], self.values[:pos]]))
+
+
+def synthetic_em_source(config: SignalConfig, chunk_size: int) -> Iterator[np.ndarray]:
+    """Endless normal-operation EM signal with continuous phase, standing in for a probe."""
+    start = 0
+    while True:
+        yield np.sin(2 * np.pi * 10 * np.arange(start, start + chunk_size) / config.sample_rate)
+        start += chunk_size
+
+
+class LivePoller:
+    """Background poller filling bounded register histories and an EM ring buffer.
+
+    Registers of every device are polled concurrently over persistent pooled
+    connections each ``interval`` seconds; EM samples are pulled from
+    ``signal_source`` at the matching real-time rate by a separate task, so
+    slow devices do not hold up the signal. The device list and
+    timeout can be changed while running without reconnecting to devices
+    that are still polled.
+    """
+
+    def __init__(self, devices: List[MonitoredDevice], interval: float = 0.1, history: int = 600,
+                 signal_config: Optional[SignalConfig] = None,
+                 signal_source: Optional[Iterator[np.ndarray]] = None, signal_seconds: float = 10.0,
+                 timeout: float = 1.0):
+        self.devices = devices
+        self.interval = interval
+        self.timeout = timeout
+        self.history_size = history
+        self.histories: Dict[str, RegisterHistory] = {
+            device.name: RegisterHistory(len(device.addresses), history) for device in devices
+        }
+
+        self.signal_config = signal_config
+        self.signal_buffer = None
+        self._signal_source = signal_source
+        if signal_config is not None:
+            self.signal_buffer = SignalRingBuffer(int(signal_seconds * signal_config.sample_rate),
+                                                  signal_config.sample_rate)
+            if signal_source is None:
+                chunk = max(int(interval * signal_config.sample_rate), 1)
+                self._signal_source = synthetic_em_source(signal_config, chunk)
+
+        self.polls = 0
+        self.failures = 0
+        self._pools: Dict[Tuple[str, int], AsyncModbusClientPool] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start polling in a background thread."""
+        if self.running:
+            logger.warning("Live poller already running")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), daemon=True)
+        self._thread.start()
+        logger.info(f"Live poller started for {len(self.devices)} device(s)")
+
+    def stop(self):
+        """Stop polling and close all connections."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self._thread = None
+        logger.info("Live poller stopped")
+
+    def set_devices(self, devices: List[MonitoredDevice]):
+        """Change the polled devices; unchanged devices keep their history."""
+        current = {device.name: device for device in self.devices}
+        histories = {}
+        for device in devices:
+            if current.get(device.name) == device:
+                histories[device.name] = self.histories[device.name]
+            else:
+                histories[device.name] = RegisterHistory(len(device.addresses), self.history_size)
+        # Publish histories before the device list so readers always find an entry
+        self.histories = {**self.histories, **histories}
+        self.devices = list(devices)
+        self.histories = histories
+        logger.info(f"Live poller now polling {len(devices)} device(s)")
+
+    def set_timeout(self, timeout: float):
+        """Change the request timeout of open and future connections."""
+        self.timeout = timeout
+        for pool in list(self._pools.values()):
+            pool.apply_config(replace(pool.config, timeout=timeout))
+
+    async def _run(self):
+        pools = self._pools
+        feeder = None
+        if self._signal_source is not None:
+            feeder = asyncio.get_running_loop().create_task(self._feed_signal())
+        try:
+            next_tick = time.monotonic()
+            while not self._stop.is_set():
+                devices = self.devices
+                await asyncio.gather(*(self._poll(device, pools) for device in devices))
+                # Close connections to endpoints dropped from the device list
+                endpoints = {(device.host, device.port) for device in devices}
+                for key in [key for key in pools if key not in endpoints]:
+                    await pools.pop(key).close()
+
+                next_tick += self.interval
+                delay = next_tick - time.monotonic()
+                if delay < 0:
+                    # Fell behind: skip missed ticks rather than bursting
+                    next_tick = time.monotonic()
+                    delay = 0
+                await asyncio.sleep(delay)
+        finally:
+            if feeder is not None:
+                feeder.cancel()
+                await asyncio.gather(feeder, return_exceptions=True)
+            await asyncio.gather(*(pool.close() for pool in pools.values()), return_exceptions=True)
+            pools.clear()
+
+    async def _feed_signal(self):
+        # Runs beside the register polls so a slow device cannot stall EM ingest; paced by
+        # sample count, so chunks missed during a stall are written late rather than skipped
+        buffer = self.signal_buffer
+        start = time.monotonic()
+        written = 0
+        while not self._stop.is_set():
+            due = (time.monotonic() - start) * buffer.sample_rate
+            if due - written > buffer.capacity:
+                # Too far behind to keep every sample: resume at the newest buffer's worth
+                written = int(due) - buffer.capacity
+            while written <= due:
+                chunk = next(self._signal_source)
+                buffer.write(chunk)
+                written += len(chunk)
+            await asyncio.sleep(self.interval)
+
+    async def _poll(self, device: MonitoredDevice, pools: Dict[Tuple[str, int], AsyncModbusClientPool]):
+        key = (device.host, device.port)
+        if key not in pools:
+            pools[key] = AsyncModbusClientPool(ModbusConfig(host=device.host, port=device.port,
+                                                            timeout=self.timeout, retries=1))
+        values = await pools[key].read_many(device.addresses, unit_id=device.unit_id)
+        row = [values[address] for address in device.addresses]
+        self.polls += 1
+        if all(value is None for value in row):
+            self.failures += 1
+        history = self.histories.get(device.name)
+        # The device may have been removed or re-addressed while this poll was in flight
+        if history is not None and history.values.shape[1] == len(row):
+            history.append(time.monotonic(), row)
@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import ModbusConfig
+from metrics import Counter
+from modbus_pool import AsyncModbusClientPool
+from modbus_protocol import ModbusError, decode_read_registers, read_holding_registers_pdu
+
+logger = logging.getLogger(__name__)
+
+STATE_UNKNOWN = "unknown"
+STATE_ALIVE = "alive"
+STATE_SLOW = "slow"
+STATE_FROZEN = "frozen"
+STATE_HUNG = "hung"
+STATE_DOWN = "down"
+STATES = (STATE_UNKNOWN, STATE_ALIVE, STATE_SLOW, STATE_FROZEN, STATE_HUNG, STATE_DOWN)
+
+# Log-spaced response-time buckets from 100 us to 10 s; the last bucket catches everything above
+LATENCY_BUCKETS = np.logspace(-4, 1, 21)
+
+PROBES = Counter("liveness_probes_total", "Heartbeat probes by outcome", ["outcome"])
+TRANSITIONS = Counter("liveness_transitions_total", "Device state transitions by new state", ["state"])
+
+
+@dataclass
+class ProbeTarget:
+    name: str
+    host: str
+    port: int
+    unit_id: int = 1
+    address: int = 0
+    count: int = 1
+    # Devices whose heartbeat registers legitimately never change cannot be classified frozen
+    expect_change: bool = True
+
+
+@dataclass
+class DeviceHealth:
+    """Bounded per-device probe history."""
+    state: str = STATE_UNKNOWN
+    since: float = 0.0
+    probes: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    changes: int = 0
+    change_rate: float = 0.0
+    last_success: Optional[float] = None
+    last_change: Optional[float] = None
+    last_values: Optional[List[int]] = None
+    connect_failed: bool = False
+    latency_counts: np.ndarray = field(default_factory=lambda: np.zeros(len(LATENCY_BUCKETS) + 1, dtype=np.int64))
+    # (receive time, latency) of the most recent responses
+    recent_latencies: deque = field(default_factory=lambda: deque(maxlen=64))
+
+    def latency_quantile(self, q: float, since: float = float("-inf")) -> float:
+        """Quantile of response times received after ``since`` (NaN if there are none)."""
+        latencies = sorted(latency for received, latency in self.recent_latencies if received >= since)
+        if not latencies:
+            return float("nan")
+        # Nearest-rank quantile; cheap enough to run for every device on every sweep
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+
+class LivenessProber:
+    """Supervise many Modbus devices with scheduled, pipelined heartbeat reads.
+
+    Every ``interval`` seconds each target gets one heartbeat read. All
+    targets behind one (host, port), e.g. unit IDs behind a gateway, share a
+    pipelined connection and are probed with a single write; connections are
+    staggered evenly across the interval. Devices are classified on every
+    sweep:
+
+      * ``down``: the TCP connection cannot be (re)established.
+      * ``hung``: connected, but no response for ``deadline`` seconds.
+      * ``frozen``: responding, but heartbeat registers unchanged for ``deadline`` seconds.
+      * ``slow``: p90 response time over the last ``deadline`` seconds above ``slow_threshold``.
+      * ``alive``: otherwise.
+
+    A failure is therefore reported at most ``deadline + interval`` seconds
+    after it starts.
+    """
+
+    def __init__(self, targets: List[ProbeTarget], interval: float = 0.5, deadline: float = 2.0,
+                 slow_threshold: float = 0.1, timeout: Optional[float] = None, max_in_flight: int = 256,
+                 on_transition: Optional[Callable[[ProbeTarget, str, str], None]] = None):
+        if deadline <= interval:
+            raise ValueError(f"deadline ({deadline}) must be longer than the probe interval ({interval})")
+        self.targets = targets
+        self.interval = interval
+        self.deadline = deadline
+        self.slow_threshold = slow_threshold
+        self.timeout = deadline if timeout is None else timeout
+        self.max_in_flight = max_in_flight
+        self.on_transition = on_transition
+        self.health: Dict[str, DeviceHealth] = {target.name: DeviceHealth() for target in targets}
+        self.started = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def states(self) -> Dict[str, str]:
+        return {name: health.state for name, health in self.health.items()}
+
+    def state_counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATES, 0)
+        for health in self.health.values():
+            counts[health.state] += 1
+        return counts
+
+    def start(self):
+        """Start probing in a background thread."""
+        if self.running:
+            logger.warning("Liveness prober already running")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
+        logger.info(f"Liveness prober started for {len(self.targets)} device(s)")
+
+    def stop(self):
+        """Stop probing and close all connections."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 5.0)
+        self._thread = None
+
+    async def run(self, duration: Optional[float] = None):
+        """Probe until stop() is called or ``duration`` seconds have elapsed."""
+        self.started = time.monotonic()
+        for health in self.health.values():
+            health.since = self.started
+        groups: Dict[Tuple[str, int], List[ProbeTarget]] = {}
+        for target in self.targets:
+            groups.setdefault((target.host, target.port), []).append(target)
+
+        config = ModbusConfig(host="", port=0, timeout=self.timeout, retries=1)
+        async with AsyncModbusClientPool(config, max_in_flight=self.max_in_flight) as pool:
+            n = len(groups)
+            tasks = [asyncio.create_task(self._probe_loop(pool, host, port, group, self.interval * index / n))
+                     for index, ((host, port), group) in enumerate(groups.items())]
+            end = None if duration is None else self.started + duration
+            try:
+                while not self._stop.is_set() and (end is None or time.monotonic() < end):
+                    await asyncio.sleep(self.interval)
+                    self.classify()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _probe_loop(self, pool: AsyncModbusClientPool, host: str, port: int,
+                          group: List[ProbeTarget], offset: float):
+        """Heartbeat every target behind one (host, port) with a single write per interval."""
+        requests = [(target.unit_id, read_holding_registers_pdu(target.address, target.count))
+                    for target in group]
+        healths = [self.health[target.name] for target in group]
+        next_tick = time.monotonic() + offset
+        while True:
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0.0))
+            next_tick += self.interval
+            for health in healths:
+                health.probes += 1
+            try:
+                connection = await pool.connection(host, port)
+                futures = connection.send_batch(requests)
+            except (asyncio.TimeoutError, OSError):
+                for health in healths:
+                    health.connect_failed = True
+                    health.errors += 1
+                PROBES.labels("connect_error").inc(len(healths))
+                continue
+
+            sent = time.monotonic()
+            for health, future in zip(healths, futures):
+                health.connect_failed = False
+                # Responses are recorded as they arrive; a hung device holds at most
+                # timeout/interval requests in flight
+                future.add_done_callback(functools.partial(self._on_response, health, sent))
+
+    def _on_response(self, health: DeviceHealth, sent: float, future: asyncio.Future):
+        error = future.exception()
+        if isinstance(error, asyncio.TimeoutError):
+            health.timeouts += 1
+            PROBES.labels("timeout").inc()
+            return
+        if error is not None:
+            health.errors += 1
+            PROBES.labels("connection_error").inc()
+            return
+        now = time.monotonic()
+        try:
+            values = decode_read_registers(future.result())
+        except ModbusError:
+            # An exception response still proves the device is processing requests
+            values = health.last_values
+            PROBES.labels("exception").inc()
+        else:
+            PROBES.labels("response").inc()
+        self._record(health, now, now - sent, values)
+
+    @staticmethod
+    def _record(health: DeviceHealth, now: float, latency: float, values: Optional[List[int]]):
+        health.latency_counts[np.searchsorted(LATENCY_BUCKETS, latency)] += 1
+        health.recent_latencies.append((now, latency))
+
+        previous = health.last_success
+        changed = health.last_values is not None and values != health.last_values
+        if changed or health.last_change is None:
+            health.last_change = now
+        if changed:
+            health.changes += 1
+        if previous is not None and now > previous:
+            # Exponentially weighted changes/second with a ~10-probe horizon
+            health.change_rate += 0.1 * ((1.0 if changed else 0.0) / (now - previous) - health.change_rate)
+        health.last_values = values
+        health.last_success = now
+
+    def classify(self, now: Optional[float] = None) -> Dict[str, str]:
+        """Update and return every device's state."""
+        now = time.monotonic() if now is None else now
+        for target in self.targets:
+            health = self.health[target.name]
+            state = self._state(target, health, now)
+            if state != health.state:
+                old, health.state, health.since = health.state, state, now
+                TRANSITIONS.labels(state).inc()
+                logger.info(f"Device {target.name}: {old} -> {state}")
+                if self.on_transition is not None:
+                    self.on_transition(target, old, state)
+        return self.states()
+
+    def _state(self, target: ProbeTarget, health: DeviceHealth, now: float) -> str:
+        if health.connect_failed:
+            return STATE_DOWN
+        reference = self.started if health.last_success is None else health.last_success
+        if now - reference > self.deadline:
+            return STATE_HUNG
+        if health.last_success is None:
+            return STATE_UNKNOWN
+        if target.expect_change and now - health.last_change > self.deadline:
+            return STATE_FROZEN
+        if health.latency_quantile(0.9, now - self.deadline) > self.slow_threshold:
+            return STATE_SLOW
+        return STATE_ALIVE
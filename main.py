@@ -4,13 +4,18 @@
 # Email: {uwibambe, yanjunp, qinghual} @uark.edu
 # Published in: University of Arkansas
 
-from PyQt6.QtWidgets import QApplication
-from main_window import MainWindow
-
 import sys
 
 
 def main():
+    if len(sys.argv) > 1:
+        # Headless commands never import Qt or matplotlib
+        from cli import main as cli_main
+        sys.exit(cli_main())
+
+    from PyQt6.QtWidgets import QApplication
+    from main_window import MainWindow
+
     app = QApplication(sys.argv)
 
     app.setStyle("Fusion")
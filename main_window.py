@@ -1,11 +1,20 @@
+from PyQt6.QtCore import QThreadPool, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QSpinBox, QDoubleSpinBox,
-                             QStatusBar, QFileDialog)
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+                             QStatusBar, QFileDialog, QTabWidget)
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-from signal_processor import EMSignalProcessor
+import numpy as np
+import time
+from dataclasses import replace
+from typing import Optional
+from analysis_worker import AnalysisWorker
 from modbus_server import ModbusServerHandler
-from config import SignalConfig, ModbusConfig
+from config import AppConfig, ConfigError, ConfigService, ModbusConfig, SignalConfig
+from capture import CAPTURE_EXTENSION, CaptureWriter
+from plot_lod import EnvelopePyramid
+from live_monitor import LivePoller, MonitoredDevice
 
 
 class ModernButton(QPushButton):
@@ -73,7 +82,15 @@ class ParameterWidget(QWidget):
 
 
 class SignalPlotWidget(QWidget):
-    """Widget for displaying signal plots"""
+    """Widget for displaying signal plots
+
+    Signals are drawn as min/max envelopes decimated to the canvas pixel
+    width from a cached EnvelopePyramid. The Line2D objects are created
+    once and updated with set_data; when the axes limits are unchanged the
+    lines are blitted over a cached background instead of redrawing.
+    """
+
+    LABELS = ("Normal Signal", "Crash Signal")
 
     def __init__(self):
         super().__init__()
@@ -82,26 +99,169 @@ class SignalPlotWidget(QWidget):
         self.figure = Figure(figsize=(8, 4))
         self.canvas = FigureCanvas(self.figure)
         self.ax = self.figure.add_subplot(111)
+        self.toolbar = NavigationToolbar(self.canvas, self)
 
-        layout.addWidget(self.canvas)
-        self.setLayout(layout)
-
-    def plot_signals(self, time, normal_signal, crash_signal):
-        self.ax.clear()
-        self.ax.plot(time, normal_signal, label="Normal Signal", alpha=0.8)
-        self.ax.plot(time, crash_signal, label="Crash Signal", alpha=0.8)
+        self.lines = [self.ax.plot([], [], label=label, alpha=0.8, animated=True)[0]
+                      for label in self.LABELS]
+        self.pyramids = []
+        self._background = None
         self.ax.grid(True)
-        self.ax.legend()
+        self.ax.legend(loc="upper right")
         self.ax.set_title("EM Signal Comparison")
         self.ax.set_xlabel("Time (s)")
         self.ax.set_ylabel("Amplitude")
         self.figure.tight_layout()
-        self.canvas.draw()
+
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+
+        layout.addWidget(self.toolbar)
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+
+    def plot_signals(self, time, normal_signal, crash_signal):
+        pyramids = [EnvelopePyramid(time, signal) for signal in (normal_signal, crash_signal)]
+        low = min(float(np.min(normal_signal)), float(np.min(crash_signal)))
+        high = max(float(np.max(normal_signal)), float(np.max(crash_signal)))
+        margin = 0.05 * (high - low or 1.0)
+        self.show_pyramids(pyramids, (low - margin, high + margin))
+
+    def show_pyramids(self, pyramids, y_limits):
+        """Display prebuilt envelope pyramids, e.g. from a background worker."""
+        self.pyramids = pyramids
+        time = pyramids[0].time
+        x_limits = (float(time[0]), float(time[-1]))
+        y_limits = (float(y_limits[0]), float(y_limits[1]))
+
+        if self._background is not None and self.ax.get_xlim() == x_limits \
+                and self.ax.get_ylim() == y_limits:
+            # Same view: only the line data changed, so blit
+            self._update_lines()
+            self._blit()
+        else:
+            # set_xlim triggers _on_xlim_changed, which decimates for the new view
+            self.ax.set_ylim(*y_limits)
+            self.ax.set_xlim(*x_limits)
+            self.toolbar.update()
+            self.canvas.draw_idle()
+
+    def _update_lines(self):
+        """Decimate every signal to the visible range at the axes pixel width."""
+        t_start, t_stop = self.ax.get_xlim()
+        n_pixels = max(int(self.ax.bbox.width), 1)
+        for line, pyramid in zip(self.lines, self.pyramids):
+            line.set_data(*pyramid.envelope(t_start, t_stop, n_pixels))
+
+    def _on_xlim_changed(self, ax):
+        # Zoom and pan only re-decimate what is visible; the draw that follows
+        # the limit change repaints the background and the lines
+        if self.pyramids:
+            self._update_lines()
+
+    def _on_draw(self, event):
+        # Cache the background without the animated lines, then draw them into
+        # the same buffer; the canvas repaints it after the draw completes
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        self.canvas.blit(self.figure.bbox)
+
+
+class LiveDashboardWidget(QWidget):
+    """Timer-driven live view of polled registers and the EM signal
+
+    The view only reads the poller's bounded buffers; redraws are capped at
+    ``max_fps`` regardless of how fast the poller runs.
+    """
+
+    def __init__(self, max_fps=20, signal_window=2.0):
+        super().__init__()
+        layout = QVBoxLayout()
+
+        self.figure = Figure(figsize=(8, 4))
+        self.canvas = FigureCanvas(self.figure)
+        self.register_ax = self.figure.add_subplot(211)
+        self.signal_ax = self.figure.add_subplot(212)
+        self.register_ax.set_title("Modbus Registers")
+        self.register_ax.set_ylabel("Value")
+        self.register_ax.grid(True)
+        self.signal_ax.set_title("EM Signal")
+        self.signal_ax.set_xlabel("Time (s)")
+        self.signal_ax.set_ylabel("Amplitude")
+        self.signal_ax.grid(True)
+        self.signal_line, = self.signal_ax.plot([], [], alpha=0.8)
+        self.figure.tight_layout()
+
+        self.poller = None
+        self.register_lines = {}
+        self.signal_window = signal_window
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / max_fps))
+        self.timer.timeout.connect(self.refresh)
+
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+
+    def attach(self, poller):
+        """Start drawing from a running poller"""
+        self.poller = poller
+        for line in self.register_lines.values():
+            line.remove()
+        self.register_lines = {}
+        for device in poller.devices:
+            for address in device.addresses:
+                line, = self.register_ax.plot([], [], label=f"{device.name}[{address}]")
+                self.register_lines[(device.name, address)] = line
+        self.register_ax.legend(loc="upper left", fontsize=8)
+        self.timer.start()
+
+    def detach(self):
+        """Stop drawing; the last frame stays visible"""
+        self.timer.stop()
+        self.poller = None
+
+    def refresh(self):
+        if self.poller is None:
+            return
+        now = time.monotonic()
+        for device in self.poller.devices:
+            times, values = self.poller.histories[device.name].snapshot()
+            for column, address in enumerate(device.addresses):
+                self.register_lines[(device.name, address)].set_data(times - now, values[:, column])
+        self.register_ax.relim()
+        self.register_ax.autoscale_view()
+
+        buffer = self.poller.signal_buffer
+        if buffer is not None and buffer.total:
+            samples = buffer.latest(int(self.signal_window * buffer.sample_rate))
+            signal_time = (np.arange(samples.size) - samples.size) / buffer.sample_rate
+            pyramid = EnvelopePyramid(signal_time, samples)
+            self.signal_line.set_data(*pyramid.envelope(signal_time[0], signal_time[-1],
+                                                        self.signal_ax.bbox.width))
+            self.signal_ax.set_xlim(-self.signal_window, 0)
+            self.signal_ax.set_ylim(-1.2, 1.2)
+        self.canvas.draw_idle()
+
+
+# Used when there is no config.yml next to the application
+DEFAULT_CONFIG = AppConfig(modbus=ModbusConfig(host="127.0.0.1", port=5020),
+                           signal=SignalConfig(sample_rate=1000, duration=1.0,
+                                               trigger_threshold=0.3, noise_threshold=0.1))
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Carries configuration changes from the file watcher thread to the GUI thread
+    config_changed = pyqtSignal(object)
+
+    def __init__(self, config_service: Optional[ConfigService] = None):
         super().__init__()
+        self.config_service = config_service or ConfigService("config.yml", defaults=DEFAULT_CONFIG)
+        self.config = self.config_service.get()
         self.setWindowTitle("EM Signal Analyzer")
         self.setMinimumSize(1000, 600)
 
@@ -127,13 +287,15 @@ class MainWindow(QMainWindow):
         control_layout.addWidget(title)
 
         # Add parameter inputs
-        self.sample_rate = ParameterWidget("Sample Rate (Hz)", 100, 10000, 1000, 100)
-        self.duration = ParameterWidget("Duration (s)", 0.1, 10.0, 1.0, 0.1, True)
-        self.trigger = ParameterWidget("Trigger Threshold", 0.1, 1.0, 0.3, 0.1, True)
-        self.noise = ParameterWidget("Noise Threshold", 0.01, 0.5, 0.1, 0.01, True)
+        signal = self.config.signal
+        self.sample_rate = ParameterWidget("Sample Rate (Hz)", 100, 1000000, signal.sample_rate, 100)
+        self.duration = ParameterWidget("Duration (s)", 0.1, 60.0, signal.duration, 0.1, True)
+        self.trigger = ParameterWidget("Trigger Threshold", 0.1, 1.0, signal.trigger_threshold, 0.1, True)
+        self.noise = ParameterWidget("Noise Threshold", 0.01, 0.5, signal.noise_threshold, 0.01, True)
 
         for widget in [self.sample_rate, self.duration, self.trigger, self.noise]:
             control_layout.addWidget(widget)
+            widget.spinner.valueChanged.connect(self._on_parameters_changed)
 
         # Add Modbus settings
         modbus_title = QLabel("Modbus Settings")
@@ -145,20 +307,29 @@ class MainWindow(QMainWindow):
         """)
         control_layout.addWidget(modbus_title)
 
-        self.port = ParameterWidget("Port", 1024, 65535, 5020, 1)
+        # Applied when the server or monitor starts, not on every step of the spin box
+        self.port = ParameterWidget("Port", 1024, 65535, self.config.modbus.port, 1)
         control_layout.addWidget(self.port)
 
         # Add control buttons
         self.analyze_button = ModernButton("Analyze Signals")
         self.analyze_button.clicked.connect(self.analyze_signals)
 
+        self.cancel_button = ModernButton("Cancel Analysis")
+        self.cancel_button.clicked.connect(self.cancel_analysis)
+        self.cancel_button.setEnabled(False)
+
         self.start_server_button = ModernButton("Start Modbus Server")
         self.start_server_button.clicked.connect(self.toggle_server)
 
+        self.monitor_button = ModernButton("Start Live Monitor")
+        self.monitor_button.clicked.connect(self.toggle_monitor)
+
         self.save_button = ModernButton("Save Results")
         self.save_button.clicked.connect(self.save_results)
 
-        for button in [self.analyze_button, self.start_server_button, self.save_button]:
+        for button in [self.analyze_button, self.cancel_button, self.start_server_button,
+                       self.monitor_button, self.save_button]:
             control_layout.addWidget(button)
 
         control_layout.addStretch()
@@ -167,9 +338,13 @@ class MainWindow(QMainWindow):
         content_area = QWidget()
         content_layout = QVBoxLayout(content_area)
 
-        # Add plot widget
+        # Add plot widget and live dashboard as tabs
         self.plot_widget = SignalPlotWidget()
-        content_layout.addWidget(self.plot_widget)
+        self.dashboard = LiveDashboardWidget()
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.plot_widget, "Analysis")
+        self.tabs.addTab(self.dashboard, "Live Monitor")
+        content_layout.addWidget(self.tabs)
 
         # Add results display
         self.results_label = QLabel()
@@ -180,6 +355,8 @@ class MainWindow(QMainWindow):
             background-color: #F5F5F5;
             border-radius: 4px;
         """)
+        # Placeholder text reserves the label's height so results don't resize the plot
+        self.results_label.setText(self._format_results(None, None))
         content_layout.addWidget(self.results_label)
 
         # Add status bar
@@ -190,66 +367,193 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(control_panel)
         main_layout.addWidget(content_area, stretch=1)
 
-        # Initialize server state
+        # Initialize server and monitor state
         self.server_handler = None
         self.server_running = False
-
-    def analyze_signals(self):
-        """Analyze signals with current parameters"""
+        self.poller = None
+
+        # Last analysis result, kept for saving as a capture
+        self.last_result = None
+
+        # Background analysis: newest request wins, parameter edits are debounced
+        self.thread_pool = QThreadPool.globalInstance()
+        self.active_worker = None
+        self.request_id = 0
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(300)
+        self.debounce_timer.timeout.connect(self.analyze_signals)
+
+        # Parameter edits and edits to the file both arrive through the service
+        self.config_changed.connect(self._apply_config)
+        self._unsubscribe = self.config_service.subscribe(self.config_changed.emit)
+        self.config_service.start()
+
+    def _on_parameters_changed(self):
         try:
-            # Create configuration
-            signal_config = SignalConfig(
+            self.config_service.update(signal=SignalConfig(
                 sample_rate=self.sample_rate.value(),
                 duration=self.duration.value(),
                 trigger_threshold=self.trigger.value(),
                 noise_threshold=self.noise.value()
-            )
-
-            # Initialize processor
-            processor = EMSignalProcessor(signal_config)
-
-            # Generate signals
-            normal_signal = processor.generate_normal_signal()
-            crash_signal = processor.generate_crash_signal()
+            ))
+        except ConfigError as e:
+            self.status_bar.showMessage(f"Invalid parameters: {e}", 5000)
+
+    def _commit_port(self):
+        """Apply the Port spin box to the configuration"""
+        if self.port.value() != self.config.modbus.port:
+            self.config_service.update(modbus=replace(self.config.modbus, port=self.port.value()))
+
+    def _apply_config(self, config):
+        """Bring widgets, server and monitor in line with a new configuration"""
+        # Reloads are queued from the watcher thread and may arrive after a newer
+        # GUI update; always apply the latest configuration instead of the snapshot
+        config = self.config_service.current or config
+        if config == self.config:
+            return
+        old, self.config = self.config, config
+        widgets = []
+        if config.signal != old.signal:
+            widgets += [(self.sample_rate, config.signal.sample_rate),
+                        (self.duration, config.signal.duration),
+                        (self.trigger, config.signal.trigger_threshold),
+                        (self.noise, config.signal.noise_threshold)]
+        if config.modbus != old.modbus:
+            # Leaves an unapplied Port edit alone unless the Modbus settings changed
+            widgets.append((self.port, config.modbus.port))
+        for widget, value in widgets:
+            widget.spinner.blockSignals(True)
+            widget.spinner.setValue(value)
+            widget.spinner.blockSignals(False)
+
+        if self.server_handler and config.modbus != old.modbus:
+            try:
+                self.server_handler.apply_config(config.modbus)
+            except Exception as e:
+                # Rebinding failed after the old listener was closed
+                if self.server_running:
+                    self.server_handler.stop()
+                    self._show_server_stopped()
+                self.status_bar.showMessage(f"Server error: {str(e)}", 5000)
 
-            # Analyze signals
-            normal_analysis = processor.analyze_signal(normal_signal)
-            crash_analysis = processor.analyze_signal(crash_signal)
+        if self.poller:
+            devices = self._monitored_devices(config)
+            if devices != self.poller.devices:
+                self.poller.set_devices(devices)
+                self.dashboard.attach(self.poller)
+            if config.modbus.timeout != self.poller.timeout:
+                self.poller.set_timeout(config.modbus.timeout)
 
-            # Update plot
-            self.plot_widget.plot_signals(processor.time, normal_signal, crash_signal)
+        if config.signal != old.signal:
+            self._schedule_analysis()
 
-            # Update results display
-            results_text = f"""
-            Normal Signal Analysis:
-            - RMS: {normal_analysis.rms:.3f}
-            - SNR: {normal_analysis.snr:.3f} dB
-            - Peak-to-Peak: {normal_analysis.peak_to_peak:.3f}
+    @staticmethod
+    def _monitored_devices(config):
+        """Devices listed in the configuration, or the configured Modbus endpoint"""
+        if config.devices:
+            return [MonitoredDevice.from_config(device) for device in config.devices]
+        return [MonitoredDevice(name="device", host=config.modbus.host, port=config.modbus.port)]
 
-            Crash Signal Analysis:
-            - RMS: {crash_analysis.rms:.3f}
-            - SNR: {crash_analysis.snr:.3f} dB
-            - Peak-to-Peak: {crash_analysis.peak_to_peak:.3f}
-            """
-            self.results_label.setText(results_text)
-
-            self.status_bar.showMessage("Analysis completed successfully", 3000)
+    def analyze_signals(self):
+        """Analyze signals with current parameters on a background worker"""
+        try:
+            signal_config = self.config.signal
+
+            # Supersede any analysis still in flight
+            self.debounce_timer.stop()
+            if self.active_worker:
+                self.active_worker.cancel()
+            self.request_id += 1
+
+            worker = AnalysisWorker(self.request_id, signal_config)
+            worker.signals.progress.connect(self._on_analysis_progress)
+            worker.signals.partial.connect(self._on_analysis_partial)
+            worker.signals.finished.connect(self._on_analysis_finished)
+            worker.signals.cancelled.connect(self._on_analysis_cancelled)
+            worker.signals.error.connect(self._on_analysis_error)
+            self.active_worker = worker
+            self.cancel_button.setEnabled(True)
+            self.thread_pool.start(worker)
+            self.status_bar.showMessage("Analyzing...")
 
         except Exception as e:
             self.status_bar.showMessage(f"Error: {str(e)}", 5000)
 
+    def cancel_analysis(self):
+        """Cancel the analysis in flight, if any"""
+        self.debounce_timer.stop()
+        if self.active_worker:
+            self.active_worker.cancel()
+
+    def _schedule_analysis(self):
+        # Re-analyze on parameter edits only once something has been shown
+        if self.last_result is not None or self.active_worker:
+            self.debounce_timer.start()
+
+    def _is_current(self, request_id):
+        return self.active_worker is not None and request_id == self.request_id
+
+    def _on_analysis_progress(self, request_id, fraction):
+        if self._is_current(request_id):
+            self.status_bar.showMessage(f"Analyzing... {fraction:.0%}")
+
+    def _on_analysis_partial(self, request_id, analyses):
+        if self._is_current(request_id):
+            self.results_label.setText(self._format_results(*analyses, partial=True))
+
+    def _on_analysis_finished(self, request_id, result):
+        if not self._is_current(request_id):
+            return
+        self._finish_request()
+
+        # Update plot
+        self.plot_widget.show_pyramids(result.pyramids, result.y_limits)
+        self.last_result = result
+
+        # Update results display
+        self.results_label.setText(self._format_results(result.normal_analysis, result.crash_analysis))
+        self.status_bar.showMessage("Analysis completed successfully", 3000)
+
+    def _on_analysis_cancelled(self, request_id):
+        if self._is_current(request_id):
+            self._finish_request()
+            self.status_bar.showMessage("Analysis cancelled", 3000)
+
+    def _on_analysis_error(self, request_id, message):
+        if self._is_current(request_id):
+            self._finish_request()
+            self.status_bar.showMessage(f"Error: {message}", 5000)
+
+    def _finish_request(self):
+        self.active_worker = None
+        self.cancel_button.setEnabled(False)
+
+    @staticmethod
+    def _format_results(normal_analysis, crash_analysis, partial=False):
+        heading = " (partial)" if partial else ""
+
+        def metric(analysis, name, unit=""):
+            return "-" if analysis is None else f"{getattr(analysis, name):.3f}{unit}"
+
+        return f"""
+            Normal Signal Analysis{heading}:
+            - RMS: {metric(normal_analysis, "rms")}
+            - SNR: {metric(normal_analysis, "snr", " dB")}
+            - Peak-to-Peak: {metric(normal_analysis, "peak_to_peak")}
+
+            Crash Signal Analysis{heading}:
+            - RMS: {metric(crash_analysis, "rms")}
+            - SNR: {metric(crash_analysis, "snr", " dB")}
+            - Peak-to-Peak: {metric(crash_analysis, "peak_to_peak")}
+            """
+
     def toggle_server(self):
         """Start or stop the Modbus server"""
         if not self.server_running:
             try:
-                modbus_config = ModbusConfig(
-                    host="127.0.0.1",
-                    port=self.port.value(),
-                    timeout=3,
-                    retries=3
-                )
-
-                self.server_handler = ModbusServerHandler(modbus_config)
+                self._commit_port()
+                self.server_handler = ModbusServerHandler(self.config.modbus)
                 self.server_handler.start()
 
                 self.server_running = True
@@ -270,13 +574,44 @@ class MainWindow(QMainWindow):
             try:
                 if self.server_handler:
                     self.server_handler.stop()
-                self.server_running = False
-                self.start_server_button.setText("Start Modbus Server")
-                self.start_server_button.setStyleSheet("")
+                self._show_server_stopped()
                 self.status_bar.showMessage("Modbus server stopped", 3000)
             except Exception as e:
                 self.status_bar.showMessage(f"Error stopping server: {str(e)}", 5000)
 
+    def _show_server_stopped(self):
+        self.server_running = False
+        self.start_server_button.setText("Start Modbus Server")
+        self.start_server_button.setStyleSheet("")
+
+    def toggle_monitor(self):
+        """Start or stop live polling of the Modbus device and EM signal"""
+        if self.poller is None:
+            try:
+                self._commit_port()
+                self.poller = LivePoller(self._monitored_devices(self.config),
+                                         signal_config=self.config.signal,
+                                         timeout=self.config.modbus.timeout)
+                self.poller.start()
+                self.dashboard.attach(self.poller)
+                self.tabs.setCurrentWidget(self.dashboard)
+                self.monitor_button.setText("Stop Live Monitor")
+                self.status_bar.showMessage("Live monitor started", 3000)
+            except Exception as e:
+                self.poller = None
+                self.status_bar.showMessage(f"Monitor error: {str(e)}", 5000)
+        else:
+            self.stop_monitor()
+            self.status_bar.showMessage("Live monitor stopped", 3000)
+
+    def stop_monitor(self):
+        """Stop the live poller and its dashboard"""
+        self.dashboard.detach()
+        if self.poller:
+            self.poller.stop()
+        self.poller = None
+        self.monitor_button.setText("Start Live Monitor")
+
     def save_results(self):
         """Save plot and results to file"""
         try:
@@ -284,10 +619,19 @@ class MainWindow(QMainWindow):
                 self,
                 "Save Results",
                 "",
-                "PNG Files (*.png);;All Files (*)"
+                f"PNG Files (*.png);;EM Capture (*{CAPTURE_EXTENSION});;All Files (*)"
             )
 
-            if file_path:
+            if file_path.endswith(CAPTURE_EXTENSION):
+                if self.last_result is None:
+                    self.status_bar.showMessage("Analyze signals before saving a capture", 5000)
+                    return
+                # Channel 0 is the normal signal, channel 1 the crash signal
+                result = self.last_result
+                with CaptureWriter(file_path, result.config.sample_rate, channels=2) as writer:
+                    writer.write(np.column_stack([result.normal_signal, result.crash_signal]))
+                self.status_bar.showMessage(f"Capture saved to {file_path}", 3000)
+            elif file_path:
                 self.plot_widget.figure.savefig(file_path)
                 self.status_bar.showMessage(f"Results saved to {file_path}", 3000)
         except Exception as e:
@@ -295,6 +639,10 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Clean up when closing the application"""
+        self._unsubscribe()
+        self.config_service.stop()
+        self.cancel_analysis()
+        self.stop_monitor()
         if self.server_handler:
             self.server_handler.stop()
         event.accept()
\ No newline at end of file
@@ -1,11 +1,17 @@
 from pyModbusTCP.client import ModbusClient
 import logging
 import time
-from typing import List, Optional
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Union
 from config import ModbusConfig
+from metrics import Counter, Histogram
+from modbus_protocol import plan_reads, plan_writes, scatter_reads
 
 logger = logging.getLogger(__name__)
 
+REQUEST_SECONDS = Histogram("modbus_client_request_seconds", "Modbus request round-trip time", ["operation"])
+RETRIES = Counter("modbus_client_retries_total", "Modbus request attempts after the first", ["operation"])
+FAILURES = Counter("modbus_client_failures_total", "Modbus requests that failed after all retries", ["operation"])
+
 
 class ModbusClientHandler:
     def __init__(self, config: ModbusConfig):
@@ -20,15 +26,20 @@ class ModbusClientHandler:
 
     def read_registers(self, address: int, count: int) -> Optional[List[int]]:
         """Read holding registers with retry logic."""
+        latency = REQUEST_SECONDS.labels("read")
         for attempt in range(self.config.retries):
+            if attempt:
+                RETRIES.labels("read").inc()
             try:
-                registers = self.client.read_holding_registers(address, count)
+                with latency.time():
+                    registers = self.client.read_holding_registers(address, count)
                 if registers is not None:
                     return registers
                 logger.warning(f"Read attempt {attempt + 1} failed")
             except Exception as e:
                 logger.error(f"Error reading registers: {str(e)}")
             time.sleep(0.1)
+        FAILURES.labels("read").inc()
         return None
 
     def write_register(self, address: int, value: int) -> bool:
@@ -37,12 +48,63 @@ class ModbusClientHandler:
             logger.error(f"Invalid value {value} for Modbus register")
             return False
 
+        latency = REQUEST_SECONDS.labels("write")
         for attempt in range(self.config.retries):
+            if attempt:
+                RETRIES.labels("write").inc()
             try:
-                if self.client.write_single_register(address, value):
+                with latency.time():
+                    written = self.client.write_single_register(address, value)
+                if written:
                     return True
                 logger.warning(f"Write attempt {attempt + 1} failed")
             except Exception as e:
                 logger.error(f"Error writing register: {str(e)}")
             time.sleep(0.1)
-        return False
\ No newline at end of file
+        FAILURES.labels("write").inc()
+        return False
+
+    def write_registers(self, address: int, values: Sequence[int]) -> bool:
+        """Write a contiguous block of registers with validation."""
+        if not all(0 <= value <= 65535 for value in values):
+            logger.error(f"Invalid values for Modbus registers at {address}")
+            return False
+
+        latency = REQUEST_SECONDS.labels("write_multiple")
+        for attempt in range(self.config.retries):
+            if attempt:
+                RETRIES.labels("write_multiple").inc()
+            try:
+                with latency.time():
+                    written = self.client.write_multiple_registers(address, list(values))
+                if written:
+                    return True
+                logger.warning(f"Write attempt {attempt + 1} failed")
+            except Exception as e:
+                logger.error(f"Error writing registers: {str(e)}")
+            time.sleep(0.1)
+        FAILURES.labels("write_multiple").inc()
+        return False
+
+    def read_many(self, addresses: Union[Mapping[Hashable, int], Iterable[int]],
+                  max_gap: int = 8) -> Dict[Hashable, Optional[int]]:
+        """Read arbitrary registers using the fewest contiguous requests.
+
+        Accepts a mapping of keys to addresses or a plain iterable of
+        addresses. Keys whose block could not be read map to None.
+        """
+        if not isinstance(addresses, Mapping):
+            addresses = {address: address for address in addresses}
+        blocks = plan_reads(addresses.values(), max_gap)
+        results = [self.read_registers(block.address, block.count) for block in blocks]
+        return scatter_reads(addresses, blocks, results)
+
+    def write_many(self, values: Mapping[int, int]) -> bool:
+        """Write arbitrary registers using the fewest contiguous requests."""
+        success = True
+        for block in plan_writes(values):
+            if len(block.values) == 1:
+                success &= self.write_register(block.address, block.values[0])
+            else:
+                success &= self.write_registers(block.address, block.values)
+        return success
\ No newline at end of file
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from config import ModbusConfig
+from modbus_protocol import (MBAP_HEADER_SIZE, ModbusError,
+                             WRITE_MULTIPLE_REGISTERS, WRITE_SINGLE_REGISTER,
+                             check_response, decode_header, decode_read_registers,
+                             encode_adu, plan_reads, plan_writes, read_holding_registers_pdu,
+                             scatter_reads, write_multiple_registers_pdu, write_single_register_pdu)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncModbusConnection:
+    """Persistent Modbus TCP connection with pipelined transactions."""
+
+    def __init__(self, host: str, port: int, timeout: float, max_in_flight: int = 64):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_tid = 0
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        """Open the TCP connection and start the response dispatcher."""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_responses())
+
+    async def request(self, unit_id: int, pdu: bytes) -> bytes:
+        """Send one request PDU and wait for its response PDU."""
+        if not self.connected:
+            raise ConnectionError(f"Not connected to {self.host}:{self.port}")
+
+        async with self._slots:
+            tid = self._next_tid
+            self._next_tid = (tid + 1) & 0xFFFF
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = future
+            try:
+                self._writer.write(encode_adu(tid, unit_id, pdu))
+                return await asyncio.wait_for(future, self.timeout)
+            finally:
+                self._release(tid, future)
+
+    def send_batch(self, requests: Sequence[Tuple[int, bytes]]) -> List[asyncio.Future]:
+        """Write several (unit_id, pdu) requests in a single send and return their response futures.
+
+        Futures resolve to the response PDU, or fail with TimeoutError after
+        the connection timeout or ConnectionError if the connection drops.
+        Batches bypass the ``max_in_flight`` limit.
+        """
+        if not self.connected:
+            raise ConnectionError(f"Not connected to {self.host}:{self.port}")
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        frames = []
+        pending = []
+        for unit_id, pdu in requests:
+            tid = self._next_tid
+            self._next_tid = (tid + 1) & 0xFFFF
+            future = loop.create_future()
+            self._pending[tid] = future
+            futures.append(future)
+            frames.append(encode_adu(tid, unit_id, pdu))
+            pending.append((tid, future))
+        self._writer.write(b"".join(frames))
+        loop.call_later(self.timeout, self._expire, pending)
+        return futures
+
+    def _release(self, tid: int, future: asyncio.Future):
+        # The TID may have wrapped around and been reused by a newer request
+        if self._pending.get(tid) is future:
+            del self._pending[tid]
+
+    def _expire(self, pending: List[Tuple[int, asyncio.Future]]):
+        for tid, future in pending:
+            self._release(tid, future)
+            if not future.done():
+                future.set_exception(asyncio.TimeoutError())
+
+    async def _read_responses(self):
+        """Dispatch responses to waiting requests by transaction ID."""
+        error = None
+        try:
+            while True:
+                header = await self._reader.readexactly(MBAP_HEADER_SIZE)
+                tid, _, length, _ = decode_header(header)
+                if length < 2:
+                    # No room for a function code; the stream is out of sync
+                    raise ConnectionError(f"Invalid MBAP length {length}")
+                pdu = await self._reader.readexactly(length - 1)
+                future = self._pending.pop(tid, None)
+                if future is not None and not future.done():
+                    future.set_result(pdu)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            error = e
+        except asyncio.CancelledError:
+            error = ConnectionError("Connection closed")
+        finally:
+            self._fail_pending(ConnectionError(f"Connection to {self.host}:{self.port} lost: {error}"))
+            if self._writer:
+                self._writer.close()
+
+    def _fail_pending(self, error: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self):
+        """Close the connection and fail any outstanding requests."""
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class AsyncModbusClientPool:
+    """Asyncio client pool keeping one persistent connection per (host, port)."""
+
+    def __init__(self, config: ModbusConfig, max_in_flight: int = 64,
+                 backoff: float = 0.1, max_backoff: float = 2.0):
+        self.config = config
+        self.max_in_flight = max_in_flight
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._connections: Dict[Tuple[str, int], AsyncModbusConnection] = {}
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+    def apply_config(self, config: ModbusConfig):
+        """Use new timeouts and retries without dropping open connections."""
+        self.config = config
+        for connection in self._connections.values():
+            connection.timeout = config.timeout
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def connection(self, host: str, port: int) -> AsyncModbusConnection:
+        """Return the shared connection to (host, port), connecting if needed."""
+        key = (host, port)
+        connection = self._connections.get(key)
+        if connection is not None and connection.connected:
+            return connection
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(key)
+            if connection is None or not connection.connected:
+                connection = AsyncModbusConnection(host, port, self.config.timeout,
+                                                   self.max_in_flight)
+                await connection.connect()
+                self._connections[key] = connection
+            return connection
+
+    async def execute(self, pdu: bytes, host: Optional[str] = None, port: Optional[int] = None,
+                      unit_id: int = 1) -> Optional[bytes]:
+        """Send a request PDU with retry logic and return the response PDU."""
+        host = host or self.config.host
+        port = port or self.config.port
+        for attempt in range(self.config.retries):
+            try:
+                connection = await self.connection(host, port)
+                return await connection.request(unit_id, pdu)
+            except asyncio.TimeoutError:
+                logger.warning(f"Request to {host}:{port} timed out (attempt {attempt + 1})")
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Connection error for {host}:{port} (attempt {attempt + 1}): {str(e)}")
+            if attempt + 1 < self.config.retries:
+                await asyncio.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+        return None
+
+    async def read_registers(self, address: int, count: int, host: Optional[str] = None,
+                             port: Optional[int] = None, unit_id: int = 1) -> Optional[List[int]]:
+        """Read holding registers with retry logic."""
+        pdu = await self.execute(read_holding_registers_pdu(address, count), host, port, unit_id)
+        if pdu is None:
+            return None
+        try:
+            return decode_read_registers(pdu)
+        except ModbusError as e:
+            logger.error(f"Error reading registers: {str(e)}")
+            return None
+
+    async def write_register(self, address: int, value: int, host: Optional[str] = None,
+                             port: Optional[int] = None, unit_id: int = 1) -> bool:
+        """Write to a single register with validation."""
+        if not (0 <= value <= 65535):
+            logger.error(f"Invalid value {value} for Modbus register")
+            return False
+        pdu = await self.execute(write_single_register_pdu(address, value), host, port, unit_id)
+        return self._check_write(pdu, WRITE_SINGLE_REGISTER)
+
+    async def write_registers(self, address: int, values: Sequence[int], host: Optional[str] = None,
+                              port: Optional[int] = None, unit_id: int = 1) -> bool:
+        """Write a contiguous block of registers."""
+        if not all(0 <= value <= 65535 for value in values):
+            logger.error(f"Invalid values for Modbus registers at {address}")
+            return False
+        pdu = await self.execute(write_multiple_registers_pdu(address, values), host, port, unit_id)
+        return self._check_write(pdu, WRITE_MULTIPLE_REGISTERS)
+
+    async def read_many(self, addresses: Union[Mapping[Hashable, int], Iterable[int]],
+                        host: Optional[str] = None, port: Optional[int] = None, unit_id: int = 1,
+                        max_gap: int = 8) -> Dict[Hashable, Optional[int]]:
+        """Read arbitrary registers with coalesced requests sent concurrently."""
+        if not isinstance(addresses, Mapping):
+            addresses = {address: address for address in addresses}
+        blocks = plan_reads(addresses.values(), max_gap)
+        results = await asyncio.gather(*(self.read_registers(block.address, block.count, host, port, unit_id)
+                                         for block in blocks))
+        return scatter_reads(addresses, blocks, results)
+
+    async def write_many(self, values: Mapping[int, int], host: Optional[str] = None,
+                         port: Optional[int] = None, unit_id: int = 1) -> bool:
+        """Write arbitrary registers with coalesced requests sent concurrently."""
+        results = await asyncio.gather(*(
+            self.write_register(block.address, block.values[0], host, port, unit_id)
+            if len(block.values) == 1 else
+            self.write_registers(block.address, block.values, host, port, unit_id)
+            for block in plan_writes(values)))
+        return all(results)
+
+    @staticmethod
+    def _check_write(pdu: Optional[bytes], function_code: int) -> bool:
+        if pdu is None:
+            return False
+        try:
+            check_response(pdu, function_code)
+            return True
+        except ModbusError as e:
+            logger.error(f"Error writing register: {str(e)}")
+        return False
+
+    async def close(self):
+        """Close every pooled connection."""
+        connections = list(self._connections.values())
+        self._connections.clear()
+        await asyncio.gather(*(c.close() for c in connections), return_exceptions=True)
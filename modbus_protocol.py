@@ -0,0 +1,154 @@
+import struct
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+# MBAP header: transaction id, protocol id, length, unit id
+MBAP_HEADER = struct.Struct('>HHHB')
+MBAP_HEADER_SIZE = MBAP_HEADER.size
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+# Protocol limits on registers per request
+MAX_READ_REGISTERS = 125
+MAX_WRITE_REGISTERS = 123
+
+EXCEPTION_NAMES = {
+    0x01: "Illegal function",
+    0x02: "Illegal data address",
+    0x03: "Illegal data value",
+    0x04: "Slave device failure",
+    0x06: "Slave device busy",
+}
+
+
+@dataclass
+class RegisterBlock:
+    address: int
+    count: int
+
+
+@dataclass
+class WriteBlock:
+    address: int
+    values: List[int]
+
+
+class ModbusError(Exception):
+    """Raised for malformed or unexpected Modbus responses."""
+
+
+class ModbusExceptionResponse(ModbusError):
+    """Raised when a device answers with a Modbus exception code."""
+
+    def __init__(self, function_code: int, exception_code: int):
+        self.function_code = function_code
+        self.exception_code = exception_code
+        name = EXCEPTION_NAMES.get(exception_code, "Unknown exception")
+        super().__init__(f"{name} (function 0x{function_code:02X}, code 0x{exception_code:02X})")
+
+
+def encode_adu(transaction_id: int, unit_id: int, pdu: bytes) -> bytes:
+    """Wrap a PDU in an MBAP header."""
+    return MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+
+
+def decode_header(header: bytes) -> Tuple[int, int, int, int]:
+    """Return (transaction_id, protocol_id, length, unit_id) from an MBAP header."""
+    return MBAP_HEADER.unpack(header)
+
+
+def read_holding_registers_pdu(address: int, count: int) -> bytes:
+    """Build a read holding registers request PDU."""
+    return struct.pack('>BHH', READ_HOLDING_REGISTERS, address, count)
+
+
+def write_single_register_pdu(address: int, value: int) -> bytes:
+    """Build a write single register request PDU."""
+    return struct.pack('>BHH', WRITE_SINGLE_REGISTER, address, value)
+
+
+def write_multiple_registers_pdu(address: int, values: Sequence[int]) -> bytes:
+    """Build a write multiple registers request PDU."""
+    count = len(values)
+    return struct.pack(f'>BHHB{count}H', WRITE_MULTIPLE_REGISTERS, address,
+                       count, 2 * count, *values)
+
+
+def check_response(pdu: bytes, function_code: int):
+    """Raise if a response PDU is an exception or does not match the request."""
+    if not pdu:
+        raise ModbusError("Empty response PDU")
+    if pdu[0] == function_code | 0x80:
+        raise ModbusExceptionResponse(function_code, pdu[1] if len(pdu) > 1 else 0)
+    if pdu[0] != function_code:
+        raise ModbusError(f"Unexpected function code 0x{pdu[0]:02X} in response")
+
+
+def decode_read_registers(pdu: bytes) -> List[int]:
+    """Decode the register values from a read holding registers response."""
+    check_response(pdu, READ_HOLDING_REGISTERS)
+    byte_count = pdu[1]
+    if byte_count % 2 or len(pdu) != byte_count + 2:
+        raise ModbusError(f"Bad byte count {byte_count} in read response")
+    return list(struct.unpack(f'>{byte_count // 2}H', pdu[2:]))
+
+
+def plan_reads(addresses: Iterable[int], max_gap: int = 0,
+               max_count: int = MAX_READ_REGISTERS) -> List[RegisterBlock]:
+    """Merge addresses into the fewest contiguous read requests.
+
+    Addresses up to ``max_gap`` registers apart share a block; the unused
+    registers in between are read and discarded.
+    """
+    blocks = []
+    for address in sorted(set(addresses)):
+        if blocks:
+            block = blocks[-1]
+            end = block.address + block.count
+            if address - end <= max_gap and address - block.address < max_count:
+                block.count = address - block.address + 1
+                continue
+        blocks.append(RegisterBlock(address, 1))
+    return blocks
+
+
+def plan_writes(values: Mapping[int, int], max_count: int = MAX_WRITE_REGISTERS) -> List[WriteBlock]:
+    """Merge register writes into the fewest contiguous write requests.
+
+    Gaps are never bridged, since that would overwrite registers the caller
+    did not ask to change.
+    """
+    blocks = []
+    for address in sorted(values):
+        if blocks:
+            block = blocks[-1]
+            if address == block.address + len(block.values) and len(block.values) < max_count:
+                block.values.append(values[address])
+                continue
+        blocks.append(WriteBlock(address, [values[address]]))
+    return blocks
+
+
+def scatter_reads(requested: Union[Mapping[Hashable, int], Iterable[int]], blocks: Sequence[RegisterBlock],
+                  results: Sequence[Optional[List[int]]]) -> Dict[Hashable, Optional[int]]:
+    """Map block read results back to the caller's keys.
+
+    ``requested`` is either a mapping of caller keys to addresses or a plain
+    iterable of addresses (used as their own keys). Keys whose block failed
+    map to None.
+    """
+    if not isinstance(requested, Mapping):
+        requested = {address: address for address in requested}
+
+    starts = [block.address for block in blocks]
+    values = {}
+    for key, address in requested.items():
+        # Blocks are sorted and disjoint, so bisect to the owning block
+        index = bisect_right(starts, address) - 1
+        registers = results[index]
+        offset = address - starts[index]
+        values[key] = registers[offset] if registers is not None and offset < len(registers) else None
+    return values
@@ -1,8 +1,6 @@
-from pyModbusTCP.server import DataBank, ModbusServer
-import threading
-import time
 import logging
 from config import ModbusConfig
+from modbus_simulator import ModbusSimulator
 
 logger = logging.getLogger(__name__)
 
@@ -10,43 +8,41 @@ logger = logging.getLogger(__name__)
 class ModbusServerHandler:
     def __init__(self, config: ModbusConfig):
         self.config = config
-        self.server = ModbusServer(
-            host=config.host,
-            port=config.port,
-            no_block=True
-        )
+        self.server = ModbusSimulator(host=config.host)
+        # Single device answering every unit ID, seeded with example data
+        self.device = self.server.add_device(config.port, name="server", initial={0: 123, 1: 456})
         self._running = False
-        self._thread = None
 
     def start(self):
-        """Start the Modbus server in a separate thread."""
+        """Start the Modbus server on a background event loop."""
         if self._running:
             logger.warning("Server already running")
             return
 
+        self.server.start()
         self._running = True
-        self._thread = threading.Thread(target=self._run_server)
-        self._thread.daemon = True
-        self._thread.start()
         logger.info("Modbus server started")
 
+    def apply_config(self, config: ModbusConfig):
+        """Adopt a new configuration, rebinding only if the host or port changed.
+
+        The device (and so its register contents) is carried over to the new
+        listener.
+        """
+        old, self.config = self.config, config
+        if (config.host, config.port) == (old.host, old.port):
+            return
+        running = self._running
+        if running:
+            self.stop()
+        self.server = ModbusSimulator(host=config.host)
+        self.server.devices[(config.port, None)] = self.device
+        if running:
+            self.start()
+        logger.info(f"Modbus server moved to {config.host}:{config.port}")
+
     def stop(self):
         """Stop the Modbus server gracefully."""
         self._running = False
-        if self._thread:
-            self._thread.join(timeout=5.0)
         self.server.stop()
         logger.info("Modbus server stopped")
-
-    def _run_server(self):
-        """Main server loop."""
-        self.server.start()
-        while self._running:
-            try:
-                # Update registers with some example data
-                DataBank.set_words(0, [123, 456])
-                time.sleep(1.0)
-            except Exception as e:
-                logger.error(f"Server error: {str(e)}")
-                break
-        self.server.stop()
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import struct
+import threading
+from collections import Counter
+from dataclasses import dataclass
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from metrics import Counter as MetricCounter, Histogram
+from modbus_protocol import (MAX_READ_REGISTERS, MAX_WRITE_REGISTERS, MBAP_HEADER, MBAP_HEADER_SIZE,
+                             READ_HOLDING_REGISTERS, WRITE_MULTIPLE_REGISTERS, WRITE_SINGLE_REGISTER)
+
+logger = logging.getLogger(__name__)
+
+READ_INPUT_REGISTERS = 0x04
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+GATEWAY_TARGET_FAILED = 0x0B
+
+FAULT_NONE = "none"
+FAULT_HANG = "hang"
+FAULT_SILENT_CRASH = "silent_crash"
+FAULT_DELAY = "delay"
+FAULTS = (FAULT_NONE, FAULT_HANG, FAULT_SILENT_CRASH, FAULT_DELAY)
+
+SERVER_REQUESTS = MetricCounter("modbus_server_requests_total", "Requests handled by simulated devices",
+                                ["function"])
+SERVER_EXCEPTIONS = MetricCounter("modbus_server_exceptions_total", "Exception responses sent by simulated devices",
+                                  ["function"])
+SERVER_DROPPED = MetricCounter("modbus_server_dropped_total", "Requests left unanswered by hung devices")
+SERVER_REQUEST_SECONDS = Histogram("modbus_server_request_seconds", "Time to execute a request PDU",
+                                   buckets=(1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2))
+
+Dynamics = Callable[["VirtualDevice", float], None]
+
+
+@dataclass
+class FaultConfig:
+    mode: str = FAULT_NONE
+    delay: float = 0.0
+
+
+class VirtualDevice:
+    """Simulated Modbus device with an array-backed holding register map.
+
+    Faults:
+      * ``hang``: requests are accepted but never answered.
+      * ``silent_crash``: requests are answered, but dynamics stop and writes
+        are acknowledged without taking effect, so registers freeze.
+      * ``delay``: every response is held back by ``delay`` seconds.
+    """
+
+    def __init__(self, name: str, n_registers: int = 1024, initial: Optional[Dict[int, int]] = None):
+        self.name = name
+        self.registers = np.zeros(n_registers, dtype=np.uint16)
+        for address, value in (initial or {}).items():
+            self.registers[address] = value
+        self.dynamics: List[Dynamics] = []
+        self.fault = FaultConfig()
+        self.stats = Counter()
+
+    def inject_fault(self, mode: str, delay: float = 0.0):
+        """Switch the device into a fault mode."""
+        if mode not in FAULTS:
+            raise ValueError(f"Unknown fault mode {mode!r}, expected one of {FAULTS}")
+        self.fault = FaultConfig(mode, delay)
+        logger.info(f"Device {self.name}: fault {mode}")
+
+    def clear_fault(self):
+        """Return the device to normal operation."""
+        self.inject_fault(FAULT_NONE)
+
+    def tick(self, t: float):
+        """Advance scripted register dynamics to time ``t``."""
+        if self.fault.mode == FAULT_SILENT_CRASH:
+            return
+        for dynamics in self.dynamics:
+            dynamics(self, t)
+
+    def handle(self, pdu: bytes) -> bytes:
+        """Execute a request PDU and return the response PDU."""
+        self.stats["requests"] += 1
+        if not pdu:
+            return self._exception(0, ILLEGAL_FUNCTION)
+
+        function_code = pdu[0]
+        registers = self.registers
+        if function_code in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            if len(pdu) != 5:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            address, count = struct.unpack('>HH', pdu[1:5])
+            if not 1 <= count <= MAX_READ_REGISTERS:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            if address + count > registers.size:
+                return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+            self.stats["reads"] += 1
+            return bytes([function_code, 2 * count]) + registers[address:address + count].astype('>u2').tobytes()
+
+        if function_code == WRITE_SINGLE_REGISTER:
+            if len(pdu) != 5:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            address, value = struct.unpack('>HH', pdu[1:5])
+            if address >= registers.size:
+                return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+            self.stats["writes"] += 1
+            if self.fault.mode != FAULT_SILENT_CRASH:
+                registers[address] = value
+            return pdu
+
+        if function_code == WRITE_MULTIPLE_REGISTERS:
+            if len(pdu) < 6:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            address, count, byte_count = struct.unpack('>HHB', pdu[1:6])
+            if not 1 <= count <= MAX_WRITE_REGISTERS or byte_count != 2 * count \
+                    or len(pdu) != 6 + byte_count:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            if address + count > registers.size:
+                return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+            self.stats["writes"] += 1
+            if self.fault.mode != FAULT_SILENT_CRASH:
+                registers[address:address + count] = np.frombuffer(pdu, dtype='>u2', count=count, offset=6)
+            return pdu[:5]
+
+        return self._exception(function_code, ILLEGAL_FUNCTION)
+
+    def _exception(self, function_code: int, code: int) -> bytes:
+        self.stats["exceptions"] += 1
+        return bytes([(function_code | 0x80) & 0xFF, code])
+
+
+def waveform_dynamics(address: int, waveform: np.ndarray, sample_rate: float,
+                      scale: float = 1000.0, offset: float = 32768.0) -> Dynamics:
+    """Drive a register from a waveform, e.g. EMSignalProcessor.generate_normal_signal()."""
+    values = np.clip(np.asarray(waveform) * scale + offset, 0, 65535).astype(np.uint16)
+
+    def update(device: VirtualDevice, t: float):
+        device.registers[address] = values[int(t * sample_rate) % values.size]
+    return update
+
+
+def counter_dynamics(address: int, step: int = 1) -> Dynamics:
+    """Increment a register on every tick, like a heartbeat counter."""
+    def update(device: VirtualDevice, t: float):
+        device.registers[address] = (int(device.registers[address]) + step) & 0xFFFF
+    return update
+
+
+class ModbusSimulator:
+    """Event-driven Modbus TCP simulator hosting many virtual devices in one process.
+
+    Devices are addressed by (port, unit_id); a device registered with
+    ``unit_id=None`` answers every unit ID on its port.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", tick_interval: float = 0.1):
+        self.host = host
+        self.tick_interval = tick_interval
+        self.devices: Dict[Tuple[int, Optional[int]], VirtualDevice] = {}
+        self._loop = None
+        self._servers = []
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def add_device(self, port: int, unit_id: Optional[int] = None, name: Optional[str] = None,
+                   n_registers: int = 1024, initial: Optional[Dict[int, int]] = None) -> VirtualDevice:
+        """Register a virtual device; call before start()."""
+        name = name or f"{port}/{'*' if unit_id is None else unit_id}"
+        device = VirtualDevice(name, n_registers, initial)
+        self.devices[(port, unit_id)] = device
+        return device
+
+    def device_stats(self) -> Dict[str, Counter]:
+        """Per-device request counters."""
+        return {device.name: device.stats.copy() for device in self.devices.values()}
+
+    @property
+    def ports(self) -> List[int]:
+        return sorted({port for port, _ in self.devices})
+
+    def start(self):
+        """Serve all devices from a background event loop thread."""
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+        if self._error:
+            raise self._error
+        logger.info(f"Modbus simulator serving {len(self.devices)} device(s) on ports {self.ports}")
+
+    def stop(self):
+        """Close all listeners and stop the event loop."""
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self._thread = None
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            for port in self.ports:
+                handler = lambda reader, writer, port=port: self._serve_connection(port, reader, writer)
+                self._servers.append(loop.run_until_complete(
+                    asyncio.start_server(handler, self.host, port)))
+        except OSError as e:
+            # Release the ports that did bind before reporting the failure
+            for server in self._servers:
+                server.close()
+                loop.run_until_complete(server.wait_closed())
+            self._servers = []
+            loop.close()
+            self._error = e
+            self._ready.set()
+            return
+
+        loop.call_soon(self._tick)
+        self._ready.set()
+        loop.run_forever()
+
+        for server in self._servers:
+            server.close()
+        self._servers = []
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+    def _tick(self):
+        t = self._loop.time()
+        for device in self.devices.values():
+            device.tick(t)
+        self._loop.call_later(self.tick_interval, self._tick)
+
+    async def _serve_connection(self, port: int, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER_SIZE)
+                tid, protocol, length, unit_id = MBAP_HEADER.unpack(header)
+                if protocol != 0 or not 2 <= length <= 254:
+                    # Unrecoverable framing error: drop the connection like a real device
+                    break
+                pdu = await reader.readexactly(length - 1)
+
+                device = self.devices.get((port, unit_id)) or self.devices.get((port, None))
+                if device is None:
+                    response = bytes([(pdu[0] | 0x80) & 0xFF, GATEWAY_TARGET_FAILED])
+                else:
+                    mode = device.fault.mode
+                    if mode == FAULT_HANG:
+                        device.stats["dropped"] += 1
+                        SERVER_DROPPED.inc()
+                        continue
+                    if mode == FAULT_DELAY and device.fault.delay > 0:
+                        await asyncio.sleep(device.fault.delay)
+                    start = time.perf_counter()
+                    response = device.handle(pdu)
+                    SERVER_REQUEST_SECONDS.observe(time.perf_counter() - start)
+                function = f"0x{pdu[0]:02x}" if pdu else "none"
+                SERVER_REQUESTS.labels(function).inc()
+                if response[0] & 0x80:
+                    SERVER_EXCEPTIONS.labels(function).inc()
+                writer.write(MBAP_HEADER.pack(tid, 0, len(response) + 1, unit_id) + response)
+                if writer.transport.get_write_buffer_size() > 1 << 16:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Simulator shutdown; end the handler quietly
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,68 @@
+import numpy as np
+from typing import List, Tuple
+
+
+class EnvelopePyramid:
+    """Multi-resolution min/max envelope of a uniformly sampled signal.
+
+    Level ``k`` stores the min and max of consecutive blocks of
+    ``factor ** k`` samples, so any visible range can be drawn from the
+    coarsest level that still has about two points per pixel.
+    """
+
+    def __init__(self, time: np.ndarray, signal: np.ndarray, factor: int = 4, min_bins: int = 256):
+        self.time = np.asarray(time)
+        self.signal = np.asarray(signal)
+        self.factor = factor
+        self.levels: List[Tuple[np.ndarray, np.ndarray]] = []
+
+        # Build coarser levels from the previous one until it is small enough
+        mins = maxs = self.signal
+        while mins.size // factor >= min_bins:
+            usable = (mins.size // factor) * factor
+            mins = mins[:usable].reshape(-1, factor).min(axis=1)
+            maxs = maxs[:usable].reshape(-1, factor).max(axis=1)
+            self.levels.append((mins, maxs))
+
+    def __len__(self) -> int:
+        return self.signal.size
+
+    def index_range(self, t_start: float, t_stop: float) -> Tuple[int, int]:
+        """Return the sample index range covering [t_start, t_stop]."""
+        start = max(int(np.searchsorted(self.time, t_start, side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(self.time, t_stop, side='right')) + 1, self.signal.size)
+        return start, stop
+
+    def envelope(self, t_start: float, t_stop: float, n_pixels: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (x, y) points to draw the visible range at ``n_pixels`` width."""
+        start, stop = self.index_range(t_start, t_stop)
+        n_pixels = max(int(n_pixels), 1)
+        if stop - start <= 2 * n_pixels or not self.levels:
+            return self.time[start:stop], self.signal[start:stop]
+
+        # Coarsest level that still has at least one bin per pixel
+        level = 0
+        block = 1
+        while level < len(self.levels) and (stop - start) // (block * self.factor) >= n_pixels:
+            level += 1
+            block *= self.factor
+        if level == 0:
+            return self.time[start:stop], self.signal[start:stop]
+
+        mins, maxs = self.levels[level - 1]
+        first = start // block
+        last = min(-(-stop // block), mins.size)
+        count = last - first
+
+        # Zig-zag through (min, max) pairs so the line traces the envelope
+        x = np.repeat(self.time[first * block:last * block:block], 2)
+        y = np.empty(2 * count, dtype=mins.dtype)
+        y[0::2] = mins[first:last]
+        y[1::2] = maxs[first:last]
+
+        # Samples past the last full block at this level become one extra pair
+        tail = last * block
+        if tail < stop:
+            x = np.append(x, [self.time[tail], self.time[stop - 1]])
+            y = np.append(y, [self.signal[tail:stop].min(), self.signal[tail:stop].max()])
+        return x, y
@@ -0,0 +1,147 @@
+import numpy as np
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+# total, overruns, anchor_total, reserved (int64) and anchor_time (float64) precede the samples
+HEADER_SIZE = 40
+
+
+class WindowUnavailable(Exception):
+    """Raised when a requested window is not yet captured or already overwritten."""
+
+
+class SignalRingBuffer:
+    """Fixed-size sample ring buffer that hands out contiguous zero-copy windows.
+
+    Every sample is stored twice, at ``i`` and ``i + capacity``, so any window
+    of up to ``capacity`` samples is a contiguous slice of the backing array
+    and can be returned as a view even when it wraps around.
+
+    With ``shared=True`` the samples and counters live in a
+    ``multiprocessing.shared_memory`` block that other processes open with
+    ``attach(name, ...)``; there must be a single writer.
+    """
+
+    def __init__(self, capacity: int, sample_rate: float, dtype=np.float64, shared: bool = False,
+                 name: Optional[str] = None, track: bool = True):
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        size = HEADER_SIZE + 2 * capacity * self.dtype.itemsize
+        self._shm = None
+        self._owner = name is None
+        if shared or name is not None:
+            self._shm = shared_memory.SharedMemory(name=name, create=name is None, size=size if name is None else 0)
+            if not self._owner and not track:
+                # Python < 3.13 registers attached blocks too, and an unrelated process's
+                # resource tracker would unlink the block when that process exits
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+            backing = self._shm.buf
+        else:
+            backing = bytearray(size)
+        self._counters = np.ndarray(4, dtype=np.int64, buffer=backing)
+        self._anchor_time = np.ndarray(1, dtype=np.float64, buffer=backing, offset=32)
+        self._data = np.ndarray(2 * capacity, dtype=self.dtype, buffer=backing, offset=HEADER_SIZE)
+        if self._owner:
+            self._counters[:] = 0
+            self._anchor_time[0] = np.nan
+        self._lock = threading.Lock()
+
+    @classmethod
+    def attach(cls, name: str, capacity: int, sample_rate: float, dtype=np.float64,
+               track: bool = True) -> "SignalRingBuffer":
+        """Open a shared ring buffer created by another process.
+
+        Pass ``track=False`` from processes not started by ``multiprocessing``
+        (which share the creator's resource tracker) so exiting does not
+        unlink the block.
+        """
+        if not name:
+            raise ValueError("A shared memory block name is required to attach")
+        return cls(capacity, sample_rate, dtype, name=name, track=track)
+
+    @property
+    def name(self) -> Optional[str]:
+        """Shared memory block name, or None for a private buffer."""
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def total(self) -> int:
+        """Number of samples written so far."""
+        return int(self._counters[0])
+
+    @property
+    def overruns(self) -> int:
+        """Samples dropped because a single write exceeded the capacity."""
+        return int(self._counters[1])
+
+    def close(self):
+        """Release a shared block; the creating process also unlinks it."""
+        if self._shm is not None:
+            self._counters = self._anchor_time = self._data = None
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+    def write(self, chunk: np.ndarray, timestamp: Optional[float] = None):
+        """Append samples; ``timestamp`` is the monotonic time of the last sample."""
+        chunk = np.asarray(chunk).reshape(-1)
+        if chunk.size > self.capacity:
+            self._counters[1] += chunk.size - self.capacity
+            chunk = chunk[-self.capacity:]
+
+        total = int(self._counters[0])
+        # Claim the range before copying so readers treat samples being overwritten as invalid
+        self._counters[3] = total + chunk.size
+        pos = total % self.capacity
+        first = min(chunk.size, self.capacity - pos)
+        data = self._data
+        data[pos:pos + first] = chunk[:first]
+        data[pos + self.capacity:pos + self.capacity + first] = chunk[:first]
+        rest = chunk.size - first
+        if rest:
+            data[:rest] = chunk[first:]
+            data[self.capacity:self.capacity + rest] = chunk[first:]
+
+        with self._lock:
+            # Publish the new total only after the samples are in place
+            self._counters[0] = total + chunk.size
+            self._counters[2] = total + chunk.size
+            self._anchor_time[0] = time.monotonic() if timestamp is None else timestamp
+
+    def sample_index_at(self, timestamp: float) -> int:
+        """Map a monotonic timestamp to an absolute sample index."""
+        with self._lock:
+            anchor_time = float(self._anchor_time[0])
+            if np.isnan(anchor_time):
+                raise WindowUnavailable("No samples captured yet")
+            # anchor_time is the time of the last written sample, index anchor_total - 1
+            last = int(self._counters[2]) - 1
+            return last + int(round((timestamp - anchor_time) * self.sample_rate))
+
+    def is_valid(self, start: int, length: int) -> bool:
+        """Check that samples [start, start + length) are captured and not being overwritten."""
+        total = self.total
+        reserved = int(self._counters[3])
+        return start >= reserved - self.capacity and start + length <= total and length <= self.capacity
+
+    def window(self, start: int, length: int) -> np.ndarray:
+        """Return samples [start, start + length) as a read-only view."""
+        if start < 0 or not self.is_valid(start, length):
+            raise WindowUnavailable(f"Samples {start}..{start + length} not available "
+                                    f"(captured {self.total}, capacity {self.capacity})")
+        pos = start % self.capacity
+        view = self._data[pos:pos + length]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, length: int) -> np.ndarray:
+        """Return the most recent ``length`` samples as a view."""
+        total = self.total
+        # Leave out the oldest samples if a write is currently overwriting them
+        in_flight = int(self._counters[3]) - total
+        length = min(length, total, self.capacity - in_flight)
+        return self.window(total - length, length)
@@ -0,0 +1,180 @@
+import numpy as np
+from dataclasses import dataclass
+import logging
+from typing import Iterator, Optional, Sequence, Tuple
+from capture import MARKER_LABEL, CaptureReader, CaptureWriter
+from config import SignalConfig
+
+logger = logging.getLogger(__name__)
+
+# Per-sample labels; the value doubles as the MARKER_LABEL marker value in captures
+LABEL_NORMAL = 0
+LABEL_FREQUENCY_DRIFT = 1
+LABEL_DROPOUT = 2
+LABEL_CLOCK_GLITCH = 3
+LABEL_HARMONICS = 4
+LABEL_AMPLITUDE_COLLAPSE = 5
+LABEL_CRASH_NOISE = 6
+SCENARIOS = ("normal", "frequency_drift", "dropout", "clock_glitch", "harmonics",
+             "amplitude_collapse", "crash_noise")
+
+
+@dataclass
+class EventSchedule:
+    """Non-overlapping anomaly events, sorted by start sample."""
+    starts: np.ndarray
+    stops: np.ndarray
+    labels: np.ndarray
+    severity: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+@dataclass
+class ScenarioChunk:
+    start: int
+    signal: np.ndarray
+    labels: np.ndarray
+
+
+class ScenarioGenerator:
+    """Seeded generator of labelled crash-scenario signals.
+
+    Events are scheduled up front as arrays (exponential gaps, uniform
+    durations, uniformly chosen scenarios) and rendered chunk by chunk
+    with a continuous phase, so datasets of any length are produced in
+    bounded memory. Output is reproducible for a given seed and chunk size.
+
+    Scenarios:
+      * ``frequency_drift``: frequency ramps by up to +/-50% over the event.
+      * ``dropout``: the probe reads exactly zero.
+      * ``clock_glitch``: sample clock stalls or skips, so samples repeat or jump.
+      * ``harmonics``: 2nd and 3rd harmonics are mixed in.
+      * ``amplitude_collapse``: amplitude decays exponentially towards zero.
+      * ``crash_noise``: the legacy crash model, 0.5x attenuation plus extra noise.
+    """
+
+    def __init__(self, config: SignalConfig, seed: int = 0, frequency: float = 10.0,
+                 events_per_second: float = 0.5, min_event: float = 0.1, max_event: float = 1.0,
+                 scenarios: Sequence[int] = range(1, len(SCENARIOS))):
+        self.config = config
+        self.rng = np.random.default_rng(seed)
+        self.frequency = frequency
+        self.events_per_second = events_per_second
+        self.min_event = min_event
+        self.max_event = max_event
+        self.scenarios = np.asarray(list(scenarios), dtype=np.uint8)
+
+    def schedule(self, n_samples: int) -> EventSchedule:
+        """Draw the anomaly events for a dataset of ``n_samples``."""
+        rate = self.config.sample_rate
+        expected = n_samples / rate * self.events_per_second
+        n = int(expected + 4 * np.sqrt(expected) + 16)
+        while True:
+            gaps = self.rng.exponential(rate / self.events_per_second, n)
+            durations = self.rng.uniform(self.min_event * rate, self.max_event * rate, n)
+            # Each event starts one gap after the previous event ends
+            starts = np.cumsum(gaps + np.concatenate(([0.0], durations[:-1]))).astype(np.int64)
+            if starts[-1] >= n_samples:
+                break
+            n *= 2
+        stops = np.minimum(starts + np.maximum(durations.astype(np.int64), 1), n_samples)
+        keep = starts < n_samples
+        return EventSchedule(
+            starts=starts[keep],
+            stops=stops[keep],
+            labels=self.rng.choice(self.scenarios, keep.sum()),
+            severity=self.rng.uniform(0.0, 1.0, keep.sum()),
+        )
+
+    def chunks(self, n_samples: int, chunk_size: int = 1 << 20,
+               schedule: Optional[EventSchedule] = None) -> Iterator[ScenarioChunk]:
+        """Render a dataset in fixed-size chunks."""
+        schedule = self.schedule(n_samples) if schedule is None else schedule
+        phase = 0.0
+        for start in range(0, n_samples, chunk_size):
+            stop = min(start + chunk_size, n_samples)
+            signal, labels, phase = self._render(schedule, start, stop, phase)
+            yield ScenarioChunk(start, signal, labels)
+
+    def generate(self, n_samples: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Render a whole dataset; defaults to the configured duration."""
+        if n_samples is None:
+            n_samples = int(self.config.duration * self.config.sample_rate)
+        signal, labels, _ = self._render(self.schedule(n_samples), 0, n_samples, 0.0)
+        return signal, labels
+
+    def write_capture(self, path: str, n_samples: int, chunk_size: int = 1 << 20,
+                      dtype: str = '<f4') -> EventSchedule:
+        """Stream a labelled dataset to a capture file.
+
+        Labels are stored as MARKER_LABEL markers at every event start
+        (scenario label) and stop (LABEL_NORMAL); see ``labels_from_capture``.
+        """
+        schedule = self.schedule(n_samples)
+        with CaptureWriter(path, self.config.sample_rate, dtype=dtype) as writer:
+            for chunk in self.chunks(n_samples, chunk_size, schedule):
+                writer.write(chunk.signal)
+            for start, stop, label in zip(schedule.starts.tolist(), schedule.stops.tolist(),
+                                          schedule.labels.tolist()):
+                writer.add_marker(MARKER_LABEL, label, sample=start)
+                writer.add_marker(MARKER_LABEL, LABEL_NORMAL, sample=stop)
+        logger.info(f"Wrote {n_samples} samples with {len(schedule)} events to {path}")
+        return schedule
+
+    def _render(self, schedule: EventSchedule, start: int, stop: int,
+                phase: float) -> Tuple[np.ndarray, np.ndarray, float]:
+        rate = self.config.sample_rate
+        index = np.arange(start, stop)
+        if len(schedule):
+            event = np.maximum(np.searchsorted(schedule.starts, index, side='right') - 1, 0)
+            event_start = schedule.starts[event]
+            active = (index >= event_start) & (index < schedule.stops[event])
+            labels = np.where(active, schedule.labels[event], LABEL_NORMAL).astype(np.uint8)
+            length = np.maximum(schedule.stops[event] - event_start, 1)
+            progress = np.where(active, (index - event_start) / length, 0.0)
+            severity = np.where(active, schedule.severity[event], 0.0)
+        else:
+            labels = np.zeros(index.shape, dtype=np.uint8)
+            progress = severity = np.zeros(index.shape)
+
+        increment = np.full(index.shape, 2 * np.pi * self.frequency / rate)
+        drift = labels == LABEL_FREQUENCY_DRIFT
+        # Drift direction follows the sign of (severity - 0.5), depth up to 50%
+        increment[drift] *= 1 + (severity[drift] - 0.5) * progress[drift]
+        glitch = labels == LABEL_CLOCK_GLITCH
+        increment[glitch] *= self.rng.integers(0, 3, glitch.sum())
+
+        phases = phase + np.cumsum(increment) - increment
+        signal = np.sin(phases)
+        next_phase = float((phases[-1] + increment[-1]) % (2 * np.pi))
+
+        harmonics = labels == LABEL_HARMONICS
+        level = 0.2 + 0.6 * severity[harmonics]
+        signal[harmonics] += level * (0.6 * np.sin(2 * phases[harmonics]) + 0.4 * np.sin(3 * phases[harmonics]))
+        collapse = labels == LABEL_AMPLITUDE_COLLAPSE
+        signal[collapse] *= np.exp(-(3 + 3 * severity[collapse]) * progress[collapse])
+        crash = labels == LABEL_CRASH_NOISE
+        signal[crash] *= 0.5
+
+        noise = self.config.noise_threshold
+        signal += self.rng.normal(0.0, noise, index.shape)
+        signal[crash] += self.rng.normal(0.0, noise, crash.sum())
+        signal[labels == LABEL_DROPOUT] = 0.0
+        return signal, labels, next_phase
+
+
+def labels_from_markers(markers: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Expand MARKER_LABEL markers into per-sample labels for samples [start, stop)."""
+    markers = markers[markers['kind'] == MARKER_LABEL]
+    index = np.searchsorted(markers['sample'], np.arange(start, stop), side='right') - 1
+    values = np.concatenate((markers['value'].astype(np.uint8), [LABEL_NORMAL]))
+    # index -1 (before the first marker) picks the trailing LABEL_NORMAL
+    return values[index]
+
+
+def labels_from_capture(reader: CaptureReader, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """Per-sample labels of a capture written by ScenarioGenerator.write_capture."""
+    stop = len(reader) if stop is None else stop
+    return labels_from_markers(reader.markers, start, stop)
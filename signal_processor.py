@@ -1,9 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from dataclasses import dataclass
 import logging
-from typing import Tuple, Optional
+from functools import cached_property, lru_cache
+from typing import Iterable, Iterator, Tuple, Optional, Sequence
 from config import SignalConfig
+from metrics import Counter, Histogram
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,6 +12,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ANALYSIS_SECONDS = Histogram("signal_analysis_seconds", "Time spent in EMSignalProcessor.analyze_signal")
+SAMPLES_ANALYZED = Counter("signal_samples_analyzed_total", "Samples passed to EMSignalProcessor.analyze_signal")
+
+# Frequency bands (Hz) used for spectral band powers
+DEFAULT_BANDS = ((0.0, 5.0), (5.0, 15.0), (15.0, 50.0), (50.0, 200.0))
+
 
 @dataclass
 class SignalAnalysis:
@@ -21,30 +28,229 @@ class SignalAnalysis:
     snr: float
 
 
-class EMSignalProcessor:
+@dataclass
+class SignalAnalysisBatch:
+    """Array-backed SignalAnalysis results, one row per device."""
+    positive_mean: np.ndarray
+    negative_mean: np.ndarray
+    peak_to_peak: np.ndarray
+    rms: np.ndarray
+    snr: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rms)
+
+    def __getitem__(self, index: int) -> SignalAnalysis:
+        return SignalAnalysis(
+            positive_mean=self.positive_mean[index],
+            negative_mean=self.negative_mean[index],
+            peak_to_peak=self.peak_to_peak[index],
+            rms=self.rms[index],
+            snr=self.snr[index]
+        )
+
+    def as_array(self) -> np.ndarray:
+        """Return the results as an (n_devices, 5) array in field order."""
+        return np.column_stack([self.positive_mean, self.negative_mean,
+                                self.peak_to_peak, self.rms, self.snr])
+
+
+@dataclass
+class SpectralFeatures:
+    frequencies: np.ndarray
+    psd: np.ndarray
+    band_powers: np.ndarray
+    dominant_frequency: np.ndarray
+    spectral_flatness: np.ndarray
+
+
+@dataclass(frozen=True)
+class WelchPlan:
+    window: np.ndarray
+    frequencies: np.ndarray
+    scale: float
+
+
+@lru_cache(maxsize=32)
+def welch_plan(sample_rate: float, nperseg: int) -> WelchPlan:
+    """Return the cached Hann window and frequency bins for (sample_rate, nperseg)."""
+    window = np.hanning(nperseg + 1)[:-1]
+    frequencies = np.fft.rfftfreq(nperseg, 1.0 / sample_rate)
+    window.flags.writeable = False
+    frequencies.flags.writeable = False
+    return WelchPlan(window=window, frequencies=frequencies,
+                     scale=1.0 / (sample_rate * np.dot(window, window)))
+
+
+def segment_view(signal: np.ndarray, nperseg: int, noverlap: int) -> np.ndarray:
+    """Return overlapping segments along the last axis as a strided view (no copy)."""
+    step = nperseg - noverlap
+    if step <= 0:
+        raise ValueError(f"noverlap ({noverlap}) must be smaller than nperseg ({nperseg})")
+    return np.lib.stride_tricks.sliding_window_view(signal, nperseg, axis=-1)[..., ::step, :]
+
+
+class SpectralAnalyzer:
+    """Welch PSD and derived spectral features for one or many captures."""
+
+    def __init__(self, sample_rate: float, nperseg: int = 256, noverlap: Optional[int] = None,
+                 bands: Sequence[Tuple[float, float]] = DEFAULT_BANDS):
+        self.sample_rate = sample_rate
+        self.nperseg = nperseg
+        self.noverlap = nperseg // 2 if noverlap is None else noverlap
+        self.bands = tuple(bands)
+
+    def psd(self, signal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Welch power spectral density along the last axis."""
+        signal = np.asarray(signal, dtype=np.float64)
+        nperseg = min(self.nperseg, signal.shape[-1])
+        noverlap = min(self.noverlap, nperseg - 1)
+        plan = welch_plan(self.sample_rate, nperseg)
+
+        segments = segment_view(signal, nperseg, noverlap)
+        # Detrend and window into a single working buffer
+        work = segments - segments.mean(axis=-1, keepdims=True)
+        work *= plan.window
+        spectrum = np.fft.rfft(work, axis=-1)
+
+        power = np.square(spectrum.real)
+        power += np.square(spectrum.imag)
+        power *= plan.scale
+        # One-sided spectrum: double everything except DC (and Nyquist for even lengths)
+        if nperseg % 2:
+            power[..., 1:] *= 2
+        else:
+            power[..., 1:-1] *= 2
+        return plan.frequencies, power.mean(axis=-2)
+
+    def analyze(self, signal: np.ndarray) -> SpectralFeatures:
+        """Compute PSD, band powers, dominant frequency and spectral flatness."""
+        frequencies, psd = self.psd(signal)
+        df = frequencies[1] - frequencies[0] if frequencies.size > 1 else 0.0
+
+        band_powers = np.stack([
+            psd[..., (frequencies >= low) & (frequencies < high)].sum(axis=-1) * df
+            for low, high in self.bands
+        ], axis=-1)
+
+        # Ignore the DC bin for peak picking and flatness
+        ac = psd[..., 1:]
+        dominant = frequencies[1:][np.argmax(ac, axis=-1)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            flatness = np.exp(np.mean(np.log(ac + np.finfo(float).tiny), axis=-1)) / np.mean(ac, axis=-1)
+
+        return SpectralFeatures(
+            frequencies=frequencies,
+            psd=psd,
+            band_powers=band_powers,
+            dominant_frequency=dominant,
+            spectral_flatness=flatness
+        )
+
+
+class StreamingSignalAnalyzer:
+    """Running accumulators producing the same SignalAnalysis as analyze_signal."""
+
     def __init__(self, config: SignalConfig):
         self.config = config
-        self.time = np.linspace(0, config.duration,
-                                int(config.duration * config.sample_rate))
+        self.reset()
+
+    def reset(self):
+        """Clear all accumulators."""
+        self.count = 0
+        self._sum_sq = 0.0
+        self._min = np.inf
+        self._max = -np.inf
+        self._pos_sum = 0.0
+        self._pos_count = 0
+        self._neg_sum = 0.0
+        self._neg_count = 0
+
+    def update(self, chunk: np.ndarray):
+        """Fold one chunk of samples into the accumulators."""
+        chunk = np.asarray(chunk, dtype=np.float64).reshape(-1)
+        if chunk.size == 0:
+            return
+
+        threshold = self.config.trigger_threshold
+        self.count += chunk.size
+        self._sum_sq += float(np.dot(chunk, chunk))
+        self._min = min(self._min, float(chunk.min()))
+        self._max = max(self._max, float(chunk.max()))
+
+        mask = chunk > threshold
+        self._pos_sum += float(chunk.sum(where=mask))
+        self._pos_count += int(np.count_nonzero(mask))
+        np.less(chunk, -threshold, out=mask)
+        self._neg_sum += float(chunk.sum(where=mask))
+        self._neg_count += int(np.count_nonzero(mask))
+
+    def result(self) -> SignalAnalysis:
+        """Return the analysis of all samples seen so far."""
+        if self.count == 0:
+            raise ValueError("No samples have been analyzed")
+
+        signal_power = self._sum_sq / self.count
+        noise_power = self.config.noise_threshold ** 2
+        return SignalAnalysis(
+            positive_mean=self._pos_sum / self._pos_count if self._pos_count else np.nan,
+            negative_mean=self._neg_sum / self._neg_count if self._neg_count else np.nan,
+            peak_to_peak=self._max - self._min,
+            rms=np.sqrt(signal_power),
+            snr=10 * np.log10(signal_power / noise_power)
+        )
+
+
+class EMSignalProcessor:
+    def __init__(self, config: SignalConfig, seed: Optional[int] = None):
+        self.config = config
+        self.n_samples = int(config.duration * config.sample_rate)
+        self.rng = np.random.default_rng(seed)
+
+    @cached_property
+    def time(self) -> np.ndarray:
+        """Time base of the full capture, allocated on first use."""
+        return np.linspace(0, self.config.duration, self.n_samples)
+
+    @cached_property
+    def _normal_signal(self) -> np.ndarray:
+        return np.sin(2 * np.pi * 10 * self.time)
 
     def generate_normal_signal(self) -> np.ndarray:
         """Generate a normal operation signal."""
-        return np.sin(2 * np.pi * 10 * self.time)
+        return self._normal_signal.copy()
+
+    def generate_normal_chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        """Generate the normal signal in fixed-size chunks without a full time base."""
+        step = self.config.duration / max(self.n_samples - 1, 1)
+        for start in range(0, self.n_samples, chunk_size):
+            stop = min(start + chunk_size, self.n_samples)
+            yield np.sin(2 * np.pi * 10 * step * np.arange(start, stop))
 
     def generate_crash_signal(self) -> np.ndarray:
         """Generate a simulated crash signal."""
-        normal = self.generate_normal_signal()
-        noise = np.random.normal(0, self.config.noise_threshold,
-                                 size=self.time.shape)
-        return normal * 0.5 + noise
+        noise = self.rng.normal(0, self.config.noise_threshold, size=self.n_samples)
+        noise += self._normal_signal * 0.5
+        return noise
+
+    def generate_crash_chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        """Generate the simulated crash signal in fixed-size chunks."""
+        for normal in self.generate_normal_chunks(chunk_size):
+            normal *= 0.5
+            normal += self.rng.normal(0, self.config.noise_threshold, size=normal.shape)
+            yield normal
 
+    @ANALYSIS_SECONDS.time()
     def analyze_signal(self, signal: np.ndarray) -> SignalAnalysis:
         """Perform comprehensive signal analysis."""
         try:
+            # float64 accumulation: float32 BLAS sums lose precision and int16 overflows
+            signal = np.asarray(signal, dtype=np.float64).reshape(-1)
+            SAMPLES_ANALYZED.inc(signal.size)
             positive, negative = self._segment_signal(signal)
-            rms = np.sqrt(np.mean(signal ** 2))
+            signal_power = np.dot(signal, signal) / signal.size
+            rms = np.sqrt(signal_power)
             peak_to_peak = np.max(signal) - np.min(signal)
-            signal_power = np.mean(signal ** 2)
             noise_power = self.config.noise_threshold ** 2
             snr = 10 * np.log10(signal_power / noise_power)
 
@@ -59,6 +265,45 @@ class EMSignalProcessor:
             logger.error(f"Error analyzing signal: {str(e)}")
             raise
 
+    def analyze_batch(self, signals: np.ndarray) -> SignalAnalysisBatch:
+        """Analyze an (n_devices, n_samples) array of captures in one pass."""
+        signals = np.asarray(signals, dtype=np.float64)
+        if signals.ndim != 2:
+            raise ValueError(f"Expected a 2-D (n_devices, n_samples) array, got shape {signals.shape}")
+
+        threshold = self.config.trigger_threshold
+        signal_power = np.einsum('ij,ij->i', signals, signals) / signals.shape[1]
+        peak_to_peak = signals.max(axis=1) - signals.min(axis=1)
+
+        # Reuse one boolean mask for both thresholded means
+        mask = signals > threshold
+        pos_count = np.count_nonzero(mask, axis=1)
+        pos_sum = np.sum(signals, axis=1, where=mask)
+        np.less(signals, -threshold, out=mask)
+        neg_count = np.count_nonzero(mask, axis=1)
+        neg_sum = np.sum(signals, axis=1, where=mask)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return SignalAnalysisBatch(
+                positive_mean=pos_sum / pos_count,
+                negative_mean=neg_sum / neg_count,
+                peak_to_peak=peak_to_peak,
+                rms=np.sqrt(signal_power),
+                snr=10 * np.log10(signal_power / self.config.noise_threshold ** 2)
+            )
+
+    def analyze_spectrum(self, signal: np.ndarray, nperseg: int = 256,
+                         noverlap: Optional[int] = None) -> SpectralFeatures:
+        """Compute spectral features for a 1-D signal or an (n_devices, n_samples) batch."""
+        return SpectralAnalyzer(self.config.sample_rate, nperseg, noverlap).analyze(signal)
+
+    def analyze_stream(self, chunks: Iterable[np.ndarray]) -> SignalAnalysis:
+        """Analyze a chunked capture in constant memory."""
+        analyzer = StreamingSignalAnalyzer(self.config)
+        for chunk in chunks:
+            analyzer.update(chunk)
+        return analyzer.result()
+
     def _segment_signal(self, signal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """Segment signal into positive and negative components."""
         positive = signal[signal > self.config.trigger_threshold]
@@ -68,6 +313,7 @@ class EMSignalProcessor:
     def visualize_signals(self, normal: np.ndarray, crash: np.ndarray,
                           save_path: Optional[str] = None):
         """Visualize and optionally save signal comparison."""
+        import matplotlib.pyplot as plt  # deferred so headless use never loads a GUI backend
         plt.figure(figsize=(12, 6))
         plt.plot(self.time, normal, label="Normal Signal", alpha=0.8)
         plt.plot(self.time, crash, label="Crash Signal", alpha=0.8)
@@ -77,6 +323,24 @@ class EMSignalProcessor:
         plt.xlabel("Time (s)")
         plt.ylabel("Amplitude")
 
+        if save_path:
+            plt.savefig(save_path)
+            plt.close()
+        else:
+            plt.show()
+
+    def visualize_segment(self, time: np.ndarray, signal: np.ndarray, label: str = "Capture",
+                          save_path: Optional[str] = None):
+        """Plot a slice of a capture, e.g. from CaptureReader.time_slice."""
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(12, 6))
+        plt.plot(time, signal, label=label, alpha=0.8)
+        plt.grid(True)
+        plt.legend()
+        plt.title("EM Capture Segment")
+        plt.xlabel("Time (s)")
+        plt.ylabel("Amplitude")
+
         if save_path:
             plt.savefig(save_path)
             plt.close()